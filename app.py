@@ -1,14 +1,25 @@
 # app.py
+import os
+
 from flask import Flask
+from src.jobs import obter_gerenciador
 from src.routes import bp as seger_bp
 
-def create_app():
+def _pai_do_reloader() -> bool:
+    """True no processo pai do reloader do modo debug, que só vigia arquivos e não atende requisições."""
+    return os.environ.get("FLASK_DEBUG") == "1" and os.environ.get("WERKZEUG_RUN_MAIN") != "true"
+
+def create_app(iniciar_jobs: bool | None = None):
     app = Flask(__name__)
     app.register_blueprint(seger_bp)
+    # Retoma já na subida os jobs interrompidos por um reinício, sem esperar
+    # a primeira chamada a /jobs (o pai do reloader não deve executá-los)
+    if iniciar_jobs if iniciar_jobs is not None else not _pai_do_reloader():
+        obter_gerenciador()
     return app
 
 if __name__ == "__main__":
-    app = create_app()
+    app = create_app(iniciar_jobs=os.environ.get("WERKZEUG_RUN_MAIN") == "true")
     app.run(host="0.0.0.0", port=5000, debug=True)
 
 
@@ -0,0 +1,303 @@
+"""
+Execução assíncrona de jobs de scraping, com progresso persistido em SQLite.
+
+`POST /api/seger/jobs` apenas registra o job e devolve seu id; threads
+despachantes executam os jobs em segundo plano com `baixar_faturas` (ou o
+motor assíncrono), gravando o andamento de cada instalação à medida que o
+scraper notifica o progresso. O banco sobrevive a reinícios: jobs que
+estavam em execução voltam para a fila e retomam apenas as instalações que
+ainda não tinham sido concluídas.
+"""
+# seger/jobs.py
+import asyncio
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from src.scraper import baixar_faturas
+from src.scraper_async import baixar_faturas_async
+
+JOBS_DB_PATH = os.getenv("SEGER_JOBS_DB", os.path.join(os.getcwd(), "seger_jobs.db"))
+"""Arquivo SQLite onde os jobs e o progresso por instalação são persistidos."""
+
+JOBS_CONCORRENTES = int(os.getenv("SEGER_JOBS_CONCORRENTES", "1"))
+"""Quantidade de jobs executados ao mesmo tempo."""
+
+STATUS_FINAIS = ("concluido", "falhou", "cancelado")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            TEXT PRIMARY KEY,
+    status        TEXT NOT NULL,
+    parametros    TEXT NOT NULL,
+    resultado     TEXT,
+    erro          TEXT,
+    criado_em     TEXT NOT NULL,
+    iniciado_em   TEXT,
+    finalizado_em TEXT
+);
+CREATE TABLE IF NOT EXISTS job_instalacoes (
+    job_id        TEXT NOT NULL REFERENCES jobs(id),
+    ordem         INTEGER NOT NULL,
+    instalacao    TEXT NOT NULL,
+    status        TEXT NOT NULL,
+    pdfs          TEXT NOT NULL DEFAULT '[]',
+    erro          TEXT,
+    atualizado_em TEXT,
+    PRIMARY KEY (job_id, instalacao)
+);
+"""
+
+def _agora() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+class GerenciadorJobs:
+    """Fila de jobs de scraping persistida em SQLite e executada por threads despachantes."""
+
+    def __init__(self, caminho_db: str = JOBS_DB_PATH, concorrentes: int = JOBS_CONCORRENTES):
+        self.caminho_db = caminho_db
+        self._fila: "queue.Queue[str]" = queue.Queue()
+        self._cancelamentos: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+        with self._conexao() as con:
+            con.executescript(_ESQUEMA)
+        for job_id in self._recuperar_interrompidos():
+            self._fila.put(job_id)
+
+        self._threads = [
+            threading.Thread(target=self._despachar, name=f"seger-jobs-{n}", daemon=True)
+            for n in range(max(1, concorrentes))
+        ]
+        for t in self._threads:
+            t.start()
+
+    @contextmanager
+    def _conexao(self):
+        con = sqlite3.connect(self.caminho_db, timeout=30)
+        con.row_factory = sqlite3.Row
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _recuperar_interrompidos(self) -> list[str]:
+        """Devolve à fila os jobs pendentes ou interrompidos por um reinício."""
+        with self._conexao() as con:
+            con.execute(
+                "UPDATE job_instalacoes SET status = 'pendente' WHERE status = 'executando'"
+            )
+            con.execute("UPDATE jobs SET status = 'pendente' WHERE status = 'executando'")
+            ids = [r["id"] for r in con.execute(
+                "SELECT id FROM jobs WHERE status = 'pendente' ORDER BY criado_em"
+            )]
+        if ids:
+            logging.info(f"📋 {len(ids)} job(s) de scraping retomados após reinício.")
+        return ids
+
+    def submeter(
+        self,
+        instalacoes: list[str],
+        data_inicio: str,
+        data_fim: str,
+        mode: bool = True,
+        workers: Optional[int] = None,
+        engine: str = "sync",
+    ) -> str:
+        """
+        Registra um job de scraping e o coloca na fila.
+
+        Args:
+            instalacoes: Uma lista de strings, onde cada string é o número da instalação.
+            data_inicio: Uma string no formato "MMM-AAAA" (inclusivo).
+            data_fim: Uma string no formato "MMM-AAAA" (inclusivo).
+            mode: Booleano indicando se o navegador deve ser headless.
+            workers: Número de contextos paralelos (ou instalações simultâneas no motor assíncrono).
+            engine: "sync" ou "async".
+
+        Returns:
+            O id do job.
+        """
+        job_id = uuid.uuid4().hex
+        parametros = {
+            "data_inicio": data_inicio,
+            "data_fim": data_fim,
+            "mode": mode,
+            "workers": workers,
+            "engine": engine,
+        }
+        with self._conexao() as con:
+            con.execute(
+                "INSERT INTO jobs (id, status, parametros, criado_em) VALUES (?, 'pendente', ?, ?)",
+                (job_id, json.dumps(parametros), _agora()),
+            )
+            con.executemany(
+                "INSERT INTO job_instalacoes (job_id, ordem, instalacao, status) VALUES (?, ?, ?, 'pendente')",
+                [(job_id, ordem, numero) for ordem, numero in enumerate(dict.fromkeys(instalacoes))],
+            )
+        self._fila.put(job_id)
+        logging.info(f"📋 Job {job_id} registrado com {len(instalacoes)} instalações.")
+        return job_id
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Consulta um job.
+
+        Returns:
+            Um dicionário com status, parâmetros, datas, resultado final (falhas e
+            métricas), um resumo das contagens por status e a lista de instalações
+            com seus PDFs salvos; None se o job não existir.
+        """
+        with self._conexao() as con:
+            job = con.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            linhas = con.execute(
+                "SELECT instalacao, status, pdfs, erro, atualizado_em FROM job_instalacoes"
+                " WHERE job_id = ? ORDER BY ordem",
+                (job_id,),
+            ).fetchall()
+
+        instalacoes = [
+            {
+                "instalacao": l["instalacao"],
+                "status": l["status"],
+                "pdfs": json.loads(l["pdfs"]),
+                "erro": l["erro"],
+                "atualizado_em": l["atualizado_em"],
+            }
+            for l in linhas
+        ]
+        resumo: Dict[str, int] = {}
+        for inst in instalacoes:
+            resumo[inst["status"]] = resumo.get(inst["status"], 0) + 1
+        return {
+            "job_id": job["id"],
+            "status": job["status"],
+            "parametros": json.loads(job["parametros"]),
+            "criado_em": job["criado_em"],
+            "iniciado_em": job["iniciado_em"],
+            "finalizado_em": job["finalizado_em"],
+            "erro": job["erro"],
+            "resultado": json.loads(job["resultado"]) if job["resultado"] else None,
+            "resumo": resumo,
+            "instalacoes": instalacoes,
+        }
+
+    def cancelar(self, job_id: str) -> Optional[str]:
+        """
+        Pede o cancelamento de um job.
+
+        Um job pendente é cancelado na hora; um job em execução tem seu evento
+        de cancelamento acionado e termina (fechando o navegador) antes da
+        próxima fatura.
+
+        Returns:
+            O status do job após o pedido, ou None se o job não existir.
+        """
+        with self._lock:
+            evento = self._cancelamentos.get(job_id)
+            if evento is not None:
+                evento.set()
+                logging.info(f"🛑 Cancelamento solicitado para o job {job_id}.")
+                return "cancelando"
+
+        with self._conexao() as con:
+            job = con.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            if job["status"] == "pendente":
+                self._finalizar(con, job_id, "cancelado")
+                return "cancelado"
+            return job["status"]
+
+    def _despachar(self) -> None:
+        while True:
+            job_id = self._fila.get()
+            try:
+                self._executar(job_id)
+            except Exception as e:
+                logging.error(f"❌ Erro inesperado no job {job_id}: {e}")
+            finally:
+                self._fila.task_done()
+
+    def _executar(self, job_id: str) -> None:
+        evento = threading.Event()
+        with self._lock, self._conexao() as con:
+            job = con.execute("SELECT status, parametros FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None or job["status"] != "pendente":
+                return
+            con.execute(
+                "UPDATE jobs SET status = 'executando', iniciado_em = COALESCE(iniciado_em, ?) WHERE id = ?",
+                (_agora(), job_id),
+            )
+            pendentes = [r["instalacao"] for r in con.execute(
+                "SELECT instalacao FROM job_instalacoes WHERE job_id = ? AND status != 'concluida' ORDER BY ordem",
+                (job_id,),
+            )]
+            self._cancelamentos[job_id] = evento
+
+        parametros = json.loads(job["parametros"])
+        logging.info(f"▶️ Job {job_id}: {len(pendentes)} instalações pendentes.")
+
+        def _progresso(numero: str, status: str, pdfs: list, erro: Optional[str]) -> None:
+            if status == "pdf":
+                return  # o status da instalação só muda por instalação; os PDFs vêm no "concluida"
+            with self._conexao() as con:
+                con.execute(
+                    "UPDATE job_instalacoes SET status = ?, pdfs = ?, erro = ?, atualizado_em = ?"
+                    " WHERE job_id = ? AND instalacao = ?",
+                    (status, json.dumps(pdfs), erro, _agora(), job_id, numero),
+                )
+
+        try:
+            argumentos = (pendentes, parametros["data_inicio"], parametros["data_fim"], parametros["mode"], parametros["workers"])
+            if parametros["engine"] == "async":
+                resultado = asyncio.run(baixar_faturas_async(*argumentos, progresso=_progresso, cancelar=evento))
+            else:
+                resultado = baixar_faturas(*argumentos, progresso=_progresso, cancelar=evento)
+            status, erro = ("cancelado" if resultado["cancelado"] else "concluido"), None
+            resumo = {"falhas": resultado["falhas"], "metricas": resultado["metricas"]}
+        except Exception as e:
+            logging.error(f"❌ Job {job_id} falhou: {e}")
+            status, erro, resumo = ("cancelado" if evento.is_set() else "falhou"), str(e), None
+        finally:
+            with self._lock:
+                self._cancelamentos.pop(job_id, None)
+
+        with self._conexao() as con:
+            self._finalizar(con, job_id, status, resumo, erro)
+        logging.info(f"⏹️ Job {job_id} finalizado: {status}.")
+
+    @staticmethod
+    def _finalizar(con, job_id: str, status: str, resumo: Optional[dict] = None, erro: Optional[str] = None) -> None:
+        # Instalações que não chegaram a rodar herdam o desfecho do job
+        pendencia = "cancelada" if status == "cancelado" else "falhou"
+        con.execute(
+            "UPDATE job_instalacoes SET status = ?, atualizado_em = ?"
+            " WHERE job_id = ? AND status IN ('pendente', 'executando', 'adiada')",
+            (pendencia, _agora(), job_id),
+        )
+        con.execute(
+            "UPDATE jobs SET status = ?, resultado = ?, erro = ?, finalizado_em = ? WHERE id = ?",
+            (status, json.dumps(resumo) if resumo is not None else None, erro, _agora(), job_id),
+        )
+
+_gerenciador: Optional[GerenciadorJobs] = None
+_gerenciador_lock = threading.Lock()
+
+def obter_gerenciador() -> GerenciadorJobs:
+    """Retorna o gerenciador de jobs do processo, criando-o (e retomando jobs) na primeira chamada."""
+    global _gerenciador
+    with _gerenciador_lock:
+        if _gerenciador is None:
+            _gerenciador = GerenciadorJobs()
+        return _gerenciador
@@ -8,38 +8,71 @@ processamento para obter dados estruturados.
 """
 from typing import Any, Dict, List, Optional
 import os, json
-import PyPDF2
 from google import genai
 from google.genai import types
-from src.parser_regex import extrair_dados_completos_da_fatura_regex
+from src.parser_regex import MOTOR, PARSER_PARADA_ANTECIPADA, extrair_dados_completos_da_fatura_regex, secoes_encontradas
+from src.utils.cache_faturas import CacheFaturas, obter_cache
+from src.utils.pdf_texto import Fonte, backend_padrao, extrair_texto
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
+import multiprocessing
 import re
+import threading
 import logging
 
 # 1) Cliente Gemini configurado via API key
 client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"), http_options=types.HttpOptions(api_version='v1alpha'))
 
-def _extrair_texto_pdf(pdf_path: str) -> str:
+PARSER_VERSAO = "2"
+"""Versão da extração de texto/regex/prompt; incremente ao alterá-la para invalidar o cache."""
+
+PARSER_PROCESSOS = int(os.getenv("PARSER_PROCESSOS", str(os.cpu_count() or 1)))
+"""Processos usados por `extrair_lote` para extrair PDFs em paralelo."""
+
+def _extrair_texto_pdf(pdf_path: Fonte, parcial: bool = False, sha256: Optional[str] = None) -> str:
     """
         Extrai o texto contido em um arquivo PDF.
 
-        Processa cada página do arquivo PDF especificado e concatena o texto
+        Processa as páginas do arquivo PDF especificado, com o backend de
+        `PDF_BACKEND` (ver `src.utils.pdf_texto`), e concatena o texto
         extraído de cada uma.
 
         Args:
-            pdf_path: O caminho para o arquivo PDF a ser processado.
+            pdf_path: O caminho para o arquivo PDF a ser processado, ou o
+                    conteúdo dele em bytes.
+            parcial: Se True, para de ler páginas assim que o texto contém
+                    as seções usadas pelo parser regex (`secoes_encontradas`).
+            sha256: Hash do PDF, se já calculado; evita recalculá-lo para o cache.
 
         Returns:
-            Uma string contendo todo o texto extraído do PDF, com as páginas
+            Uma string contendo o texto extraído do PDF, com as páginas
             separadas por quebras de linha.
     """
-    texto = []
-    with open(pdf_path, "rb") as f:
-        reader = PyPDF2.PdfReader(f)
-        for page in reader.pages:
-            texto.append(page.extract_text() or "")
-    
-    return "\n".join(texto)
+    parar = secoes_encontradas if parcial else None
+    cache = obter_cache()
+    if cache is None:
+        return extrair_texto(pdf_path, parar=parar)
+    chave = (sha256 or _hash_pdf(cache, pdf_path), _modo_cache("texto-parcial" if parcial else "texto"), PARSER_VERSAO)
+    guardado = cache.obter(chave)
+    if guardado is not None:
+        return guardado["texto"]
+    texto = extrair_texto(pdf_path, parar=parar)
+    cache.guardar(chave, {"texto": texto})
+    return texto
+
+def _hash_pdf(cache: CacheFaturas, pdf: Fonte) -> str:
+    return cache.hash_conteudo(pdf) if isinstance(pdf, bytes) else cache.hash_arquivo(pdf)
+
+def _modo_cache(modo: str) -> str:
+    # O texto (e, portanto, o resultado) depende do backend de PDF
+    return f"{modo}-{backend_padrao()}"
+
+def _modo_extracao(via_regex: bool) -> str:
+    if not via_regex:
+        return _modo_cache("llm")
+    modo = "regex-parcial" if PARSER_PARADA_ANTECIPADA else "regex"
+    # RE2 e re diferem em casos de borda (\s e \w só ASCII no RE2)
+    return _modo_cache(f"{modo}-re2" if MOTOR == "re2" else modo)
 
 def extrair_dados_completos_da_fatura(
     pdf_path: str, 
@@ -67,8 +100,50 @@ def extrair_dados_completos_da_fatura(
             ValueError: Se o conteúdo do PDF não puder ser processado como fatura.
             # Adicione outras exceções relevantes aqui.
     """
-    # 1) Extrar os dados do PDF via texto
-    texto = _extrair_texto_pdf(pdf_path)
+    return _extrair_com_cache(pdf_path, via_regex)
+
+def extrair_dados_completos_da_fatura_bytes(
+    conteudo: bytes,
+    via_regex: bool = True,
+    sha256: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+        Extrai dados completos de uma fatura a partir do PDF em memória.
+
+        Igual a `extrair_dados_completos_da_fatura`, mas sem arquivo em disco:
+        o mesmo buffer alimenta o backend de PDF e a chave do cache, então um
+        upload de uma fatura já extraída antes (do disco ou de outro upload)
+        vem direto do cache.
+
+        Args:
+            conteudo: Os bytes do arquivo PDF.
+            via_regex: Booleano indicando se a extração deve usar regex (True) ou o LLM.
+            sha256: Hash de `conteudo`, se o chamador já o calculou.
+
+        Returns:
+            Um dicionário com os dados extraídos da fatura (ou {'error': ...}).
+    """
+    return _extrair_com_cache(conteudo, via_regex, sha256)
+
+def _extrair_com_cache(pdf: Fonte, via_regex: bool, sha256: Optional[str] = None) -> Dict[str, Any]:
+    # 0) Mesmo PDF, mesmo modo e mesma versão do parser: reaproveita a extração
+    cache = obter_cache()
+    if cache is not None:
+        sha256 = sha256 or _hash_pdf(cache, pdf)
+    chave = (sha256, _modo_extracao(via_regex), PARSER_VERSAO) if cache else None
+    if chave:
+        guardado = cache.obter(chave)
+        if guardado is not None:
+            return guardado
+
+    resultado = _extrair_dados(pdf, via_regex, sha256)
+    if chave and "error" not in resultado and not resultado.get("parcial"):
+        cache.guardar(chave, resultado)
+    return resultado
+
+def _extrair_dados(pdf_path: Fonte, via_regex: bool, sha256: Optional[str] = None) -> Dict[str, Any]:
+    # 1) Extrar os dados do PDF via texto (o regex só precisa das primeiras páginas)
+    texto = _extrair_texto_pdf(pdf_path, parcial=via_regex and PARSER_PARADA_ANTECIPADA, sha256=sha256)
     # logging.info(f"texto:\n{texto}\n\n")
     if via_regex:
         try:
@@ -220,6 +295,98 @@ def extrair_dados_completos_da_fatura(
         logging.error("❌ JSON mal formatado retornado pelo modelo:\n", response.text)
         return {"error": "JSON decoding error", "raw_response": response.text}
 
+def _extrair_um(pdf_path: str, via_regex: bool) -> Dict[str, Any]:
+    """Extrai um PDF para `extrair_lote`, convertendo falhas em {'pdf', 'erro'}."""
+    try:
+        dados = extrair_dados_completos_da_fatura(pdf_path, via_regex=via_regex)
+    except Exception as e:
+        return {"pdf": pdf_path, "erro": f"{type(e).__name__}: {e}"}
+    if "error" in dados:
+        return {"pdf": pdf_path, "erro": dados["error"]}
+    return {"pdf": pdf_path, "dados": dados}
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _novo_pool(processos: int) -> ProcessPoolExecutor:
+    # "spawn" evita herdar locks de threads do Flask/scraper que um fork copiaria travados
+    return ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context("spawn"))
+
+def _obter_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _novo_pool(PARSER_PROCESSOS)
+        return _pool
+
+def _descartar_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def extrair_lote(
+    pdf_paths: List[str],
+    via_regex: bool = True,
+    workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+        Extrai os dados de vários PDFs em paralelo, em um pool de processos.
+
+        A extração de texto (PyPDF2) e o parser regex são Python puro e ficam
+        presos ao GIL; com processos, o lote escala com os núcleos. PDFs já
+        presentes no cache são resolvidos no próprio processo, sem ida ao pool.
+
+        Args:
+            pdf_paths: Caminhos dos PDFs.
+            via_regex: Booleano indicando se a extração deve usar regex (True) ou o LLM.
+            workers: Quantidade de processos. Padrão é `PARSER_PROCESSOS`, com um
+                    pool reaproveitado entre chamadas; 1 extrai no próprio processo.
+
+        Returns:
+            Uma lista na mesma ordem de `pdf_paths`, com {'pdf', 'dados'} para cada
+            PDF extraído ou {'pdf', 'erro'} para os que falharam.
+    """
+    resultados: List[Optional[Dict[str, Any]]] = [None] * len(pdf_paths)
+    pendentes: List[int] = []
+    cache = obter_cache()
+    modo = _modo_extracao(via_regex)
+    for i, pdf_path in enumerate(pdf_paths):
+        dados = None
+        if cache is not None:
+            try:
+                dados = cache.obter((cache.hash_arquivo(pdf_path), modo, PARSER_VERSAO))
+            except OSError:
+                pass  # o processo que extrair o PDF reporta o erro
+        if dados is not None:
+            resultados[i] = {"pdf": pdf_path, "dados": dados}
+        else:
+            pendentes.append(i)
+
+    processos = workers or PARSER_PROCESSOS
+    if processos <= 1 or len(pendentes) <= 1:
+        for i in pendentes:
+            resultados[i] = _extrair_um(pdf_paths[i], via_regex)
+        return resultados
+
+    avulso = workers is not None and workers != PARSER_PROCESSOS
+    pool = _novo_pool(processos) if avulso else _obter_pool()
+    try:
+        futuros = {i: pool.submit(_extrair_um, pdf_paths[i], via_regex) for i in pendentes}
+        for i, futuro in futuros.items():
+            try:
+                resultados[i] = futuro.result()
+            except Exception as e:  # processo morto (BrokenProcessPool) ou resultado não serializável
+                resultados[i] = {"pdf": pdf_paths[i], "erro": f"{type(e).__name__}: {e}"}
+                if not avulso:
+                    _descartar_pool(pool)
+    finally:
+        if avulso:
+            pool.shutdown()
+    logging.info(f"🧾 Lote de {len(pdf_paths)} PDFs extraído ({len(pdf_paths) - len(pendentes)} do cache, {processos} processos).")
+    return resultados
+
 def analisar_eficiencia_energetica(
     fatura_dados: List[Dict[str, Any]],
     tarifas,
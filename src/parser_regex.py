@@ -1,21 +1,25 @@
 # src/parser_regex.py
-from __future__ import annotations
-
 """
 Módulo para análise de faturas de energia usando expressões regulares (regex).
 
 Este módulo contém funções para extrair informações específicas de texto,
 principalmente de faturas de energia em formato de texto, utilizando padrões regex.
-Inclui helpers para limpeza de números, busca e extração de padrões,
-e uma função principal para extrair dados completos da fatura.
+Inclui helpers para limpeza de números, a tabela `CAMPOS` com os extratores
+pré-compilados de cada campo, o índice de seções que restringe cada extrator ao
+trecho da fatura onde o campo aparece, o motor que os executa (medindo tempo,
+acertos e faltas por campo) e uma função principal que monta os dados completos
+da fatura.
 """
+from __future__ import annotations
 
-import json, re, sys
+import glob, json, os, re, sys
 import logging
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
-from PyPDF2 import PdfReader
+from src.utils.pdf_texto import extrair_texto
 
 
 # ╭─────────────────────────  HELPERS  ─────────────────────────╮
@@ -23,19 +27,19 @@ NUMBER = r"\d+[.,]\d+|\d{1,3}(?:\.\d{3})*(?:[.,]\d+)?|\d+"
 DECIMAL = r"-?\d{1,3}(?:\.\d{3})*(?:,\d+)?-?"
 
 def _clean_num(n: str | None) -> float | None:
- """
- Limpa e converte uma string numérica para float.
+    """
+    Limpa e converte uma string numérica para float.
 
- Remove espaços em branco, trata sinais negativos no final e normaliza
- separadores decimais e de milhar para o formato float do Python.
+    Remove espaços em branco, trata sinais negativos no final e normaliza
+    separadores decimais e de milhar para o formato float do Python.
 
- Args:
- n: A string numérica a ser limpa e convertida. Pode ser None.
+    Args:
+        n: A string numérica a ser limpa e convertida. Pode ser None.
 
- Returns:
- O valor numérico convertido para float, ou None se a entrada for
- None ou não puder ser convertida.
- """
+    Returns:
+        O valor numérico convertido para float, ou None se a entrada for
+        None ou não puder ser convertida.
+    """
     if not n:
         return None
     s = n.strip()
@@ -52,48 +56,19 @@ def _clean_num(n: str | None) -> float | None:
         return None
 
 
-def _find(pat: str, text: str, flags=0, group: int | str = 1, default=None):
-    m = re.search(pat, text, flags)
- """
- Busca um padrão regex no texto e retorna a primeira ocorrência de um grupo.
-
- Args:
- pat: O padrão regex a ser buscado.
- text: O texto onde buscar o padrão.
- flags: Flags para a busca regex (ex: re.IGNORECASE). Padrão é 0.
- group: O índice ou nome do grupo a ser retornado. Padrão é 1.
- default: O valor a ser retornado se o padrão não for encontrado.
- Padrão é None.
-
- Returns:
- O conteúdo do grupo especificado na primeira ocorrência do padrão,
- ou o valor padrão se o padrão não for encontrado.
- """
-    if not m:
-        return default
-    try:
-        return m[group]
-    except IndexError:
-        return m[0]
-
-
-def _findall(pat: str, text: str, flags=0) -> List[Tuple[str, ...]]:
-    return [m.groups() for m in re.finditer(pat, text, flags)]
- """
- Encontra todas as ocorrências de um padrão regex e retorna os grupos.
-
- Args:
- pat: O padrão regex a ser buscado.
- text: O texto onde buscar o padrão.
- flags: Flags para a busca regex (ex: re.IGNORECASE). Padrão é 0.
-
- Returns:
- Uma lista de tuplas, onde cada tupla contém os grupos capturados
- de uma ocorrência do padrão.
- """
+def formatar_proprio_title(texto: str) -> str:
+    """
+    Formata um texto para um estilo de título específico.
 
+    Corrige espaços após vírgulas, expande abreviações comuns, aplica
+    capitalização com exceções para preposições/conjunções e corrige
+    siglas específicas para maiúsculas.
 
-def formatar_proprio_title(texto: str) -> str:
+    Args:
+        texto: O texto a ser formatado.
+    Returns:
+        O texto formatado.
+    """
     # Corrige falta de espaço após vírgulas (ex: ",123" → ", 123")
     texto = re.sub(r",(?=\S)", ", ", texto)
 
@@ -108,18 +83,6 @@ def formatar_proprio_title(texto: str) -> str:
         r'\bAdm\b': 'Administrativo',
     }
     for padrao, subst in abrevs.items():
- """
- Formata um texto para um estilo de título específico.
-
- Corrige espaços após vírgulas, expande abreviações comuns, aplica
- capitalização com exceções para preposições/conjunções e corrige
- siglas específicas para maiúsculas.
-
- Args:
- texto: O texto a ser formatado.
- Returns:
- O texto formatado.
- """
         texto = re.sub(padrao, subst, texto, flags=re.IGNORECASE)
 
     # Aplica capitalização
@@ -150,302 +113,731 @@ def formatar_proprio_title(texto: str) -> str:
 
     return resultado
 
-# ╭────────────────────  NÚCLEO DE EXTRAÇÃO  ───────────────────╮
-def extrair_dados_completos_da_fatura_regex(texto: str) -> Dict[str, Any]:
- """
- Extrai dados completos de uma fatura de energia em formato de texto usando regex.
+# ╭────────────────────  ÍNDICE DE SEÇÕES  ───────────────────╮
+PARSER_SECOES = os.getenv("PARSER_SECOES", "1") == "1"
+"""Restringe cada extrator à seção da fatura onde o campo aparece (0 busca no texto inteiro)."""
 
- Analisa o texto da fatura para extrair informações como identificação,
- leituras, consumo, demanda, energia reativa, impostos, tarifas e
- componentes extras, utilizando uma série de padrões regex.
+ANCORAS_SECOES: Dict[str, re.Pattern] = {
+    "leituras": re.compile(r"Roteiro de leitura", re.I),
+    "itens": re.compile(r"Itens\s+da\s+Fatura|^\s*(?:TUSD|TE)\s*-", re.I),
+    "demanda": re.compile(r"Demanda\s+(?:Contratual|Máx)|^\s*DMCR\b", re.I),
+    "energia_reativa": re.compile(r"^\s*(?:Energia\s+Reativa\s+F?Ponta|Dem\.?\s+Reat)", re.I),
+    "tributos": re.compile(r"Tributos|^[\d.,\s]*\b(?:PIS|COFINS)\b", re.I),
+}
+"""Linha que abre cada seção; a seção vai até a abertura da seção seguinte."""
 
- Args:
- texto: O texto completo da fatura de energia.
+class IndiceTexto:
+    """
+    Texto da fatura dividido em linhas e seções uma única vez por extração.
 
- Returns:
- Um dicionário contendo os dados extraídos da fatura, organizados
- em chaves como 'identificacao', 'leituras', 'consumo_ativo', etc.
- Os valores podem ser strings, números, listas ou dicionários.
- """
+    Cada seção de `ANCORAS_SECOES` começa na primeira linha que casa com a
+    sua âncora e termina onde começa a próxima seção encontrada (ou no fim
+    do texto). Seções sem âncora no texto ficam de fora, e os extratores
+    delas recebem o texto inteiro.
+    """
 
-    out: Dict[str, Any] = {
-        "identificacao": {},
-        "leituras": {},
-        "consumo_ativo": {},
-        "demanda": {},
-        "energia_reativa": {},
-        "impostos": [],
-        "tarifas": {},
-        "componentes_extras": []
-    }
-    
-    identificacao = {}
-    # logging.info("Extraindo endereço...")
-    # Endereço
+    def __init__(self, texto: str):
+        self.texto = texto
+        self.linhas = texto.splitlines()
+        inicios: Dict[str, Tuple[int, int]] = {}  # seção -> (linha, offset)
+        offset = 0
+        pendentes = dict(ANCORAS_SECOES) if PARSER_SECOES else {}
+        for i, bruta in enumerate(texto.splitlines(keepends=True)):
+            for nome, ancora in list(pendentes.items()):
+                if ancora.search(bruta):
+                    inicios[nome] = (i, offset)
+                    del pendentes[nome]
+            if not pendentes:
+                break
+            offset += len(bruta)
+
+        ordem = sorted(inicios.items(), key=lambda item: item[1])
+        self.secoes: Dict[str, Tuple[int, int, int, int]] = {}
+        """seção -> (linha inicial, linha final, offset inicial, offset final)."""
+        for n, (nome, (linha, inicio)) in enumerate(ordem):
+            fim_linha, fim = ordem[n + 1][1] if n + 1 < len(ordem) else (len(self.linhas), len(texto))
+            self.secoes[nome] = (linha, fim_linha, inicio, fim)
+
+    def trecho(self, secao: Optional[str]) -> str:
+        """Texto da seção, ou o texto inteiro se ela não foi encontrada."""
+        if secao not in self.secoes:
+            return self.texto
+        _, _, inicio, fim = self.secoes[secao]
+        return self.texto[inicio:fim]
+
+    def linhas_de(self, secao: Optional[str]) -> List[str]:
+        """Linhas da seção, ou todas as linhas se ela não foi encontrada."""
+        if secao not in self.secoes:
+            return self.linhas
+        linha, fim_linha, _, _ = self.secoes[secao]
+        return self.linhas[linha:fim_linha]
+
+# ╭────────────────────  SEÇÕES NECESSÁRIAS  ───────────────────╮
+PARSER_PARADA_ANTECIPADA = os.getenv("PARSER_PARADA_ANTECIPADA", "0") == "1"
+"""Para de ler o PDF quando todas as seções de `SECOES_FATURA` aparecem (padrão 0: lê tudo)."""
+
+SECOES_FATURA: Dict[str, re.Pattern] = {
+    # CNPJ da EDP e, em seguida, o do cliente (o endereço fica logo acima)
+    "identificacao": re.compile(r"CNPJ[:\s]*\d{8,}[\s\S]*?CNPJ[:\s]*\d{8,}"),
+    "referencia": re.compile(
+        r"(Janeiro|Fevereiro|Mar[çc]o|Abril|Maio|Junho|Julho|Agosto|"
+        r"Setembro|Outubro|Novembro|Dezembro)/(\d{4})"
+    ),
+    "numero_instalacao": re.compile(r"\b\d{10}PAG\b"),
+    "numero_cliente": re.compile(r"COD\. IDENT\. \d{10}"),
+    "totais": re.compile(r"TOTAL\s+(" + NUMBER + r")\s+(" + NUMBER + r")", re.I),
+    # as âncoras do índice casam linha a linha; no texto acumulado, `^` precisa de re.M
+    **{nome: re.compile(ancora.pattern, ancora.flags | re.M) for nome, ancora in ANCORAS_SECOES.items()},
+}
+"""
+Marcadores das seções lidas por `extrair_dados_completos_da_fatura_regex`:
+identificação, referência, códigos da instalação e do cliente, totais e
+cada seção de `ANCORAS_SECOES` (leituras, itens, demanda, energia reativa
+e tributos). Trechos opcionais, como a energia injetada do SCEE, não têm
+marcador: numa fatura em que eles venham depois de todas as seções acima,
+a parada antecipada os perde, por isso ela é opcional.
+"""
 
-    lines = texto.splitlines()
+def secoes_encontradas(texto: str) -> bool:
+    """
+    Indica se o texto já contém todas as seções de `SECOES_FATURA`.
 
-    # Busca o CNPJ da EDP (distribuidora) e do cliente
-    cnpj_linhas = [(i, ln.strip()) for i, ln in enumerate(lines) if re.search(r"CNPJ[:\s]*\d{8,}", ln)]
+    Usado como critério de parada da leitura página a página quando
+    `PARSER_PARADA_ANTECIPADA` está ligado: nas faturas da EDP essas seções
+    ficam na primeira ou segunda página, e as páginas seguintes (anexos,
+    avisos) não precisam ser extraídas.
 
-    if len(cnpj_linhas) >= 2:
-        # Segunda ocorrência é o CNPJ do cliente
-        idx, _ = cnpj_linhas[1]
-        
-        # Procura linha com CEP (com ou sem "CEP:")
-        for j in range(idx-1, max(idx-10, 0), -1):  # tenta mais linhas
-            if re.search(r"\d{5}-\d{3}", lines[j]):
-                cep_line = lines[j]
-                local_line = lines[j-1].strip()
-                logradouro_line = lines[j-2].strip()
-                unidade_candidates = []
-
-                # Coleta até 4 linhas acima do logradouro
-                for k in range(j - 3, j - 7, -1):
-                    if k < 0:
-                        continue
-                    l = lines[k].strip()
-                    if not l or re.search(r"EDP|Distrib", l, re.I):
-                        continue
-                    if re.search(r"\b(trif[aá]sico|grupo\s+[a-z0-9]+|classe|verde|vermelha|\d{2}/\d{2}/\d{4})", l, re.I):
-                        continue
-                    # Se linha parece conter classe/subclasse (ex: "PODER PUBLICO - ESTADUAL")
-                    if re.search(r"[A-Z\s]+-\s*[A-Z\s]+", l):
-                        break
-                    if re.search(r"\b(av|rua|rod|estrada|praça|alameda|sn|cep|cariacica|vit[oó]ria)\b", l, re.I):
-                        break
-                    unidade_candidates.insert(0, l)
-
-                unidade = " ".join(unidade_candidates).strip()
-                cep = re.search(r"\d{5}-\d{3}", cep_line).group(0)
-                identificacao["unidade"] = formatar_proprio_title(unidade)
-                identificacao["endereco"] = formatar_proprio_title(f"{logradouro_line}, {local_line}, CEP: {cep}")
-                break
+    Args:
+        texto: O texto acumulado das páginas lidas até agora.
 
-    else:
-        identificacao["unidade"] = "N/A"
-        identificacao["endereco"] = "N/A"
+    Returns:
+        True se todos os marcadores foram encontrados.
+    """
+    return all(padrao.search(texto) for padrao in SECOES_FATURA.values())
+
+# ╭────────────────────  TABELA DE CAMPOS  ───────────────────╮
+class Campo(NamedTuple):
+    """Um extrator da tabela `CAMPOS`."""
+
+    nome: str
+    """Identificador do campo (ex.: "demanda.ultrapassagem_kw"), usado nas estatísticas."""
+    padrao: Optional[re.Pattern]
+    """Regex pré-compilada; None quando `tratar` recebe as linhas da seção."""
+    tratar: Callable[[Any], Any]
+    """Converte o match (ou as linhas) no valor do campo; None conta como falta."""
+    todos: bool = False
+    """Se True, aplica `tratar` a cada ocorrência (finditer) e devolve a lista."""
+    secao: Optional[str] = None
+    """Seção de `ANCORAS_SECOES` onde o campo é buscado; None busca no texto inteiro."""
+
+NUMBER_RE = re.compile(NUMBER)
+
+def _grupo(n: int = 1) -> Callable[[re.Match], str]:
+    return lambda m: m.group(n)
+
+def _num(n: int = 1) -> Callable[[re.Match], float | None]:
+    return lambda m: _clean_num(m.group(n))
+
+def _periodo_kw(m: re.Match) -> Dict[str, Any]:
+    periodo, qtd = m.groups()
+    return {
+        "periodo": "ponta" if periodo.lower().startswith("ponta") else "fora_ponta",
+        "valor_kw": _clean_num(qtd),
+    }
 
-    # Tensão nominal e unidade
-    # logging.info("Extraindo Tensão nominal...")
-    tensao_match = re.search(r"\b(\d{1,3}[.,]?\d{0,3})\s*V\b", texto)
-    if tensao_match:
-        tensao_val = tensao_match.group(1).replace(",", ".")
-        identificacao["tensao"] = tensao_val
-        identificacao["tensaoUnid"] = "kV" if float(tensao_val) >= 1000 else "V"
+def _endereco(lines: List[str]) -> Dict[str, str] | None:
+    """Unidade e endereço do cliente, lidos das linhas acima do CNPJ dele."""
+    # Busca o CNPJ da EDP (distribuidora) e do cliente
+    cnpj_linhas = [(i, ln.strip()) for i, ln in enumerate(lines) if re.search(r"CNPJ[:\s]*\d{8,}", ln)]
 
-        # Nível de tensão baseado no valor
-        t = float(tensao_val)
-        if t >= 1000:
-            identificacao["nivel_tensao"] = "alta tensão"
-        elif t >= 1:
-            identificacao["nivel_tensao"] = "média tensão"
-        else:
-            identificacao["nivel_tensao"] = "baixa tensão"
+    if len(cnpj_linhas) < 2:
+        return {"unidade": "N/A", "endereco": "N/A"}
+
+    # Segunda ocorrência é o CNPJ do cliente
+    idx, _ = cnpj_linhas[1]
+
+    # Procura linha com CEP (com ou sem "CEP:")
+    for j in range(idx-1, max(idx-10, 0), -1):  # tenta mais linhas
+        if re.search(r"\d{5}-\d{3}", lines[j]):
+            cep_line = lines[j]
+            local_line = lines[j-1].strip()
+            logradouro_line = lines[j-2].strip()
+            unidade_candidates = []
+
+            # Coleta até 4 linhas acima do logradouro
+            for k in range(j - 3, j - 7, -1):
+                if k < 0:
+                    continue
+                l = lines[k].strip()
+                if not l or re.search(r"EDP|Distrib", l, re.I):
+                    continue
+                if re.search(r"\b(trif[aá]sico|grupo\s+[a-z0-9]+|classe|verde|vermelha|\d{2}/\d{2}/\d{4})", l, re.I):
+                    continue
+                # Se linha parece conter classe/subclasse (ex: "PODER PUBLICO - ESTADUAL")
+                if re.search(r"[A-Z\s]+-\s*[A-Z\s]+", l):
+                    break
+                if re.search(r"\b(av|rua|rod|estrada|praça|alameda|sn|cep|cariacica|vit[oó]ria)\b", l, re.I):
+                    break
+                unidade_candidates.insert(0, l)
+
+            unidade = " ".join(unidade_candidates).strip()
+            cep = re.search(r"\d{5}-\d{3}", cep_line).group(0)
+            return {
+                "unidade": formatar_proprio_title(unidade),
+                "endereco": formatar_proprio_title(f"{logradouro_line}, {local_line}, CEP: {cep}"),
+            }
+    return None
 
-    # Demais campos
-    # logging.info("Extraindo demais campos de identificação...")
-    identificacao.update({
-        # Número da instalação (ex: 0009500016)
-        "numero_instalacao": _find(r"\b(\d{10})PAG\b", texto),
+_MESES = {
+    "Janeiro":"01","Fevereiro":"02","Março":"03","Marco":"03","Abril":"04",
+    "Maio":"05","Junho":"06","Julho":"07","Agosto":"08","Setembro":"09",
+    "Outubro":"10","Novembro":"11","Dezembro":"12"
+}
 
-        # Número do cliente (ex: 0152128200)
-        "numero_cliente": _find(r"COD\. IDENT\. (\d{10})", texto),
+def _mes_referencia(m: re.Match) -> str:
+    nome, ano = m.groups()
+    return f"{_MESES[nome]}/{ano}"
 
-        # Grupo tarifário (ex: A)
-        "grupo_tarifario": _find(r"\bGrupo\s+([A-Z])\b", texto, re.IGNORECASE),
+_IGNORAR_DEMANDA = re.compile(r"\b(Contratual|Não|Nao|Ultrapassagem)\b", re.I)
 
-        # Subgrupo (ex: A4)
-        "subgrupo": _find(r"\b(A[0-9])\b", texto),
+def _demanda_custos(linhas: List[str]) -> Dict[str, float | None] | None:
+    """Primeira linha com "Demanda" e 3 números (quantidade, tarifa e valor)."""
+    for ln in linhas:
+        if "Demanda" not in ln:
+            continue
+        # ignora Contratual, Não Utilizada, Ultrapassagem
+        if _IGNORAR_DEMANDA.search(ln):
+            continue
+        nums = NUMBER_RE.findall(ln)
+        if len(nums) >= 3:
+            qtd, tarifa_unit, valor = nums[:3]
+            return {
+                "fora_ponta_kw":   _clean_num(qtd),
+                "tarifa_unitaria": _clean_num(tarifa_unit),
+                "valor_total":     _clean_num(valor),
+            }
+    return None
+
+def _tarifa(m: re.Match) -> Dict[str, Any]:
+    desc, periodo, qtd, tarifa_unit, valor_tot = m.groups()
+    return {
+        "descricao":      desc,
+        "periodo":        periodo.replace("FPonta", "Fora Ponta").lower().replace(" ", "_"),
+        "quantidade":     _clean_num(qtd),
+        "tarifa_unitaria":_clean_num(tarifa_unit),
+        "valor_total":    _clean_num(valor_tot),
+    }
 
-        # Classe/Subclasse (ex: PODER PUBLICO - ESTADUAL)
-        "classe": _find(r"(PODER\s+PUBLICO\s*-\s*[A-Z\s]+)", texto),
-    })
+def _componente_extra(m: re.Match) -> Dict[str, Any]:
+    nome, qtd, tarifa, valor, imposto = m.groups()
+    if nome.strip() == "Contribuição de Ilum. Pública - Lei Municipal":
+        # nesta linha a fatura traz o valor antes da tarifa
+        tarifa, valor = valor, tarifa
+    return {
+        "descricao": nome.strip(),
+        "quantidade": _clean_num(qtd),
+        "tarifa_unitaria": _clean_num(tarifa),
+        "valor_total": _clean_num(valor),
+        "valor_impostos": _clean_num(imposto)
+    }
 
-    modalidade_match = re.search(r"\b(A\s+)?(AZUL|VERDE|BRANCA|CONVENCIONAL)(?=\b)", texto, re.IGNORECASE)
-    if modalidade_match:
-        modalidade = modalidade_match.group(2).lower()
-        identificacao["modalidade"] = modalidade
+def _retencao(m: re.Match) -> Dict[str, Any]:
+    nome, valor, imposto = m.groups()
+    return {
+        "descricao": nome.strip(),
+        "valor_total": _clean_num(valor),
+        "valor_impostos": _clean_num(imposto)
+    }
 
-    # Mês de referência
-    mes_ano = re.search(
-        r"(Janeiro|Fevereiro|Mar[çc]o|Abril|Maio|Junho|Julho|Agosto|"
-        r"Setembro|Outubro|Novembro|Dezembro)/(\d{4})", texto
-    )
-    if mes_ano:
-        nome, ano = mes_ano.groups()
-        mes_map = {
-            "Janeiro":"01","Fevereiro":"02","Março":"03","Marco":"03","Abril":"04",
-            "Maio":"05","Junho":"06","Julho":"07","Agosto":"08","Setembro":"09",
-            "Outubro":"10","Novembro":"11","Dezembro":"12"
-        }
-        identificacao["mes_referencia"] = f"{mes_map[nome]}/{ano}"
+def _multa(m: re.Match) -> Dict[str, Any]:
+    nome, valor, multa = m.groups()
+    return {
+        "descricao": nome.strip(),
+        "valor_total": _clean_num(multa)
+    }
 
-    # Atribuição final
-    out["identificacao"] = {k: v for k, v in identificacao.items() if v}
+CAMPOS: List[Campo] = [
+    # ---------- IDENTIFICAÇÃO ----------
+    Campo("identificacao.endereco", None, _endereco),
+    Campo("identificacao.tensao", re.compile(r"\b(\d{1,3}[.,]?\d{0,3})\s*V\b"),
+          lambda m: m.group(1).replace(",", ".")),
+    # Número da instalação (ex: 0009500016)
+    Campo("identificacao.numero_instalacao", re.compile(r"\b(\d{10})PAG\b"), _grupo()),
+    # Número do cliente (ex: 0152128200)
+    Campo("identificacao.numero_cliente", re.compile(r"COD\. IDENT\. (\d{10})"), _grupo()),
+    # Grupo tarifário (ex: A)
+    Campo("identificacao.grupo_tarifario", re.compile(r"\bGrupo\s+([A-Z])\b", re.IGNORECASE), _grupo()),
+    # Subgrupo (ex: A4)
+    Campo("identificacao.subgrupo", re.compile(r"\b(A[0-9])\b"), _grupo()),
+    # Classe/Subclasse (ex: PODER PUBLICO - ESTADUAL)
+    Campo("identificacao.classe", re.compile(r"(PODER\s+PUBLICO\s*-\s*[A-Z\s]+)"), _grupo()),
+    Campo("identificacao.modalidade", re.compile(r"\b(A\s+)?(AZUL|VERDE|BRANCA|CONVENCIONAL)(?=\b)", re.IGNORECASE),
+          lambda m: m.group(2).lower()),
+    Campo("identificacao.mes_referencia", re.compile(
+        r"(Janeiro|Fevereiro|Mar[çc]o|Abril|Maio|Junho|Julho|Agosto|"
+        r"Setembro|Outubro|Novembro|Dezembro)/(\d{4})"), _mes_referencia),
 
     # ---------- LEITURAS ----------
-    # logging.info("Extraindo informações das leituras...")
-    out["leituras"] = {}
-    if (m := re.search(r"Roteiro de leitura:.*?:\s*([0-3]\d/\d{2}/\d{4})\s*a\s*([0-3]\d/\d{2}/\d{4})", texto)):
-        out["leituras"]["leitura_inicio"], out["leituras"]["leitura_fim"] = m.groups()
-
-    out["leituras"] = {k: v for k, v in out["leituras"].items() if v}
+    Campo("leituras", re.compile(r"Roteiro de leitura:.*?:\s*([0-3]\d/\d{2}/\d{4})\s*a\s*([0-3]\d/\d{2}/\d{4})"),
+          lambda m: m.groups(), secao="leituras"),
 
     # ---------- CONSUMO ATIVO ----------
-    # Ponta
-    m = re.search(
-        rf"(?:TUSD\s*-\s*.*?Fornecida\s+Ponta|Consumo\s+Ativo\s+Ponta)\s+kWh\s+({NUMBER})",
-        texto, re.I
-    )
-    # logging.info(f"match energia Ponta: {m}")
-    if m:
-        out["consumo_ativo"]["ponta_kwh"] = _clean_num(m.group(1))
-
-    # Fora-Ponta
-    m = re.search(
+    Campo("consumo_ativo.ponta_kwh", re.compile(
+        rf"(?:TUSD\s*-\s*.*?Fornecida\s+Ponta|Consumo\s+Ativo\s+Ponta)\s+kWh\s+({NUMBER})", re.I), _num(), secao="itens"),
+    Campo("consumo_ativo.fora_ponta_kwh", re.compile(
         rf"(?:TUSD\s*-\s*.*?Fornecida\s+(?:Fora\s+Ponta|FPonta)|(?:TUSD\s*-\s*)?Cons\s+Ativo\s+(?:Fora\s+Ponta|FPonta))\s+kWh\s+({NUMBER})",
-        texto, re.I
-    )
-    # logging.info(f"match energia Fora Ponta: {m}")
-    if m:
-        out["consumo_ativo"]["fora_ponta_kwh"] = _clean_num(m.group(1))
-
+        re.I), _num(), secao="itens"),
     # Energia Injetada (com possível "-" no fim)
-    m = re.search(
-        rf"(?:Inj\.\w+|Injetada)[^\n]*?\s({DECIMAL})\s+KWH",
-        texto, re.I
-    )
-    # logging.info(f"match energia injetada: {m}")
-    if m:
-        energia_injetada = _clean_num(m.group(1))
-        # logging.info(f"energia injetada: {energia_injetada}")
-        out["consumo_ativo"]["energia_injetada_kwh"] = energia_injetada
-    else:
-        out["consumo_ativo"]["energia_injetada_kwh"] = 0.0
-
-    # Total
-    if "ponta_kwh" in out["consumo_ativo"] and "fora_ponta_kwh" in out["consumo_ativo"]:
-        out["consumo_ativo"]["total_kwh"] = round(
-            out["consumo_ativo"]["ponta_kwh"] +
-            out["consumo_ativo"]["fora_ponta_kwh"], 4)
-
+    Campo("consumo_ativo.energia_injetada_kwh", re.compile(
+        rf"(?:Inj\.\w+|Injetada)[^\n]*?\s({DECIMAL})\s+KWH", re.I), _num()),
 
     # ---------- DEMANDA ----------
-    contratada_fp_pat = rf"Demanda\s+Contratual\s+(?:FP-)?KW\s+({NUMBER})"
-    contratada_p_pat = rf"Demanda\s+Contratual\s+P-KW\s+({NUMBER})"
-    contratada_geral_pat = rf"Demanda\s+Contratual-?KW\s+({NUMBER})"
-
-    # Extrações
-    valor_p_kw = _find(contratada_p_pat, texto, re.I)
-    valor_fp_kw = _find(contratada_fp_pat, texto, re.I)
-    valor_geral_kw = _find(contratada_geral_pat, texto, re.I)
-
-    # Registro no dicionário
-    out.setdefault("demanda", {})
-
-    if valor_p_kw:
-        out["demanda"]["contratada_p_kw"] = _clean_num(valor_p_kw)
-
-    if valor_fp_kw:
-        out["demanda"]["contratada_fp_kw"] = _clean_num(valor_fp_kw)
-
-    # Se não tiver FP-KW explícito mas tiver "Demanda Contratual KW", considerar como FP
-    elif valor_geral_kw:
-        out["demanda"]["contratada_fp_kw"] = _clean_num(valor_geral_kw)
-
-    # ---------- DEMANDA MÁXIMA (leitura) ----------
+    Campo("demanda.contratada_p_kw", re.compile(rf"Demanda\s+Contratual\s+P-KW\s+({NUMBER})", re.I), _num(), secao="demanda"),
+    Campo("demanda.contratada_fp_kw", re.compile(rf"Demanda\s+Contratual\s+(?:FP-)?KW\s+({NUMBER})", re.I), _num(), secao="demanda"),
+    Campo("demanda.contratada_kw", re.compile(rf"Demanda\s+Contratual-?KW\s+({NUMBER})", re.I), _num(), secao="demanda"),
     # aceita “Máx” ou “Máxima”
-    out.setdefault("demanda", {})
-    max_pat = rf"""
+    Campo("demanda.maxima", re.compile(rf"""
         Demanda\s+Máx(?:ima)?\s+           # “Máx” ou “Máxima”
         (Ponta|FPonta|Fora\s*Ponta)        # período
         .*?                                # ignora o que vier no meio
         ({NUMBER})\s*[kK][wW]              # valor em kW
-    """
-    for periodo, qtd in re.findall(max_pat, texto, re.I | re.X):
-        chave = "ponta" if periodo.lower().startswith("ponta") else "fora_ponta"
-        out["demanda"].setdefault("maxima", []).append({
-            "periodo": chave,
-            "valor_kw": _clean_num(qtd)
-        })
-
-    # ---------- ULTRAPASSAGEM ----------
+    """, re.I | re.X), _periodo_kw, todos=True, secao="demanda"),
     # caso exista a linha “Ultrapassagem kW 13,5420 …”
-    m = re.search(
-        rf"Ultrapassagem\s+kW\s+({NUMBER})",
-        texto, re.I
-    )
-    if m:
-        out["demanda"]["ultrapassagem_kw"] = _clean_num(m.group(1))
-
-    dmcr_pat = rf"""
+    Campo("demanda.ultrapassagem_kw", re.compile(rf"Ultrapassagem\s+kW\s+({NUMBER})", re.I), _num(), secao="demanda"),
+    Campo("demanda.dmcr", re.compile(rf"""
         (?m)                                # modo multiline, ^ e $ funcionam por linha
         ^(?!Perdas)                        # não captura linhas que comecem com “Perdas”
         DMCR\s+                            # linha começando com “DMCR”
         (Ponta|F(?:Ponta|ora\s*Ponta))     # captura “Ponta” ou “FPonta” / “F Ponta” / “Fora Ponta”
         .*?                                # ignora o resto
         ({NUMBER})\s*[kK][wW]              # o valor em kW
-    """
-
-    out.setdefault("demanda", {})
-    for periodo, qtd in re.findall(dmcr_pat, texto, re.I | re.X):
-        chave = "ponta" if periodo.lower().startswith("ponta") else "fora_ponta"
-        out["demanda"].setdefault("dmcr", []).append({
-            "periodo": chave,
-            "valor_kw": _clean_num(qtd)
-        })
-
-    # ---------- DEMANDA (Ponta e Fora Ponta) extraída da tabela horizontal ----------
-    demanda_tabela_pat = rf"""
+    """, re.I | re.X), _periodo_kw, todos=True, secao="demanda"),
+    # Demanda (Ponta e Fora Ponta) extraída da tabela horizontal
+    Campo("demanda.tabela", re.compile(rf"""
         Demanda\s*             # Título da seção
         Ponta\s+Fora\s+Ponta   # Subtítulos
         ({NUMBER})\s+({NUMBER})
-    """
-    match = re.search(demanda_tabela_pat, texto, re.I | re.X)
-    if match:
-        demanda_ponta = _clean_num(match.group(1))
-        demanda_fora = _clean_num(match.group(2))
-        out.setdefault("demanda", {})["ponta_kw"] = demanda_ponta
-        out.setdefault("demanda", {})["fora_ponta_kw"] = demanda_fora
-
-    # ---------- DEMANDA REATIVA EXCEDENTE (DRE) ----------
-    dre_pat = rf"""
+    """, re.I | re.X), lambda m: (_clean_num(m.group(1)), _clean_num(m.group(2))), secao="demanda"),
+    # Demanda reativa excedente (DRE); a montagem de energia_reativa sempre
+    # descartou este valor, mas o campo segue medido nas estatísticas
+    Campo("energia_reativa.dre", re.compile(rf"""
         Dem\.?\s+Reat\.?\s+Excedente\s*    # Título da seção
         Ponta\s+Fora\s+Ponta\s*            # Subtítulos
         ({NUMBER})\s+({NUMBER})            # Valores numéricos
-    """
-    match = re.search(dre_pat, texto, re.I | re.X)
-    if match:
-        dre_ponta = _clean_num(match.group(1))
-        dre_fora_ponta = _clean_num(match.group(2))
-        out.setdefault("energia_reativa", {})["dre"] = {
-            "ponta_kvarh": dre_ponta,
-            "fora_ponta_kvarh": dre_fora_ponta
-        }
-        
-    # ---------- DEMANDA (custos)  -----------------------------------
+    """, re.I | re.X), lambda m: {"ponta_kvarh": _clean_num(m.group(1)), "fora_ponta_kvarh": _clean_num(m.group(2))},
+          secao="energia_reativa"),
     # procura a primeira linha que contenha "Demanda" + 3 números
-    for ln in texto.splitlines():
-        if "Demanda" not in ln:
+    Campo("demanda.custos", None, _demanda_custos, secao="itens"),
+
+    # ---------- ENERGIA REATIVA ----------
+    Campo("energia_reativa.ponta_kvarh", re.compile(r"Energia Reativa\s+Ponta.*?(" + NUMBER + r")\s+KVH", re.I), _num(), secao="energia_reativa"),
+    Campo("energia_reativa.fora_ponta_kvarh", re.compile(r"Energia Reativa\s+FPonta.*?(" + NUMBER + r")\s+KVH", re.I), _num(), secao="energia_reativa"),
+    Campo("energia_reativa.excedente.ponta_kwh", re.compile(r"ERE\s+Ponta.*?(" + NUMBER + r")\s+KWH", re.I), _num(), secao="energia_reativa"),
+    Campo("energia_reativa.excedente.fora_ponta_kwh", re.compile(r"ERE\s+Fora\s+Ponta.*?(" + NUMBER + r")\s+KWH", re.I), _num(), secao="energia_reativa"),
+
+    # ---------- IMPOSTOS ----------
+    Campo("impostos.pis_cofins", re.compile(rf"({NUMBER})\s+({NUMBER})\s+({NUMBER})\s+(PIS|COFINS)", re.I),
+          lambda m: m.groups(), todos=True, secao="tributos"),
+    # Captura valores de ICMS em tabelas
+    Campo("impostos.icms", re.compile(
+        rf"({NUMBER})\s+({NUMBER})\s+({NUMBER})\s+(\d{{1,2}},\d{{3}}|\d{{1,2}})(?:\s+)?(?:ICMS)?\s+({NUMBER})", re.I),
+          lambda m: m.groups(), secao="tributos"),
+
+    # ---------- TARIFAS ----------
+    Campo("tarifas", re.compile(r"(TUSD|TE)\s*-\s*Cons(?:\w+)?\s+Ativo\s+"
+                                r"(Ponta|FPonta|Fora\s+Ponta)\s+kWh\s+"
+                                rf"({NUMBER})\s+({NUMBER})\s+({NUMBER})", re.I), _tarifa, todos=True, secao="itens"),
+
+    # ---------- VALORES TOTAIS ----------
+    Campo("valores_totais", re.compile(r"TOTAL\s+(" + NUMBER + r")\s+(" + NUMBER + r")", re.I),
+          lambda m: {"valor_total_fatura": _clean_num(m.group(1)), "subtotal_encargos": _clean_num(m.group(2))},
+          secao="itens"),
+
+    # ---------- COMPONENTES EXTRAS (opcionais) ----------
+    Campo("componentes_extras.itens", re.compile(rf"""
+        (?P<descricao>
+            Demanda\s+Não\s+Utilizada |
+            Demanda\s+Ultrapassagem  |
+            Tarifa\s+Postal |
+            ERE(?:-|\s)Energia\s+Reativa\s+Excedente |
+            Adicional\s+Bandeira\s+(?:Vermelha|Amarela|Verde)\s*\d* |
+            Contribuição\s+de\s+Ilum(?:\.|inação)?\s+Pública(?:\s+-\s+Lei\s+Municipal)?
+        )
+        \s+\w*\s+({NUMBER})\s+({NUMBER})\s+({NUMBER})\s+({NUMBER})?
+    """, re.I | re.X), _componente_extra, todos=True, secao="itens"),
+    Campo("componentes_extras.retencoes", re.compile(rf"""
+        (?P<descricao>
+            Retenção\s+Demanda\s+Imposto\s+Renda |
+            Retenção\s+Imposto\s+de\s+Renda
+        )
+        \s+\w*\s+({DECIMAL})\s+({DECIMAL})
+    """, re.I | re.X), _retencao, todos=True, secao="itens"),
+    Campo("componentes_extras.multas", re.compile(rf"""
+        (?P<descricao>
+            Juros\s+de\s+Mora\s+Ref[.:]?\s*\w* |
+            Multa\s+Ref[.:]?\s*\w*
+        )
+        .*?                                  # ignora unidade e quantidade
+        ({DECIMAL})\s+({DECIMAL})
+    """, re.I | re.X), _multa, todos=True, secao="itens"),
+]
+"""Extratores da fatura, na ordem em que rodam."""
+
+# ╭────────────────────  MOTOR LINEAR (RE2)  ───────────────────╮
+PARSER_RE2 = os.getenv("PARSER_RE2", "auto").lower()
+""""auto" executa os padrões no RE2 (tempo linear) se o módulo `re2` estiver instalado; "0" usa só o `re`."""
+
+PARSER_ORCAMENTO_MS = int(os.getenv("PARSER_ORCAMENTO_MS", "2000"))
+"""Orçamento brando de CPU (ms) por fatura, conferido entre extratores; estourado, os campos restantes ficam de fora (0 desliga)."""
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+_FLAGS_RE2 = {re.I: "i", re.M: "m", re.S: "s"}
+
+def _sem_verbose(padrao: str) -> str:
+    """Remove espaços e comentários de um padrão re.X (o RE2 não tem modo verbose)."""
+    saida, i, em_classe = [], 0, False
+    while i < len(padrao):
+        c = padrao[i]
+        if c == "\\":
+            saida.append(padrao[i:i + 2])
+            i += 2
             continue
-        # ignora Contratual, Não Utilizada, Ultrapassagem
-        if re.search(r"\b(Contratual|Não|Nao|Ultrapassagem)\b", ln, re.I):
+        if em_classe:
+            em_classe = c != "]"
+        elif c == "[":
+            em_classe = True
+        elif c.isspace():
+            i += 1
             continue
-        nums = re.findall(NUMBER, ln)
-        if len(nums) >= 3:
-            qtd, tarifa_unit, valor = nums[:3]
-            out.setdefault("demanda", {}).update({
-                "fora_ponta_kw":   _clean_num(qtd),
-                "tarifa_unitaria": _clean_num(tarifa_unit),
-                "valor_total":     _clean_num(valor),
-            })
-            break   # achou, sai do laço
+        elif c == "#":
+            fim = padrao.find("\n", i)
+            i = len(padrao) if fim < 0 else fim
+            continue
+        saida.append(c)
+        i += 1
+    return "".join(saida)
+
+# No RE2, \s, \w e \d são só ASCII; no `re` (str) seguem o Unicode, e um espaço
+# não separável (NBSP) do PDF casa com \s. As classes abaixo reproduzem o `re`.
+_ESPACO_UNICODE = r"\s\x{0b}\x{1c}-\x{1f}\x{85}\p{Z}"
+_CLASSES_UNICODE = {
+    "s": (f"[{_ESPACO_UNICODE}]", _ESPACO_UNICODE),
+    "S": (f"[^{_ESPACO_UNICODE}]", None),
+    "w": (r"[\p{L}\p{N}_]", r"\p{L}\p{N}_"),
+    "W": (r"[^\p{L}\p{N}_]", None),
+    "d": (r"\p{Nd}", r"\p{Nd}"),
+    "D": (r"\P{Nd}", None),
+}
+"""Escape -> (forma fora de uma classe, forma dentro de uma classe ou None se não houver)."""
+
+def _unicode_re2(fonte: str, multilinha: bool) -> Optional[str]:
+    r"""
+    Reescreve `fonte` para que o RE2 case os mesmos textos que o `re`.
+
+    Returns:
+        O padrão reescrito, ou None se ele usa algo sem equivalente no RE2:
+        \b/\B (só ASCII no RE2), \S/\W/\D dentro de uma classe ou `$` fora
+        do modo multiline (no `re` também casa antes do "\n" final).
+    """
+    saida, i, em_classe, inicio_classe = [], 0, False, 0
+    while i < len(fonte):
+        c = fonte[i]
+        if c == "\\":
+            letra = fonte[i + 1:i + 2]
+            if letra in ("b", "B"):
+                return None
+            if letra in _CLASSES_UNICODE:
+                fora, dentro = _CLASSES_UNICODE[letra]
+                if em_classe and dentro is None:
+                    return None
+                saida.append(dentro if em_classe else fora)
+            elif letra == "Z":
+                saida.append(r"\z")
+            else:
+                saida.append(fonte[i:i + 2])
+            i += 2
+            continue
+        if em_classe:
+            # "]" logo após "[" ou "[^" é literal
+            em_classe = c != "]" or i == inicio_classe
+        elif c == "[":
+            em_classe = True
+            inicio_classe = i + 2 if fonte[i + 1:i + 2] == "^" else i + 1
+        elif c == "$" and not multilinha:
+            return None
+        saida.append(c)
+        i += 1
+    return "".join(saida)
+
+def _compilar_linear(padrao: re.Pattern) -> Any:
+    r"""
+    Recompila `padrao` no RE2, quando disponível e compatível.
+
+    As classes \s, \w e \d são reescritas em Unicode (`_unicode_re2`);
+    padrões com recursos que o RE2 não implementa ou não reproduz
+    (lookahead, lookbehind, \b, flags sem equivalente) continuam no `re`.
+
+    Returns:
+        O padrão RE2, ou o próprio `padrao` do `re`.
+    """
+    if re2 is None or PARSER_RE2 == "0":
+        return padrao
+    flags = padrao.flags & ~(re.UNICODE | re.X)
+    if flags & ~sum(_FLAGS_RE2):
+        return padrao
+    fonte = _sem_verbose(padrao.pattern) if padrao.flags & re.X else padrao.pattern
+    multilinha = bool(flags & re.M) or fonte.startswith("(?m)")
+    fonte = _unicode_re2(fonte, multilinha)
+    if fonte is None:
+        return padrao
+    inline = "".join(letra for flag, letra in _FLAGS_RE2.items() if flags & flag)
+    opcoes = re2.Options()
+    opcoes.log_errors = False
+    try:
+        return re2.compile(f"(?{inline}){fonte}" if inline else fonte, opcoes)
+    except re2.error:
+        return padrao
+
+CAMPOS = [c._replace(padrao=_compilar_linear(c.padrao)) if c.padrao is not None else c for c in CAMPOS]
+
+def motor_do_campo(campo: Campo) -> str:
+    """"re2" se o padrão do campo roda no RE2, "re" se no `re` (ou "python" sem padrão)."""
+    if campo.padrao is None:
+        return "python"
+    return "re" if isinstance(campo.padrao, re.Pattern) else "re2"
+
+_MOTORES = {campo.nome: motor_do_campo(campo) for campo in CAMPOS}
+
+MOTOR = "re2" if "re2" in _MOTORES.values() else "re"
+"""Motor dos padrões nesta execução: "re2" se algum campo roda no RE2, senão "re"."""
+
+# ╭────────────────────  MOTOR DE EXTRAÇÃO  ───────────────────╮
+_estatisticas: Dict[str, Dict[str, float]] = {}
+_estatisticas_lock = threading.Lock()
+
+class _OrcamentoEsgotado(Exception):
+    pass
+
+def _aplicar(campo: Campo, indice: IndiceTexto, secao: Optional[str], limite: float) -> Any:
+    if campo.padrao is None:
+        return campo.tratar(indice.linhas_de(secao))
+    texto = indice.trecho(secao)
+    if campo.todos:
+        valores = []
+        for m in campo.padrao.finditer(texto):
+            if time.thread_time() > limite:
+                raise _OrcamentoEsgotado
+            valores.append(campo.tratar(m))
+        return valores
+    m = campo.padrao.search(texto)
+    return campo.tratar(m) if m else None
+
+def _executar(campo: Campo, indice: IndiceTexto, limite: float) -> Tuple[Any, bool]:
+    valor = _aplicar(campo, indice, campo.secao, limite)
+    if (valor is None or valor == []) and campo.secao in indice.secoes and time.thread_time() <= limite:
+        # fora do layout esperado: o campo pode estar em outra parte do texto
+        return _aplicar(campo, indice, None, limite), True
+    return valor, False
+
+def extrair_campos(
+    texto: str,
+    campos: List[Campo] = CAMPOS,
+    orcamento_ms: Optional[int] = None,
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Roda cada extrator de `campos` sobre o texto e acumula as estatísticas.
+
+    O texto é indexado uma vez (`IndiceTexto`) e cada extrator busca só na
+    sua seção; se não encontrar nada ali, busca no texto inteiro. Esgotado
+    o orçamento de tempo, os extratores seguintes não rodam.
+
+    O orçamento é brando: é conferido entre extratores e entre ocorrências
+    de um mesmo campo, então uma única busca lenta (no `re`, inclusive a
+    busca no texto inteiro) roda até o fim antes de o estouro ser notado.
+    Ele mede o tempo de CPU da thread (`time.thread_time`), não o relógio,
+    para que outras threads ocupadas não tornem a mesma fatura "parcial" em
+    uma execução e completa em outra.
+
+    Args:
+        texto: O texto completo da fatura de energia.
+        campos: A tabela de extratores; padrão é `CAMPOS`.
+        orcamento_ms: Tempo máximo de CPU em milissegundos; padrão é
+                `PARSER_ORCAMENTO_MS` (0 desliga).
+
+    Returns:
+        Uma tupla com o dicionário {nome do campo: valor}, com None (ou
+        lista vazia) nos campos não encontrados ou ignorados, e a lista dos
+        campos ignorados por falta de tempo.
+    """
+    orcamento_ms = PARSER_ORCAMENTO_MS if orcamento_ms is None else orcamento_ms
+    limite = time.thread_time() + orcamento_ms / 1000 if orcamento_ms > 0 else float("inf")
+    indice = IndiceTexto(texto)
+    valores: Dict[str, Any] = {}
+    ignorados: List[str] = []
+    medicoes = []
+    for campo in campos:
+        inicio = time.perf_counter()
+        try:
+            if time.thread_time() > limite:
+                raise _OrcamentoEsgotado
+            valor, fora = _executar(campo, indice, limite)
+        except _OrcamentoEsgotado:
+            valores[campo.nome] = [] if campo.todos else None
+            ignorados.append(campo.nome)
+            continue
+        acerto = valor is not None and valor != []
+        medicoes.append((campo.nome, time.perf_counter() - inicio, acerto, acerto and fora))
+        valores[campo.nome] = valor
+    with _estatisticas_lock:
+        for nome, duracao, acerto, fora in medicoes:
+            est = _estatisticas.setdefault(nome, _nova_estatistica())
+            est["execucoes"] += 1
+            est["acertos"] += acerto
+            est["fora_da_secao"] += fora
+            est["segundos"] += duracao
+        for nome in ignorados:
+            _estatisticas.setdefault(nome, _nova_estatistica())["ignorados"] += 1
+    return valores, ignorados
+
+def _nova_estatistica() -> Dict[str, float]:
+    return {"execucoes": 0, "acertos": 0, "fora_da_secao": 0, "ignorados": 0, "segundos": 0.0}
+
+def estatisticas_campos() -> List[Dict[str, Any]]:
+    """
+    Acertos, faltas e tempo de cada campo desde o início do processo.
+
+    Returns:
+        Uma lista de dicionários ('campo', 'execucoes', 'acertos', 'faltas',
+        'fora_da_secao', 'ignorados', 'taxa_acerto', 'ms_total', 'ms_medio',
+        'motor'), do campo mais lento para o mais rápido. 'fora_da_secao'
+        conta os acertos obtidos só na busca pelo texto inteiro e
+        'ignorados' as faturas em que o campo ficou de fora por tempo.
+    """
+    with _estatisticas_lock:
+        copia = {nome: dict(est) for nome, est in _estatisticas.items()}
+    linhas = []
+    for nome, est in copia.items():
+        execucoes = int(est["execucoes"])
+        linhas.append({
+            "campo": nome,
+            "execucoes": execucoes,
+            "acertos": int(est["acertos"]),
+            "faltas": execucoes - int(est["acertos"]),
+            "fora_da_secao": int(est["fora_da_secao"]),
+            "ignorados": int(est["ignorados"]),
+            "taxa_acerto": round(est["acertos"] / execucoes, 4) if execucoes else 0.0,
+            "ms_total": round(est["segundos"] * 1000, 3),
+            "ms_medio": round(est["segundos"] * 1000 / execucoes, 4) if execucoes else 0.0,
+            "motor": _MOTORES.get(nome, "re"),
+        })
+    return sorted(linhas, key=lambda l: l["ms_total"], reverse=True)
+
+def zerar_estatisticas_campos() -> None:
+    """Descarta as estatísticas acumuladas por `extrair_campos`."""
+    with _estatisticas_lock:
+        _estatisticas.clear()
+
+# ╭────────────────────  NÚCLEO DE EXTRAÇÃO  ───────────────────╮
+def extrair_dados_completos_da_fatura_regex(texto: str) -> Dict[str, Any]:
+    """
+    Extrai dados completos de uma fatura de energia em formato de texto usando regex.
+
+    Roda a tabela de extratores `CAMPOS` (via `extrair_campos`) e monta o
+    resultado com identificação, leituras, consumo, demanda, energia
+    reativa, impostos, tarifas e componentes extras. Se o orçamento de
+    tempo (`PARSER_ORCAMENTO_MS`) estourar, o resultado traz o que foi
+    extraído até ali, com 'parcial': True e a lista 'campos_ignorados'.
+
+    Args:
+        texto: O texto completo da fatura de energia.
+
+    Returns:
+        Um dicionário contendo os dados extraídos da fatura, organizados
+        em chaves como 'identificacao', 'leituras', 'consumo_ativo', etc.
+        Os valores podem ser strings, números, listas ou dicionários.
+    """
+    v, ignorados = extrair_campos(texto)
+
+    out: Dict[str, Any] = {
+        "identificacao": {},
+        "leituras": {},
+        "consumo_ativo": {},
+        "demanda": {},
+        "energia_reativa": {},
+        "impostos": [],
+        "tarifas": {},
+        "componentes_extras": []
+    }
+
+    # ---------- IDENTIFICAÇÃO ----------
+    identificacao = dict(v["identificacao.endereco"] or {})
+
+    # Tensão nominal e unidade
+    if (tensao_val := v["identificacao.tensao"]) is not None:
+        identificacao["tensao"] = tensao_val
+        identificacao["tensaoUnid"] = "kV" if float(tensao_val) >= 1000 else "V"
+
+        # Nível de tensão baseado no valor
+        t = float(tensao_val)
+        if t >= 1000:
+            identificacao["nivel_tensao"] = "alta tensão"
+        elif t >= 1:
+            identificacao["nivel_tensao"] = "média tensão"
+        else:
+            identificacao["nivel_tensao"] = "baixa tensão"
+
+    for chave in ("numero_instalacao", "numero_cliente", "grupo_tarifario", "subgrupo", "classe"):
+        identificacao[chave] = v[f"identificacao.{chave}"]
+    for chave in ("modalidade", "mes_referencia"):
+        if v[f"identificacao.{chave}"] is not None:
+            identificacao[chave] = v[f"identificacao.{chave}"]
+
+    # Atribuição final
+    out["identificacao"] = {k: val for k, val in identificacao.items() if val}
+
+    # ---------- LEITURAS ----------
+    if v["leituras"]:
+        leituras = dict(zip(("leitura_inicio", "leitura_fim"), v["leituras"]))
+        out["leituras"] = {k: val for k, val in leituras.items() if val}
+
+    # ---------- CONSUMO ATIVO ----------
+    consumo = out["consumo_ativo"]
+    for chave in ("ponta_kwh", "fora_ponta_kwh"):
+        if v[f"consumo_ativo.{chave}"] is not None:
+            consumo[chave] = v[f"consumo_ativo.{chave}"]
+    injetada = v["consumo_ativo.energia_injetada_kwh"]
+    consumo["energia_injetada_kwh"] = injetada if injetada is not None else 0.0
+    if "ponta_kwh" in consumo and "fora_ponta_kwh" in consumo:
+        consumo["total_kwh"] = round(consumo["ponta_kwh"] + consumo["fora_ponta_kwh"], 4)
+
+    # ---------- DEMANDA ----------
+    demanda = out["demanda"]
+    if v["demanda.contratada_p_kw"] is not None:
+        demanda["contratada_p_kw"] = v["demanda.contratada_p_kw"]
+    if v["demanda.contratada_fp_kw"] is not None:
+        demanda["contratada_fp_kw"] = v["demanda.contratada_fp_kw"]
+    # Se não tiver FP-KW explícito mas tiver "Demanda Contratual KW", considerar como FP
+    elif v["demanda.contratada_kw"] is not None:
+        demanda["contratada_fp_kw"] = v["demanda.contratada_kw"]
+    if v["demanda.maxima"]:
+        demanda["maxima"] = v["demanda.maxima"]
+    if v["demanda.ultrapassagem_kw"] is not None:
+        demanda["ultrapassagem_kw"] = v["demanda.ultrapassagem_kw"]
+    if v["demanda.dmcr"]:
+        demanda["dmcr"] = v["demanda.dmcr"]
+    if v["demanda.tabela"] is not None:
+        demanda["ponta_kw"], demanda["fora_ponta_kw"] = v["demanda.tabela"]
+    if v["demanda.custos"] is not None:
+        demanda.update(v["demanda.custos"])
 
     # ---------- ENERGIA REATIVA ----------
     er = {
-        "ponta_kvarh":      _clean_num(_find(r"Energia Reativa\s+Ponta.*?(" + NUMBER + ")\s+KVH", texto, re.I)),
-        "fora_ponta_kvarh": _clean_num(_find(r"Energia Reativa\s+FPonta.*?(" + NUMBER + ")\s+KVH", texto, re.I)),
+        "ponta_kvarh":      v["energia_reativa.ponta_kvarh"],
+        "fora_ponta_kvarh": v["energia_reativa.fora_ponta_kvarh"],
     }
 
     if all(er.values()):
@@ -453,21 +845,18 @@ def extrair_dados_completos_da_fatura_regex(texto: str) -> Dict[str, Any]:
 
     # excedentes
     exc = {
-        "ponta_kwh":      _clean_num(_find(r"ERE\s+Ponta.*?(" + NUMBER + ")\s+KWH", texto, re.I)),
-        "fora_ponta_kwh": _clean_num(_find(r"ERE\s+Fora\s+Ponta.*?(" + NUMBER + ")\s+KWH", texto, re.I)),
+        "ponta_kwh":      v["energia_reativa.excedente.ponta_kwh"],
+        "fora_ponta_kwh": v["energia_reativa.excedente.fora_ponta_kwh"],
     }
-    if any(v is not None for v in exc.values()):
-        exc["total_kwh"] = round(sum(v or 0 for v in exc.values()), 4)
-        er["excedente"] = {k: v for k, v in exc.items() if v is not None}
+    if any(val is not None for val in exc.values()):
+        exc["total_kwh"] = round(sum(val or 0 for val in exc.values()), 4)
+        er["excedente"] = {k: val for k, val in exc.items() if val is not None}
 
-    out["energia_reativa"] = {k: v for k, v in er.items() if v not in (None, {}, [])}
+    out["energia_reativa"] = {k: val for k, val in er.items() if val not in (None, {}, [])}
 
-    
     # ---------- IMPOSTOS ----------
-    # logging.info("Extraindo informações sobre impostos...")
-    
     impostos_dict = {}
-    for valor, aliq, base, nome in _findall(rf"({NUMBER})\s+({NUMBER})\s+({NUMBER})\s+(PIS|COFINS)", texto, re.I):
+    for valor, aliq, base, nome in v["impostos.pis_cofins"]:
         nome = nome.upper()
         if nome not in impostos_dict:
             impostos_dict[nome] = {
@@ -477,154 +866,189 @@ def extrair_dados_completos_da_fatura_regex(texto: str) -> Dict[str, Any]:
                 "valor": _clean_num(valor)
             }
 
-    # Captura valores de ICMS em tabelas
-    icms_matches = _findall(
-        rf"({NUMBER})\s+({NUMBER})\s+({NUMBER})\s+(\d{{1,2}},\d{{3}}|\d{{1,2}})(?:\s+)?(?:ICMS)?\s+({NUMBER})", texto, re.I
-    )
-
-    for base, _, _, aliq, valor in icms_matches:
-        if "ICMS" not in impostos_dict:
-            impostos_dict["ICMS"] = {
-                "nome": "ICMS",
-                "aliquota": _clean_num(aliq),
-                "base_calculo": _clean_num(base),
-                "valor": _clean_num(valor)
-            }
+    if v["impostos.icms"] is not None:
+        base, _, _, aliq, valor = v["impostos.icms"]
+        impostos_dict["ICMS"] = {
+            "nome": "ICMS",
+            "aliquota": _clean_num(aliq),
+            "base_calculo": _clean_num(base),
+            "valor": _clean_num(valor)
+        }
 
-    # Converte para lista se quiser manter a estrutura esperada
     out["impostos"] = list(impostos_dict.values())
 
     # ---------- TARIFAS ----------
-    # logging.info("Extraindo informações sobre tarifas...")
-    tarifas = []
-    tarifa_pat = (r"(TUSD|TE)\s*-\s*Cons(?:\w+)?\s+Ativo\s+"
-                  r"(Ponta|FPonta|Fora\s+Ponta)\s+kWh\s+"
-                  rf"({NUMBER})\s+({NUMBER})\s+({NUMBER})")
-    for desc, periodo, qtd, tarifa_unit, valor_tot in _findall(tarifa_pat, texto, re.I):
-        tarifas.append({
-            "descricao":      desc,
-            "periodo":        periodo.replace("FPonta", "Fora Ponta").lower().replace(" ", "_"),
-            "quantidade":     _clean_num(qtd),
-            "tarifa_unitaria":_clean_num(tarifa_unit),
-            "valor_total":    _clean_num(valor_tot),
-        })
-    if tarifas:
-        out["tarifas"] = tarifas
+    if v["tarifas"]:
+        out["tarifas"] = v["tarifas"]
 
     # ---------- VALORES TOTAIS ----------
-    if (m := re.search(r"TOTAL\s+(" + NUMBER + ")\s+(" + NUMBER + ")", texto, re.I)):
-        out["valores_totais"] = {
-            "valor_total_fatura": _clean_num(m.group(1)),
-            "subtotal_encargos":  _clean_num(m.group(2)),
-        }
+    if v["valores_totais"] is not None:
+        out["valores_totais"] = v["valores_totais"]
 
     # ---------- COMPONENTES EXTRAS (opcionais) ----------
-    # logging.info("Extraindo informações sobre componentes extras...")
-    extras = []
+    out["componentes_extras"] = (
+        v["componentes_extras.itens"] + v["componentes_extras.retencoes"] + v["componentes_extras.multas"]
+    )
 
-    extra_pat = rf"""
-        (?P<descricao>
-            Demanda\s+Não\s+Utilizada |
-            Demanda\s+Ultrapassagem  |
-            Tarifa\s+Postal |
-            ERE(?:-|\s)Energia\s+Reativa\s+Excedente |
-            Adicional\s+Bandeira\s+(?:Vermelha|Amarela|Verde)\s*\d* |
-            Contribuição\s+de\s+Ilum(?:\.|inação)?\s+Pública(?:\s+-\s+Lei\s+Municipal)?
-        )
-        \s+\w*\s+({NUMBER})\s+({NUMBER})\s+({NUMBER})\s+({NUMBER})?
-    """
+    # ---------- ORÇAMENTO DE TEMPO ----------
+    if ignorados:
+        out["parcial"] = True
+        out["campos_ignorados"] = ignorados
+        logging.warning(f"⏱️ Extração parcial: {len(ignorados)} campos ignorados após {PARSER_ORCAMENTO_MS} ms.")
 
-    for match in re.finditer(extra_pat, texto, re.I | re.X):
-        nome, qtd, tarifa, valor, imposto = match.groups()
-        # logging.info(f"Extração: {nome}")
-        if nome.strip() == "Contribuição de Ilum. Pública - Lei Municipal":
-            extras.append({
-            "descricao": nome.strip(),
-            "quantidade": _clean_num(qtd),
-            "tarifa_unitaria": _clean_num(valor),
-            "valor_total": _clean_num(tarifa),
-            "valor_impostos": _clean_num(imposto) 
-            })
-        else:
-            extras.append({
-                "descricao": nome.strip(),
-                "quantidade": _clean_num(qtd),
-                "tarifa_unitaria": _clean_num(tarifa),
-                "valor_total": _clean_num(valor),
-                "valor_impostos": _clean_num(imposto) 
-            })
-
-    retencao_pat = rf"""
-        (?P<descricao>
-            Retenção\s+Demanda\s+Imposto\s+Renda |
-            Retenção\s+Imposto\s+de\s+Renda
-        )
-        \s+\w*\s+({DECIMAL})\s+({DECIMAL})
+    logging.info(f"Extrações: {out}")
+    return out
+
+# ╭────────────────────  UTIL / CLI  ───────────────────╮
+def pdf_to_text(pdf: Path) -> str:
     """
-    for match in re.finditer(retencao_pat, texto, re.I | re.X):
-        nome, valor, imposto = match.groups()
-        extras.append({
-            "descricao": nome.strip(),
-            "valor_total": _clean_num(valor),
-            "valor_impostos": _clean_num(imposto)
-        })
+    Extrai texto de um arquivo PDF com o backend de `PDF_BACKEND`.
 
-    multa_pat = rf"""
-        (?P<descricao>
-            Juros\s+de\s+Mora\s+Ref[.:]?\s*\w* |
-            Multa\s+Ref[.:]?\s*\w*
-        )
-        .*?                                  # ignora unidade e quantidade
-        ({DECIMAL})\s+({DECIMAL})
+    Args:
+        pdf: O objeto Path representando o caminho para o arquivo PDF.
+
+    Returns:
+        Uma string contendo o texto extraído de todas as páginas do PDF,
+        com quebras de linha entre as páginas.
     """
-    for match in re.finditer(multa_pat, texto, re.I | re.X):
-        nome, valor, multa = match.groups()
-        extras.append({
-            "descricao": nome.strip(),
-            "valor_total": _clean_num(multa)
-        })
+    return extrair_texto(str(pdf))
 
-    out["componentes_extras"] = extras
 
-    logging.info(f"Extrações: {out}")
-    return out
-   
-# ╭────────────────────  UTIL / CLI  ───────────────────╮
-def pdf_to_text(pdf: Path) -> str:
- """
- Extrai texto de um arquivo PDF.
+def listar_pdfs(entradas: List[str]) -> List[str]:
+    """
+    Expande arquivos, pastas (recursivamente) e globs (`**` incluso) em PDFs.
 
- Args:
- pdf: O objeto Path representando o caminho para o arquivo PDF.
+    Args:
+        entradas: Caminhos de PDFs, pastas ou padrões glob.
 
- Returns:
- Uma string contendo o texto extraído de todas as páginas do PDF,
- com quebras de linha entre as páginas.
- """
+    Returns:
+        Os caminhos dos PDFs encontrados, sem repetição, na ordem das entradas
+        e em ordem alfabética dentro de cada pasta.
+    """
+    pdfs: Dict[str, None] = {}
+    for entrada in entradas:
+        candidatos = sorted(glob.glob(entrada, recursive=True)) if glob.has_magic(entrada) else [entrada]
+        for caminho in candidatos:
+            if os.path.isdir(caminho):
+                for raiz, pastas, arquivos in os.walk(caminho):
+                    pastas.sort()
+                    for nome in sorted(arquivos):
+                        if nome.lower().endswith(".pdf"):
+                            pdfs.setdefault(os.path.join(raiz, nome))
+            elif caminho.lower().endswith(".pdf"):
+                pdfs.setdefault(caminho)
+    return list(pdfs)
+
+def processar_pdf(caminho: str) -> Dict[str, Any]:
+    """
+    Extrai um PDF para o modo em lote: {'pdf', 'referencia', 'dados'} ou {'pdf', 'erro'}.
 
-    reader = PdfReader(pdf)
-    return "\n".join(p.extract_text() or "" for p in reader.pages)
+    Com `PARSER_PARADA_ANTECIPADA`, lê só as páginas necessárias
+    (`secoes_encontradas`). Nunca levanta exceção, para que um PDF
+    corrompido não interrompa o lote.
+    """
+    try:
+        parar = secoes_encontradas if PARSER_PARADA_ANTECIPADA else None
+        dados = extrair_dados_completos_da_fatura_regex(extrair_texto(caminho, parar=parar))
+    except Exception as e:
+        return {"pdf": caminho, "erro": f"{type(e).__name__}: {e}"}
+    return {"pdf": caminho, "referencia": dados["identificacao"].get("mes_referencia"), "dados": dados}
 
+def _ja_processados(saida: str) -> set:
+    """
+    Caminhos já extraídos com sucesso em `saida`.
+
+    Reescreve o arquivo só com essas linhas: as linhas de erro saem (os PDFs
+    voltam a ser processados e a nova linha é anexada) e uma última linha
+    incompleta (processo interrompido no meio da escrita) é descartada.
+    """
+    feitos, linhas = set(), []
+    with open(saida, "rb") as f:
+        for linha in f:
+            try:
+                registro = json.loads(linha)
+                caminho = registro["pdf"]
+            except (ValueError, KeyError):
+                break
+            if "erro" not in registro and linha.endswith(b"\n"):
+                feitos.add(caminho)
+                linhas.append(linha)
+    tmp = f"{saida}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.writelines(linhas)
+    os.replace(tmp, saida)
+    return feitos
 
 def main() -> None:
- """
- Função principal para execução do parser via linha de comando.
-
- Lê um arquivo PDF especificado como argumento, extrai o texto,
- processa com o parser regex e imprime os dados extraídos.
-
- Returns:
- None
- """
-    if len(sys.argv) < 2:
-        logging.error("Uso: python edp_invoice_parser.py <fatura.pdf>", file=sys.stderr); sys.exit(1)
-    pdf = Path(sys.argv[1])
-    if not pdf.exists():
-        logging.error(f"Arquivo não encontrado: {pdf}", file=sys.stderr); sys.exit(1)
-
-    texto = pdf_to_text(pdf)
-    dados = extrair_dados_completos_da_fatura_regex(texto)
-    logging.info(json.dumps(dados, ensure_ascii=False, indent=2))
+    """
+    Função principal para execução do parser via linha de comando.
+
+    Aceita PDFs, pastas (varridas recursivamente) e globs, extrai cada fatura
+    com o parser regex, em um pool de processos com `--workers`, e escreve uma
+    linha JSON por fatura (caminho, mês de referência e dados ou erro) na
+    saída padrão ou em `--saida`, à medida que cada uma termina. Com
+    `--retomar`, pula os PDFs já extraídos com sucesso no arquivo de saída e
+    tenta de novo os que deram erro.
+
+    Exemplos:
+        python -m src.parser_regex fatura.pdf
+        python -m src.parser_regex faturas_edp/ --workers 8 --saida faturas.jsonl --retomar
+        python -m src.parser_regex "faturas_edp/**/fatura_*-2024.pdf" --saida 2024.jsonl
+
+    Returns:
+        None
+    """
+    import argparse
+    from concurrent.futures import ProcessPoolExecutor
+
+    parser = argparse.ArgumentParser(prog="python -m src.parser_regex",
+                                     description="Extrai faturas EDP em PDF com o parser regex (saída JSONL).")
+    parser.add_argument("entradas", nargs="+", help="PDFs, pastas ou globs (ex.: 'faturas/**/*.pdf')")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processos de extração")
+    parser.add_argument("--saida", help="Arquivo JSONL de saída (padrão: saída padrão)")
+    parser.add_argument("--retomar", action="store_true", help="Pula os PDFs já extraídos em --saida, refaz os que deram erro e anexa os novos")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    pdfs = listar_pdfs(args.entradas)
+    if not pdfs:
+        parser.error("nenhum PDF encontrado nas entradas informadas")
+    feitos: set = set()
+    if args.retomar:
+        if not args.saida:
+            parser.error("--retomar exige --saida")
+        if os.path.exists(args.saida):
+            feitos = _ja_processados(args.saida)
+    pendentes = [pdf for pdf in pdfs if pdf not in feitos]
+    print(f"🧾 {len(pendentes)} PDFs a extrair ({len(pdfs) - len(pendentes)} já processados, {args.workers} processos)",
+          file=sys.stderr)
+
+    destino = open(args.saida, "a" if args.retomar else "w", encoding="utf-8") if args.saida else sys.stdout
+    pool = None
+    if args.workers > 1 and len(pendentes) > 1:
+        import multiprocessing
+        # "spawn", como em src.parser: os processos importam só este módulo
+        pool = ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn"))
+        resultados = pool.map(processar_pdf, pendentes, chunksize=max(1, min(32, len(pendentes) // (args.workers * 4))))
+    else:
+        resultados = map(processar_pdf, pendentes)
+
+    inicio, erros = time.perf_counter(), 0
+    try:
+        for n, resultado in enumerate(resultados, start=1):
+            erros += "erro" in resultado
+            destino.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+            destino.flush()
+            if n % 500 == 0:
+                print(f"   {n}/{len(pendentes)} ({n / (time.perf_counter() - inicio):.1f} PDFs/s)", file=sys.stderr)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if destino is not sys.stdout:
+            destino.close()
+    duracao = time.perf_counter() - inicio
+    print(f"✅ {len(pendentes)} PDFs em {duracao:.1f} s ({len(pendentes) / duracao if duracao else 0:.1f} PDFs/s), {erros} com erro",
+          file=sys.stderr)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,119 @@
+"""
+Pipeline de scraping e extração: cada PDF baixado já entra na fila do parser.
+
+Em vez de esperar o fim do scraping para chamar `/faturas-json` ou
+`/analisar-fatura`, o `PipelineExtracao` recebe cada PDF assim que ele é salvo
+(pelo evento "pdf" do callback de progresso do scraper) e threads de parser
+rodam `extrair_dados_completos_da_fatura` enquanto o navegador segue para as
+próximas faturas. O resultado de cada fatura é gravado ao
+lado do PDF (`fatura_MMM-AAAA.json`). Um PDF já extraído não é reprocessado:
+o resultado vem do cache de extração, cuja chave inclui o modo (regex, RE2,
+LLM) e `PARSER_VERSAO`, e o JSON é regravado com ele.
+"""
+# seger/pipeline.py
+import json
+import logging
+import os
+import queue
+import threading
+from typing import Any, Dict, List, Optional
+
+from src.parser import extrair_dados_completos_da_fatura
+from src.scraper import Progresso
+
+PARSER_WORKERS = int(os.getenv("PARSER_WORKERS", "2"))
+"""Threads que extraem os dados dos PDFs enquanto o scraping continua."""
+
+def caminho_json(pdf_path: str) -> str:
+    """Caminho do JSON com os dados extraídos de `pdf_path` (ao lado do PDF)."""
+    return os.path.splitext(pdf_path)[0] + ".json"
+
+def _gravar_json(caminho: str, dados: Dict[str, Any]) -> None:
+    tmp = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, caminho)
+
+class PipelineExtracao:
+    """Fila de PDFs consumida por threads de parser que gravam o JSON de cada fatura."""
+
+    def __init__(self, via_regex: bool = True, workers: Optional[int] = None):
+        self.via_regex = via_regex
+        self._fila: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._enviados: set[str] = set()
+        self._extraidos: Dict[str, str] = {}
+        self._falhas: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._consumir, name=f"seger-parser-{n}", daemon=True)
+            for n in range(max(1, workers or PARSER_WORKERS))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def enviar(self, pdf_path: str) -> None:
+        """Coloca um PDF na fila de extração (ignora PDFs já enviados)."""
+        with self._lock:
+            if pdf_path in self._enviados:
+                return
+            self._enviados.add(pdf_path)
+        self._fila.put(pdf_path)
+
+    @property
+    def progresso(self) -> Progresso:
+        """Callback de progresso do scraper que envia cada PDF salvo (e os de cada instalação concluída)."""
+        def _progresso(numero: str, status: str, pdfs: list, erro: Optional[str]) -> None:
+            if status in ("pdf", "concluida"):
+                for pdf_path in pdfs:
+                    self.enviar(pdf_path)
+        return _progresso
+
+    def _consumir(self) -> None:
+        while True:
+            pdf_path = self._fila.get()
+            try:
+                if pdf_path is None:
+                    return
+                self._extrair(pdf_path)
+            finally:
+                self._fila.task_done()
+
+    def _extrair(self, pdf_path: str) -> None:
+        destino = caminho_json(pdf_path)
+        try:
+            dados = extrair_dados_completos_da_fatura(pdf_path, via_regex=self.via_regex)
+            if "error" in dados:
+                raise ValueError(dados["error"])
+            _gravar_json(destino, dados)
+            logging.info(f"🧾 Dados extraídos: {destino}")
+            with self._lock:
+                self._extraidos[pdf_path] = destino
+        except Exception as e:
+            logging.error(f"❌ Falha ao extrair {pdf_path}: {e}")
+            with self._lock:
+                self._falhas[pdf_path] = str(e)
+
+    def encerrar(self, pdfs: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Envia os PDFs que ainda não passaram pela fila e espera os parsers terminarem.
+
+        Args:
+            pdfs: PDFs do resultado do scraper; os que não vieram pelo callback
+                (ex.: retomados do diário de execução) são extraídos agora.
+
+        Returns:
+            Um dicionário com 'json' (caminhos dos JSONs, na ordem de `pdfs`
+            quando informada) e 'falhas' (lista de {'pdf', 'erro'}).
+        """
+        for pdf_path in pdfs or []:
+            self.enviar(pdf_path)
+        for _ in self._threads:
+            self._fila.put(None)
+        for t in self._threads:
+            t.join()
+
+        ordem = pdfs if pdfs is not None else list(self._extraidos)
+        return {
+            "json": [self._extraidos[p] for p in ordem if p in self._extraidos],
+            "falhas": [{"pdf": p, "erro": e} for p, e in self._falhas.items()],
+        }
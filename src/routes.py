@@ -8,14 +8,22 @@ de custo.
 """
 
 from flask import Blueprint, request, jsonify, send_file
-from src.scraper import baixar_faturas_por_instalacao
-from src.parser  import extrair_dados_completos_da_fatura, analisar_eficiencia_energetica
+from src.scraper import BASE_DIR, SCRAPER_WORKERS, baixar_faturas
+from src.scraper_async import baixar_faturas_async
+from src.scraper_daemon import SCRAPER_DAEMON, obter_servico
+from src.jobs import obter_gerenciador
+from src.pipeline import PipelineExtracao
+from src.parser  import PARSER_PROCESSOS, extrair_dados_completos_da_fatura, extrair_dados_completos_da_fatura_bytes, extrair_lote, analisar_eficiencia_energetica
+from src.parser_regex import estatisticas_campos, zerar_estatisticas_campos
 from src.utils.dict_diff import dict_diff, has_diff
+from src.utils.cache_faturas import CacheFaturas, obter_cache
+from src.utils.manifesto import carregar_manifesto, gravar_fatura
 from src.utils.tarifas import get_tarifas_filtradas
 from src.utils.tarifas import calcular_tarifa_azul, calcular_tarifa_verde
 from src.utils.tarifas import extrair_tarifa_compacta_por_modalidade
 from src.optmization import opt_tarifa_verde, opt_tarifa_azul
 import requests
+import asyncio
 import os
 import re
 from datetime import datetime
@@ -23,7 +31,6 @@ import logging
 from operator import itemgetter
 
 bp = Blueprint("seger", __name__, url_prefix="/api/seger")
-SEGER_DADOS_FATURA_URL = "http://localhost:5000/api/seger/dados-fatura"
 
 # Mapa de meses
 MES_MAP = {
@@ -81,6 +88,63 @@ def converter_tarifas_para_kwh(tarifas_compactadas):
                 )
     return tarifas_compactadas
 
+def _dados_das_faturas(pdf_paths, via_regex=True):
+    """
+    Extrai em lote (`extrair_lote`) os dados das faturas usadas pelas análises.
+
+    Returns:
+        Uma tupla (dados na ordem de `pdf_paths`, None) ou, se algum PDF
+        falhar, (None, resposta 500 com o erro do primeiro PDF que falhou).
+    """
+    resultados = extrair_lote(pdf_paths, via_regex)
+    falha = next((r for r in resultados if "erro" in r), None)
+    if falha:
+        return None, (jsonify({"error": f"Erro ao processar PDF {falha['pdf']}: {falha['erro']}"}), 500)
+    return [r["dados"] for r in resultados], None
+
+ENGINES_SCRAPER = ("sync", "async", "daemon")
+
+def _inteiro_positivo(data: dict, campo: str, limite: int) -> tuple[int | None, str | None]:
+    """
+    Lê um inteiro positivo opcional do body, limitado a `limite`.
+
+    Aceita números e strings numéricas ("4"); booleanos são recusados.
+
+    Returns:
+        Uma tupla (valor, erro): valor é None se o campo estiver ausente; erro
+        é a mensagem para o 400 quando o valor for inválido.
+    """
+    valor = data.get(campo)
+    if valor is None:
+        return None, None
+    try:
+        if isinstance(valor, bool):
+            raise ValueError
+        valor = int(valor)
+    except (TypeError, ValueError):
+        return None, f"{campo} deve ser um inteiro positivo"
+    if valor < 1:
+        return None, f"{campo} deve ser um inteiro positivo"
+    return min(valor, limite), None
+
+def _booleano(data: dict, campo: str, padrao: bool) -> tuple[bool, str | None]:
+    """
+    Lê um booleano opcional do body sem `bool()`, que tornaria "false" verdadeiro.
+
+    Aceita true/false, 1/0 e as strings "true"/"false", "1"/"0", "sim"/"nao".
+
+    Returns:
+        Uma tupla (valor, erro), com erro preenchido para o 400 quando o valor for inválido.
+    """
+    valor = data.get(campo, padrao)
+    if isinstance(valor, bool):
+        return valor, None
+    if isinstance(valor, int) and valor in (0, 1):
+        return bool(valor), None
+    if isinstance(valor, str) and valor.strip().lower() in ("true", "1", "sim", "false", "0", "nao", "não"):
+        return valor.strip().lower() in ("true", "1", "sim"), None
+    return padrao, f"{campo} deve ser true ou false"
+
 @bp.route("/faturas", methods=["POST"])
 def faturas():
     """
@@ -94,28 +158,134 @@ def faturas():
           "instalacoes": ["cod_instalacao1", "cod_instalacao2"],
           "data_inicio": "JAN-2023",
           "data_fim": "DEZ-2023",
-          "mode": true
+          "mode": true,
+          "workers": 4,  # Opcional, padrão e máximo é SCRAPER_WORKERS
+          "engine": "sync",  # Opcional: "sync" (pool de threads), "async" (event loop)
+                             # ou "daemon" (navegador aquecido; padrão se SCRAPER_DAEMON=1)
+          "resume": false,   # Opcional: retoma a execução interrompida com os mesmos parâmetros
+          "extrair": false,  # Opcional: extrai os dados de cada PDF enquanto o scraping continua
+          "via_regex": true  # Opcional, usado com "extrair"
         }
 
-    Respostas:
+    Com o engine "daemon", o job é executado pelo navegador aquecido de
+    `src.scraper_daemon` (sempre headless, ignorando "mode", "workers" e "resume");
+    com "extrair", o serviço repassa o progresso de cada instalação ao pipeline,
+    como nos demais engines.
 
+    Respostas:
+        200 OK: JSON com os caminhos dos PDFs salvos ("pdfs"), as instalações
+                que falharam ("falhas"), a latência por etapa ("metricas") e,
+                nos engines "sync" e "async", o resumo da execução ("resumo").
+                Com "extrair", inclui também "extracoes": os JSONs gravados ao lado
+                de cada PDF ("json") e os PDFs que falharam na extração ("falhas").
+        400 Bad Request: Se os parâmetros obrigatórios estiverem ausentes, "workers" não
+                         for um inteiro positivo, "engine" for desconhecido ou "mode",
+                         "resume", "extrair" ou "via_regex" não forem booleanos.
     """
     data = request.get_json(force=True)
     instalacoes = data.get("instalacoes")
     inicio      = data.get("data_inicio")
     fim         = data.get("data_fim")
-    mode        = data.get("mode", True)
+    engine      = data.get("engine", "daemon" if SCRAPER_DAEMON else "sync")
     # validação mínima
     if not isinstance(instalacoes, list) or not inicio or not fim:
         return jsonify({"error": "instalacoes (lista), data_inicio e data_fim são obrigatórios"}), 400
-
-    # dispara o scraper e retorna os paths
+    if engine not in ENGINES_SCRAPER:
+        return jsonify({"error": f"engine deve ser um de {', '.join(ENGINES_SCRAPER)}"}), 400
+    workers, erro = _inteiro_positivo(data, "workers", SCRAPER_WORKERS)
+    if erro:
+        return jsonify({"error": erro}), 400
+    opcoes = {}
+    for campo, padrao in (("mode", True), ("resume", False), ("extrair", False), ("via_regex", True)):
+        opcoes[campo], erro = _booleano(data, campo, padrao)
+        if erro:
+            return jsonify({"error": erro}), 400
+    mode, resume, extrair, via_regex = itemgetter("mode", "resume", "extrair", "via_regex")(opcoes)
+
+    # dispara o scraper e retorna os paths; com "extrair", os parsers consomem
+    # cada PDF assim que ele é salvo, enquanto o scraping continua
+    pipeline = PipelineExtracao(via_regex) if extrair else None
+    progresso = pipeline.progresso if pipeline else None
     try:
-        paths = baixar_faturas_por_instalacao(instalacoes, inicio, fim, mode)
-        return jsonify({"pdfs": paths})
+        if engine == "daemon":
+            resultado = obter_servico().executar(instalacoes, inicio, fim, progresso=progresso)
+        elif engine == "async":
+            resultado = asyncio.run(baixar_faturas_async(instalacoes, inicio, fim, mode, workers, progresso, resume=resume))
+        else:
+            resultado = baixar_faturas(instalacoes, inicio, fim, mode, workers, progresso, resume=resume)
     except Exception as e:
+        if pipeline:
+            pipeline.encerrar()
         return jsonify({"error": str(e)}), 500
 
+    if pipeline:
+        resultado["extracoes"] = pipeline.encerrar(resultado["pdfs"])
+    return jsonify(resultado)
+
+@bp.route("/jobs", methods=["POST"])
+def submeter_job():
+    """
+    Endpoint para agendar o download de faturas em segundo plano.
+
+    Aceita o mesmo body de `/faturas` (com engine "sync" ou "async") e
+    responde imediatamente com o id do job, cujo andamento é consultado em
+    `/jobs/<job_id>`.
+
+    Respostas:
+        202 Accepted: JSON com "job_id" e "status_url".
+        400 Bad Request: Se os parâmetros obrigatórios estiverem ausentes, "engine"
+                         não for "sync" ou "async", "workers" não for um inteiro
+                         positivo (é limitado a `SCRAPER_WORKERS`) ou "mode" não for booleano.
+    """
+    data = request.get_json(force=True)
+    instalacoes = data.get("instalacoes")
+    inicio      = data.get("data_inicio")
+    fim         = data.get("data_fim")
+    engine      = data.get("engine", "sync")
+    if not isinstance(instalacoes, list) or not inicio or not fim:
+        return jsonify({"error": "instalacoes (lista), data_inicio e data_fim são obrigatórios"}), 400
+    if engine not in ("sync", "async"):
+        return jsonify({"error": "engine deve ser 'sync' ou 'async'"}), 400
+    workers, erro = _inteiro_positivo(data, "workers", SCRAPER_WORKERS)
+    mode, erro_mode = _booleano(data, "mode", True)
+    if erro or erro_mode:
+        return jsonify({"error": erro or erro_mode}), 400
+
+    job_id = obter_gerenciador().submeter(instalacoes, inicio, fim, mode, workers, engine)
+    return jsonify({"job_id": job_id, "status_url": f"{bp.url_prefix}/jobs/{job_id}"}), 202
+
+@bp.route("/jobs/<job_id>", methods=["GET"])
+def status_job(job_id):
+    """
+    Endpoint para consultar o andamento de um job.
+
+    Respostas:
+        200 OK: JSON com o status do job, o resumo por status e, para cada
+                instalação, seu status, PDFs salvos e erro.
+        404 Not Found: Se o job não existir.
+    """
+    status = obter_gerenciador().status(job_id)
+    if status is None:
+        return jsonify({"error": "Job não encontrado"}), 404
+    return jsonify(status)
+
+@bp.route("/jobs/<job_id>/cancelar", methods=["POST"])
+def cancelar_job(job_id):
+    """
+    Endpoint para cancelar um job pendente ou em execução.
+
+    Respostas:
+        202 Accepted: JSON com o status após o pedido ("cancelado" ou "cancelando").
+        404 Not Found: Se o job não existir.
+        409 Conflict: Se o job já tiver terminado.
+    """
+    status = obter_gerenciador().cancelar(job_id)
+    if status is None:
+        return jsonify({"error": "Job não encontrado"}), 404
+    if status in ("concluido", "falhou"):
+        return jsonify({"error": f"Job já finalizado ({status})", "status": status}), 409
+    return jsonify({"job_id": job_id, "status": status}), 202
+
 @bp.route("/faturas/<path:pdf_path>", methods=["GET"])
 def download(pdf_path):
     """
@@ -165,6 +335,147 @@ def dados_fatura():
         traceback_str = traceback.format_exc()
         return jsonify({"error": str(traceback_str)}), 500
 
+def _arquivar_upload(conteudo, dados):
+    """
+    Grava o PDF enviado em `faturas_edp/<instalacao>/fatura_<MMM-AAAA>.pdf`.
+
+    Usa o número da instalação e o mês de referência ("MM/AAAA") extraídos da
+    própria fatura. Se algum deles faltar ou vier em formato inesperado, o
+    PDF não é gravado.
+
+    Returns:
+        Uma tupla (caminho gravado, aviso): o caminho e None quando arquivado,
+        ou None e o motivo de não ter arquivado.
+    """
+    ident = dados.get("identificacao") or {}
+    numero, mes_ref = ident.get("numero_instalacao"), ident.get("mes_referencia")
+    if not isinstance(numero, str) or not numero.isdigit():
+        aviso = "Fatura sem número da instalação; PDF não arquivado."
+    elif not isinstance(mes_ref, str) or not re.fullmatch(r"(0[1-9]|1[0-2])/\d{4}", mes_ref):
+        aviso = f"Mês de referência inválido ({mes_ref!r}); PDF não arquivado."
+    else:
+        mes, ano = mes_ref.split("/")
+        ref = f"{next(k for k, v in MES_MAP.items() if v == int(mes))}-{ano}"
+        pasta = os.path.join(BASE_DIR, numero)
+        os.makedirs(pasta, exist_ok=True)
+        return gravar_fatura(pasta, ref, conteudo, carregar_manifesto(pasta)), None
+    logging.warning(f"⚠️ Upload não arquivado: {aviso}")
+    return None, aviso
+
+@bp.route("/dados-fatura/upload", methods=["POST"])
+def dados_fatura_upload():
+    """
+    Endpoint para extrair os dados de uma fatura enviada na própria requisição.
+
+    O PDF é lido para a memória e extraído de lá, sem passar pelo disco do
+    servidor; o SHA-256 do buffer é a chave do cache. Aceita:
+
+        - multipart/form-data com o arquivo no campo "pdf";
+        - corpo cru (Content-Type: application/pdf) com os bytes do PDF.
+
+    Parâmetros (query string ou campos do formulário):
+        via_regex: "true" (padrão) ou "false" para usar o LLM.
+        arquivar:  "true" para também gravar o PDF em faturas_edp/<instalacao>/
+                   (padrão "false").
+
+    Respostas:
+        200 OK: JSON {"sha256", "dados", "arquivo"} ("arquivo" é o caminho
+                gravado ou null); com "aviso" quando `arquivar` foi pedido mas
+                a fatura não tem instalação ou mês de referência válidos.
+        400 Bad Request: Se nenhum PDF for enviado ou o conteúdo não for PDF.
+        500 Internal Server Error: Se a extração falhar.
+    """
+    arquivo = request.files.get("pdf")
+    conteudo = arquivo.read() if arquivo else request.get_data(cache=False)
+    if not conteudo:
+        return jsonify({"error": "Envie o PDF no campo 'pdf' (multipart) ou no corpo da requisição"}), 400
+    if not conteudo.startswith(b"%PDF"):
+        return jsonify({"error": "O conteúdo enviado não é um PDF"}), 400
+
+    via_regex = request.values.get("via_regex", "true").lower() != "false"
+    arquivar = request.values.get("arquivar", "false").lower() == "true"
+    sha256 = CacheFaturas.hash_conteudo(conteudo)
+    try:
+        dados = extrair_dados_completos_da_fatura_bytes(conteudo, via_regex=via_regex, sha256=sha256)
+    except Exception as e:
+        logging.error(f"❌ Falha ao extrair upload {sha256[:12]}: {e}")
+        return jsonify({"error": str(e)}), 500
+    if "error" in dados:
+        return jsonify(dados), 500
+
+    caminho, aviso = _arquivar_upload(conteudo, dados) if arquivar else (None, None)
+    resposta = {"sha256": sha256, "dados": dados, "arquivo": caminho}
+    if aviso:
+        resposta["aviso"] = aviso
+    return jsonify(resposta)
+
+@bp.route("/dados-fatura/lote", methods=["POST"])
+def dados_fatura_lote():
+    """
+    Endpoint para extrair os dados de vários PDFs de fatura em paralelo.
+
+    Os PDFs são distribuídos por um pool de processos (`PARSER_PROCESSOS`);
+    o resultado preserva a ordem de entrada e reporta os erros por arquivo.
+
+    Body da Requisição (JSON):
+        {
+          "pdf_paths": ["caminho/fatura1.pdf", "caminho/fatura2.pdf"],
+          "via_regex": true,  # Opcional, padrão é true
+          "workers": 4        # Opcional, padrão é PARSER_PROCESSOS
+        }
+
+    Respostas:
+        200 OK: JSON {"resultados": [...]} com {"pdf", "dados"} ou {"pdf", "erro"} por PDF.
+        400 Bad Request: Se "pdf_paths" não for uma lista não vazia ou "workers" não
+                         for um inteiro positivo. Valores acima do número de núcleos (ou
+                         de `PARSER_PROCESSOS`, se maior) são limitados a ele.
+    """
+    data = request.get_json(force=True)
+    pdf_paths = data.get("pdf_paths")
+    if not isinstance(pdf_paths, list) or not pdf_paths:
+        return jsonify({"error": "pdf_paths (lista) é obrigatório"}), 400
+    workers, erro = _inteiro_positivo(data, "workers", max(os.cpu_count() or 1, PARSER_PROCESSOS))
+    if erro:
+        return jsonify({"error": erro}), 400
+    return jsonify({"resultados": extrair_lote(pdf_paths, data.get("via_regex", True), workers)})
+
+@bp.route("/cache-parser", methods=["GET"])
+def cache_parser():
+    """
+    Endpoint com as estatísticas do cache de extração de faturas.
+
+    Respostas:
+        200 OK: JSON com acertos em memória e em disco, faltas, gravações,
+                taxa de acerto e ocupação da LRU; {"ativo": false} se o
+                cache estiver desligado (PARSER_CACHE=0).
+    """
+    cache = obter_cache()
+    if cache is None:
+        return jsonify({"ativo": False})
+    return jsonify({"ativo": True, **cache.estatisticas()})
+
+@bp.route("/campos-parser", methods=["GET"])
+def campos_parser():
+    """
+    Endpoint com as estatísticas por campo do parser regex.
+
+    Mostra, para cada extrator da tabela `CAMPOS`, execuções, acertos,
+    faltas, acertos achados fora da seção esperada, faturas em que o campo
+    foi ignorado por tempo, taxa de acerto, tempo (total e médio) e motor
+    (re ou re2), do mais lento para o mais rápido. Conta as extrações feitas neste processo (o pool de
+    `extrair_lote` acumula as suas em cada processo filho).
+
+    Query string:
+        zerar: "true" para zerar as estatísticas depois de lê-las.
+
+    Respostas:
+        200 OK: JSON {"campos": [...]}.
+    """
+    campos = estatisticas_campos()
+    if request.args.get("zerar", "false").lower() == "true":
+        zerar_estatisticas_campos()
+    return jsonify({"campos": campos})
+
 @bp.route("/faturas-json", methods=["POST"])
 def dados_fatura_json():
     data = request.get_json(force=True)
@@ -217,10 +528,10 @@ def dados_fatura_json():
     if not pdf_paths:
         return jsonify({"error": "Nenhuma fatura encontrada no intervalo informado"}), 404
 
-    headers = {
-        "Content-Type": "application/json",
-        "X-API-KEY": "chave-secreta-supersegura"
-    }
+    # Extrai todas as faturas de uma vez, em paralelo
+    dados_pdfs, erro = _dados_das_faturas(pdf_paths, via_regex)
+    if erro:
+        return erro
 
     # Inicializa vetores
     faturas_data = {
@@ -243,15 +554,8 @@ def dados_fatura_json():
         "Fatura_total": []
     }
 
-    for dt_ref, pdf_path in pdf_infos:
+    for pdf_path, data_json in zip(pdf_paths, dados_pdfs):
         try:
-            response = requests.post(
-                SEGER_DADOS_FATURA_URL,
-                json={"pdf_path": pdf_path, "via_regex": via_regex},
-                headers=headers
-            )
-            response.raise_for_status()
-            data_json = response.json()
             # logging.info(f"Dados da fatura para {pdf_path}:\n{data_json}")
             nome_arquivo = os.path.basename(pdf_path)
             match = re.search(r'_(\w{3})-(\d{4})\.pdf$', nome_arquivo)
@@ -427,29 +731,10 @@ def analisar_faturas():
     if not pdf_paths:
         return jsonify({"error": "Nenhuma fatura encontrada no intervalo informado"}), 404
 
-    headers = {
-        "Content-Type": "application/json",
-        "X-API-KEY": "chave-secreta-supersegura"
-    }
-
-    faturas_data = []
-    for pdf_path in pdf_paths:
-        try:
-            # Chama o endpoint interno para obter os dados da fatura
-            response = requests.post(SEGER_DADOS_FATURA_URL, json={"pdf_path": pdf_path, "via_regex": via_regex}, headers=headers)
-            response.raise_for_status()
-            fatura_json = response.json()
-            # logging.info(f"Dados da fatura para {pdf_path}:\n{fatura_json}")
-            faturas_data.append(fatura_json)
-        except Exception as e:
-            import traceback
-            traceback_str = traceback.format_exc()
-            logging.info(f"❌ HTTP Error - Status: {response.status_code} - Response: {response.text}")
-            # Trata erros na chamada ao endpoint de dados da fatura
-            return jsonify({"error": f"Erro ao processar PDF {pdf_path}: {traceback_str}"}), 500
-        except json.JSONDecodeError:
-            # Trata erros na decodificação do JSON da resposta
-            return jsonify({"error": f"Erro ao decodificar JSON para {pdf_path}"}), 500
+    # Extrai todas as faturas de uma vez, em paralelo
+    faturas_data, erro = _dados_das_faturas(pdf_paths, via_regex)
+    if erro:
+        return erro
 
 
     # Chama a função de análise com os dados das faturas
@@ -606,28 +891,10 @@ def otimizar_faturas():
     if not pdf_paths:
         return jsonify({"error": "Nenhuma fatura encontrada no intervalo informado"}), 404
 
-    headers = {
-        "Content-Type": "application/json",
-        "X-API-KEY": "chave-secreta-supersegura"
-    }
-    if not pdf_paths:
-        return jsonify({"error": "Nenhum caminho de PDF fornecido"}), 400
-
-    faturas_data = []
-    for pdf_path in pdf_paths:
-        try:
-            # Chama o endpoint interno para obter os dados da fatura
-            response = requests.post(SEGER_DADOS_FATURA_URL, json={"pdf_path": pdf_path}, headers=headers)
-            response.raise_for_status() # Levanta um erro para respostas de status ruins
-            fatura_json = response.json()
-            # logging.info(f"Dados da fatura para {pdf_path}:\n{fatura_json}")
-            faturas_data.append(fatura_json)
-        except requests.exceptions.RequestException as e:
-            # Trata erros na chamada ao endpoint de dados da fatura
-            return jsonify({"error": f"Erro ao processar PDF {pdf_path}: {e}"}), 500
-        except json.JSONDecodeError:
-            # Trata erros na decodificação do JSON da resposta
-            return jsonify({"error": f"Erro ao decodificar JSON para {pdf_path}"}), 500
+    # Extrai todas as faturas de uma vez, em paralelo
+    faturas_data, erro = _dados_das_faturas(pdf_paths)
+    if erro:
+        return erro
 
 
     # Chama a função de análise com os dados das faturas
@@ -719,29 +986,10 @@ def calcular_fatura_verde():
     if not pdf_paths:
         return jsonify({"error": "Nenhuma fatura encontrada no intervalo informado"}), 404
 
-    headers = {
-        "Content-Type": "application/json",
-        "X-API-KEY": "chave-secreta-supersegura"
-    }
-
-    faturas_data = []
-    for pdf_path in pdf_paths:
-        try:
-            # Chama o endpoint interno para obter os dados da fatura
-            response = requests.post(SEGER_DADOS_FATURA_URL, json={"pdf_path": pdf_path, "via_regex": via_regex}, headers=headers)
-            response.raise_for_status()
-            fatura_json = response.json()
-            # logging.info(f"Dados da fatura para {pdf_path}:\n{fatura_json}")
-            faturas_data.append(fatura_json)
-        except Exception as e:
-            import traceback
-            traceback_str = traceback.format_exc()
-            logging.info(f"❌ HTTP Error - Status: {response.status_code} - Response: {response.text}")
-            # Trata erros na chamada ao endpoint de dados da fatura
-            return jsonify({"error": f"Erro ao processar PDF {pdf_path}: {traceback_str}"}), 500
-        except json.JSONDecodeError:
-            # Trata erros na decodificação do JSON da resposta
-            return jsonify({"error": f"Erro ao decodificar JSON para {pdf_path}"}), 500
+    # Extrai todas as faturas de uma vez, em paralelo
+    faturas_data, erro = _dados_das_faturas(pdf_paths, via_regex)
+    if erro:
+        return erro
 
 
     # Chama a função de análise com os dados das faturas
@@ -826,29 +1074,10 @@ def calcular_fatura_azul():
     if not pdf_paths:
         return jsonify({"error": "Nenhuma fatura encontrada no intervalo informado"}), 404
 
-    headers = {
-        "Content-Type": "application/json",
-        "X-API-KEY": "chave-secreta-supersegura"
-    }
-
-    faturas_data = []
-    for pdf_path in pdf_paths:
-        try:
-            # Chama o endpoint interno para obter os dados da fatura
-            response = requests.post(SEGER_DADOS_FATURA_URL, json={"pdf_path": pdf_path, "via_regex": via_regex}, headers=headers)
-            response.raise_for_status()
-            fatura_json = response.json()
-            # logging.info(f"Dados da fatura para {pdf_path}:\n{fatura_json}")
-            faturas_data.append(fatura_json)
-        except Exception as e:
-            import traceback
-            traceback_str = traceback.format_exc()
-            logging.info(f"❌ HTTP Error - Status: {response.status_code} - Response: {response.text}")
-            # Trata erros na chamada ao endpoint de dados da fatura
-            return jsonify({"error": f"Erro ao processar PDF {pdf_path}: {traceback_str}"}), 500
-        except json.JSONDecodeError:
-            # Trata erros na decodificação do JSON da resposta
-            return jsonify({"error": f"Erro ao decodificar JSON para {pdf_path}"}), 500
+    # Extrai todas as faturas de uma vez, em paralelo
+    faturas_data, erro = _dados_das_faturas(pdf_paths, via_regex)
+    if erro:
+        return erro
 
 
     # Chama a função de análise com os dados das faturas
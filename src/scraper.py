@@ -10,15 +10,32 @@ from playwright.sync_api import sync_playwright
 import os
 import re
 import sys
+import queue
+import threading
+import time
 from datetime import datetime
+from typing import Callable
 from dotenv import load_dotenv
 import logging
+from src.utils.manifesto import carregar_manifesto, fatura_conhecida, caminho_temporario, confirmar_download, gravar_fatura
+from src.utils.bloqueio_recursos import CONSENTIMENTO_BLOQUEADO, instalar_bloqueio
+from src.utils.diario import DiarioExecucao
+from src.utils.metricas import HistogramaEtapas
+from src.utils.retentativas import PoliticaRetentativa
+from src.utils.sessao import carregar_estado, gravar_estado, registrar_validacao, sessao_fresca, trava_sessao, validada_apos
+from src.utils.download_direto import (
+    DOWNLOAD_DIRETO, aprender_modelo, descartar_modelo, eh_pdf,
+    escolher_requisicao_pdf, guardar_modelo, modelo_atual, montar_requisicao, referencia_repetida,
+)
 
 load_dotenv()
 
 BASE_DIR = os.path.join(os.getcwd(), "faturas_edp")
 """Diretório base onde as faturas baixadas serão salvas."""
 
+EXECUCOES_DIR = os.path.join(BASE_DIR, ".execucoes")
+"""Diretório dos diários de execução usados para retomar execuções interrompidas."""
+
 LOG_DIR = os.path.join(os.getcwd(), "src/logs")
 """Diretório onde os arquivos de log do scraper serão armazenados."""
 
@@ -28,6 +45,41 @@ LOGIN_EMAIL = os.getenv("EDP_LOGIN_EMAIL", "")
 LOGIN_SENHA = os.getenv("EDP_LOGIN_SENHA", "")
 """Senha utilizada para login no portal da EDP. Obtida de variável de ambiente."""
 
+EDP_BASE_URL = os.getenv("EDP_BASE_URL", "https://www.edponline.com.br").rstrip("/")
+"""Endereço do portal da EDP; aponte para o portal local de `test/portal_edp.py` em benchmarks."""
+
+LOGIN_URL = f"{EDP_BASE_URL}/engenheiro"
+CONSULTA_URL = f"{EDP_BASE_URL}/servicos/consulta-debitos"
+
+SESSION_PATH = "edp_session.json"
+"""Arquivo com o storage state da sessão logada, compartilhado por todos os contextos."""
+
+SCRAPER_WORKERS = int(os.getenv("SCRAPER_WORKERS", "1"))
+"""Número de contextos de navegador que processam instalações em paralelo."""
+
+CARDS_SELECTOR = 'div.tab-pane.active div.card.card-extrato.card-opcoes-segunda-via'
+"""Seletor dos cards de fatura da aba ativa."""
+
+ERRO_FATURAS_SELECTOR = 'text="Desculpe-nos! Não foi possível carregar as suas faturas"'
+"""Seletor da mensagem intermitente de erro ao carregar a lista de faturas."""
+
+JS_MAIS_CARDS = "([sel, n]) => document.querySelectorAll(sel).length > n"
+"""Condição usada após "Ver mais faturas": a lista passou a ter mais de `n` cards."""
+
+JS_LER_CARDS = """(sel) => Array.from(document.querySelectorAll(sel), (card, index) => {
+    const m = card.innerText.match(/Referente[\\s\\S]*?([A-Z]{3}\\/\\d{4})/);
+    const has_view_button = Array.from(card.querySelectorAll("p"))
+        .some((p) => p.innerText.includes("Visualizar fatura"));
+    return {index, reference: m ? m[1].replace("/", "-") : null, has_view_button};
+})"""
+"""Lê em uma única ida ao navegador {index, reference ("MMM-AAAA"), has_view_button} de cada card."""
+
+class ScrapingCancelado(RuntimeError):
+    """Levantada quando o evento de cancelamento de uma execução é acionado."""
+
+Progresso = Callable[[str, str, list, "str | None"], None]
+"""Callback `progresso(instalacao, status, pdfs, erro)`; status é "executando", "pdf" (um PDF salvo, em `pdfs`), "concluida", "adiada", "falhou" ou "cancelada"."""
+
 # Configuração do logger
 log_file = os.path.join(LOG_DIR, "scraper_edp.log")
 os.makedirs(LOG_DIR, exist_ok=True)  # Garante que o diretório existe
@@ -63,7 +115,42 @@ def ref_to_date(ref: str) -> datetime:
     except:
         return datetime.min
 
-def reload_faturas(page,numero) -> None:
+MESES_REF = ["JAN", "FEV", "MAR", "ABR", "MAI", "JUN", "JUL", "AGO", "SET", "OUT", "NOV", "DEZ"]
+
+def ref_mais_antiga(cards_lidos: list[dict]) -> datetime | None:
+    """
+    Retorna a data da referência mais antiga entre as lidas dos cards.
+
+    Args:
+        cards_lidos: Lista de {index, reference, has_view_button}, como devolvida por `JS_LER_CARDS`.
+
+    Returns:
+        O datetime da referência mais antiga, ou None se nenhuma for válida."""
+    datas = [ref_to_date(c["reference"]) for c in cards_lidos if c["reference"]]
+    datas = [d for d in datas if d != datetime.min]
+    return min(datas) if datas else None
+
+def referencias_no_intervalo(dt_ini: datetime, dt_fim: datetime) -> list[str]:
+    """
+    Lista as referências "MMM-AAAA" de todos os meses entre duas datas (inclusivo).
+
+    Args:
+        dt_ini: Uma das extremidades do intervalo.
+        dt_fim: A outra extremidade do intervalo.
+
+    Returns:
+        As referências em ordem cronológica; lista vazia se alguma data for inválida."""
+    ini, fim = min(dt_ini, dt_fim), max(dt_ini, dt_fim)
+    if ini == datetime.min:
+        return []
+    refs = []
+    ano, mes = ini.year, ini.month
+    while (ano, mes) <= (fim.year, fim.month):
+        refs.append(f"{MESES_REF[mes - 1]}-{ano}")
+        ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+    return refs
+
+def reload_faturas(page, numero, politica: PoliticaRetentativa | None = None) -> None:
     """
     Tenta recarregar a página de faturas para uma instalação específica no Playwright.
 
@@ -72,61 +159,155 @@ def reload_faturas(page,numero) -> None:
 
     Args:
         page: O objeto Page do Playwright representando a página atual.
-        numero: O número da instalação a ser recarregada."""
-    while True:
-        page.goto("https://www.edponline.com.br/servicos/consulta-debitos", wait_until="load")
+        numero: O número da instalação a ser recarregada.
+        politica: Política de retentativas da execução. Padrão é uma nova `PoliticaRetentativa()`.
+
+    Raises:
+        RuntimeError: Se a lista de faturas continuar com erro após as tentativas."""
+    politica = politica or PoliticaRetentativa()
+    for _ in politica.tentativas():
+        page.goto(CONSULTA_URL, wait_until="load")
         page.evaluate("window.scrollTo(0, document.body.scrollHeight)") 
         page.fill('input[name="Instalacao"]', numero)
         page.click('button:has-text("Avançar")')
-        page.wait_for_timeout(3000)
-        page.locator(f'a.instalacao:has-text("{numero}")').click()
+        link_click = page.locator(f'a.instalacao:has-text("{numero}")')
+        link_click.wait_for(state="visible", timeout=20000)
+        link_click.click()
         # Verifica se o erro de carregamento apareceu
-        erro_carregamento = page.locator('text="Desculpe-nos! Não foi possível carregar as suas faturas"')
-        if erro_carregamento.is_visible(timeout=3000):
-            logging.warning("  ⚠️ Erro ao carregar faturas. Tentando novamente...")
-            page.go_back()
-            page.wait_for_timeout(3000)
-            continue  # Tenta novamente
-        else:
-            sucesso = True
-            break  # Sai do loop se carregou corretamente
+        if _aguardar_faturas(page) != "erro":
+            return
+        logging.warning("  ⚠️ Erro ao carregar faturas. Tentando novamente...")
+        page.go_back(wait_until="load")
+    raise RuntimeError(f"Falha ao recarregar as faturas da instalação {numero}")
 
-def get_logged_context(p, mode=True, force_login=False):
+def _aguardar_faturas(page, timeout: int = 15000) -> str:
+    """
+    Espera a lista de faturas resolver: cards visíveis ou mensagem de erro.
+
+    Args:
+        page: O objeto Page do Playwright, logo após abrir a instalação.
+        timeout: Tempo máximo de espera em milissegundos.
+
+    Returns:
+        "ok" se os cards apareceram, "erro" se apareceu a mensagem
+        "Desculpe-nos!", ou "vazio" se nenhum dos dois apareceu no prazo."""
+    erro = page.locator(ERRO_FATURAS_SELECTOR)
+    try:
+        page.locator(CARDS_SELECTOR).or_(erro).first.wait_for(state="visible", timeout=timeout)
+    except Exception:
+        return "vazio"
+    return "erro" if erro.is_visible() else "ok"
+
+def get_logged_context(p, mode=True, force_login=False, metricas: HistogramaEtapas | None = None):
     """
     Obtém um contexto de navegador Playwright logado no portal da EDP.
 
-    Tenta reutilizar uma sessão salva em arquivo (`edp_session.json`). Caso
-    não encontre ou force um novo login, realiza o processo de login
-    e salva a nova sessão.
+    A sessão salva em `edp_session.json` só é usada diretamente enquanto
+    estiver fresca (ver `src.utils.sessao`); caso contrário, ou se um novo
+    login for forçado, ela é revalidada/renovada por `garantir_sessao`.
 
     Args:
         p: O objeto sync_playwright.
         mode: Booleano indicando se o navegador deve ser headless (True) ou visível (False). Padrão é True.
         force_login: Booleano indicando se um novo login deve ser forcado, mesmo que uma sessão salva exista. Padrão é False.
+        metricas: Histograma opcional onde a duração do login é registrada.
 
     Returns: Uma tupla contendo o objeto Browser e o objeto Context do Playwright."""
-    session_path = "edp_session.json"
     browser = p.chromium.launch(headless=mode)
-
-    if not force_login and os.path.exists(session_path):
-        logging.info("♻️ Sessão encontrada. Utilizando sessão salva.")
-        ctx = browser.new_context(
-            accept_downloads=True,
-            storage_state=session_path
-        )
-        return browser, ctx
-
-    # Caso contrário, cria nova sessão e realiza login
-    logging.info("🔁 Criando nova sessão com login.")
-    ctx = browser.new_context(accept_downloads=True)
-    page = ctx.new_page()
-    realizar_login(page, LOGIN_EMAIL, LOGIN_SENHA)
-
-    # Salva a sessão após login bem-sucedido
-    ctx.storage_state(path=session_path)
-    logging.info("💾 Sessão salva em edp_session.json.")
+    estado = garantir_sessao(browser, force_login, metricas)
+    ctx = browser.new_context(accept_downloads=True, storage_state=estado)
+    instalar_bloqueio(ctx)
     return browser, ctx
 
+def garantir_sessao(browser, force_login: bool = False, metricas: HistogramaEtapas | None = None) -> dict:
+    """
+    Devolve um storage state fresco, renovando-o se necessário.
+
+    Enquanto a sessão estiver dentro do TTL, o arquivo é usado sem abrir
+    nenhuma página. Fora dele, a renovação acontece sob a trava de arquivo:
+    quem chegar depois encontra a sessão já renovada e apenas a reutiliza,
+    evitando vários logins simultâneos.
+
+    Args:
+        browser: O Browser do Playwright usado para a eventual renovação.
+        force_login: Ignora a sessão salva e faz um novo login.
+        metricas: Histograma opcional onde a duração do login é registrada.
+
+    Returns:
+        O storage state (cookies e origins) da sessão válida."""
+    if not force_login and sessao_fresca(SESSION_PATH):
+        estado = carregar_estado(SESSION_PATH)
+        if estado:
+            logging.info("♻️ Sessão encontrada. Utilizando sessão salva.")
+            return estado
+
+    with trava_sessao(SESSION_PATH):
+        estado = carregar_estado(SESSION_PATH)
+        if not force_login and estado and sessao_fresca(SESSION_PATH):
+            logging.info("♻️ Sessão renovada por outro worker. Utilizando sessão salva.")
+            return estado
+        return _renovar_sessao(browser, None if force_login else estado, metricas or HistogramaEtapas())
+
+def _renovar_sessao(browser, estado: dict | None, metricas: HistogramaEtapas) -> dict:
+    """
+    Revalida a sessão salva ou faz um novo login; deve ser chamada com a trava da sessão.
+
+    Args:
+        browser: O Browser do Playwright.
+        estado: Storage state atual, ou None para forçar o login.
+        metricas: Histograma onde a duração do login é registrada.
+
+    Returns:
+        O novo storage state, já gravado em `edp_session.json`.
+
+    Raises:
+        RuntimeError: Se o login falhar."""
+    ctx = browser.new_context(storage_state=estado) if estado else browser.new_context()
+    instalar_bloqueio(ctx)
+    try:
+        page = ctx.new_page()
+        if estado:
+            page.goto(CONSULTA_URL, wait_until="load")
+        if "/servicos" in page.url:
+            logging.info("🔄 Sessão salva ainda válida. Prazo renovado.")
+        else:
+            logging.info("🔁 Criando nova sessão com login.")
+            with metricas.medir("login"):
+                if not realizar_login(page, LOGIN_EMAIL, LOGIN_SENHA):
+                    raise RuntimeError("Falha ao realizar login no portal da EDP")
+        estado = ctx.storage_state()
+        gravar_estado(SESSION_PATH, estado)
+        logging.info("💾 Sessão salva em edp_session.json.")
+        return estado
+    finally:
+        ctx.close()
+
+def _atualizar_contexto(ctx, metricas: HistogramaEtapas, expirada_desde: float | None = None) -> None:
+    """
+    Mantém os cookies de um contexto já aberto alinhados com a sessão compartilhada.
+
+    Sem `expirada_desde`, só age quando a sessão sai do TTL (renovação
+    proativa). Com `expirada_desde` (o instante em que começou a navegação
+    que o portal rejeitou), renova a sessão, a menos que outro worker já a
+    tenha renovado depois desse instante.
+
+    Args:
+        ctx: O BrowserContext a atualizar.
+        metricas: Histograma onde a duração de um eventual login é registrada.
+        expirada_desde: `time.time()` do início da navegação rejeitada, ou None."""
+    if expirada_desde is None:
+        if sessao_fresca(SESSION_PATH):
+            return
+        estado = garantir_sessao(ctx.browser, False, metricas)
+    else:
+        with trava_sessao(SESSION_PATH):
+            estado = carregar_estado(SESSION_PATH)
+            if estado and validada_apos(SESSION_PATH, expirada_desde):
+                logging.info("♻️ Sessão já renovada por outro worker. Reaproveitando.")
+            else:
+                estado = _renovar_sessao(ctx.browser, None, metricas)
+    ctx.add_cookies(estado.get("cookies", []))
+
 def realizar_login(page, email: str, senha: str):
     """
     Realiza o processo de login no portal online da EDP utilizando Playwright.
@@ -141,14 +322,17 @@ def realizar_login(page, email: str, senha: str):
 
     Returns: True se o login for bem-sucedido (redirecionado para a página de serviços), False caso contrário."""
     logging.info("🔐 Navegando para página de login...")
-    page.goto("https://www.edponline.com.br/engenheiro", wait_until="load")
+    page.goto(LOGIN_URL, wait_until="load")
     logging.info("✅ Página de login carregada.")
 
     # Tenta aceitar cookies ou ignora se não for possível
     try:
-        page.locator("button#onetrust-accept-btn-handler").click(timeout=3000)
-        page.wait_for_timeout(1000)
-        logging.info("🍪 Cookies aceitos.")
+        if CONSENTIMENTO_BLOQUEADO:
+            logging.info("🍪 Banner de cookies bloqueado (SCRAPER_BLOQUEIO=bloquear).")
+        else:
+            page.locator("button#onetrust-accept-btn-handler").click(timeout=3000)
+            page.locator("#onetrust-banner-sdk").wait_for(state="hidden", timeout=3000)
+            logging.info("🍪 Cookies aceitos.")
     except:
         try:
             # Força remoção via JS se overlay estiver atrapalhando clique
@@ -183,203 +367,621 @@ def realizar_login(page, email: str, senha: str):
         logging.info("🚪 Login enviado, aguardando redirecionamento...")
 
         # Espera redirecionamento após login
-        for _ in range(50):
-            if "/servicos" in page.url:
-                logging.info("✅ Login realizado com sucesso!")
-                return True
-            page.wait_for_timeout(300)
+        page.wait_for_url(re.compile(r"/servicos"), timeout=15000)
+        logging.info("✅ Login realizado com sucesso!")
+        return True
 
     except Exception as e:
         logging.error(f"❌ Erro durante login: {e}")
 
     return False
 
-def baixar_faturas_por_instalacao(instalacoes: list[str], data_inicio: str, data_fim: str, mode: bool = True) -> list[str]:
+def _validar_sessao(page, ctx, metricas: HistogramaEtapas) -> None:
     """
-    Baixa faturas de energia para uma lista de números de instalação dentro de um período.
+    Garante que a página está logada e sem nenhuma instalação aberta.
 
-    Utiliza Playwright para navegar no portal da EDP, selecionar cada instalação,
-    localizar as faturas dentro do intervalo de datas especificado e baixar
-    os arquivos PDF correspondentes.
+    Navega para a consulta de débitos; se o portal redirecionar para fora de
+    `/servicos`, renova a sessão compartilhada (sob a trava de arquivo) e
+    aplica os novos cookies ao contexto. Uma navegação bem-sucedida conta
+    como validação e estende o TTL da sessão.
 
     Args:
-        instalacoes: Uma lista de strings, onde cada string é o número da instalação.
-        data_inicio: Uma string no formato "MMM-AAAA" representando a data de início
-                     do intervalo de faturas a serem baixadas (inclusivo).
-        data_fim: Uma string no formato "MMM-AAAA" representando a data de fim
-                  do intervalo de faturas a serem baixadas (inclusivo).
-        mode: Booleano indicando se o navegador Playwright deve ser headless (True) ou visível (False). Padrão é True.
+        page: O objeto Page do Playwright.
+        ctx: O objeto BrowserContext dono da página.
+        metricas: Histograma onde a duração de um eventual login é registrada."""
+    _atualizar_contexto(ctx, metricas)
+    inicio = time.time()
+    page.goto(CONSULTA_URL, wait_until="load")
+    if "/servicos" not in page.url:
+        logging.info("🔒 Sessão expirada. Renovando sessão.")
+        _atualizar_contexto(ctx, metricas, expirada_desde=inicio)
+        page.goto(CONSULTA_URL, wait_until="load")
+    else:
+        registrar_validacao(SESSION_PATH)
+
+    sair_instalacao = page.locator('a.edp-btn-dark:has-text("Sair da Instalação")')
+    if sair_instalacao.is_visible(timeout=5000):
+        sair_instalacao.click()
+        logging.info("↩️ Sessão ativa: saída da instalação realizada.")
+    else:
+        logging.info("✅ Sessão ativa: nenhuma instalação estava aberta.")
+
+def _baixar_direto(ctx, modelo: dict, ref: str, numero: str) -> bytes | None:
+    """
+    Busca o PDF de `ref` direto por HTTP, com os cookies do contexto logado.
+
+    Args:
+        ctx: O BrowserContext logado (seu `request` compartilha os cookies).
+        modelo: Modelo de requisição aprendido em `src.utils.download_direto`.
+        ref: Referência da fatura (ex: "MAR-2025").
+        numero: O número da instalação.
 
     Returns:
-        Uma lista de strings, onde cada string é o caminho completo para o arquivo
-        PDF da fatura baixada.
+        O conteúdo da resposta, ou None se a requisição falhar."""
+    requisicao = montar_requisicao(modelo, ref, numero)
+    if not requisicao:
+        return None
+    metodo, url, corpo, cabecalhos = requisicao
+    try:
+        resp = ctx.request.fetch(url, method=metodo, data=corpo, headers=cabecalhos, timeout=30000)
+        return resp.body() if resp.ok else None
+    except Exception as e:
+        logging.warning(f"      ⚠️ Erro no download direto de {ref}: {e}")
+        return None
+
+def _baixar_via_modal(
+    page,
+    card,
+    ref: str,
+    numero: str,
+    pasta_instalacao: str,
+    manifesto: dict,
+    metricas: HistogramaEtapas,
+    politica: PoliticaRetentativa | None = None,
+) -> str | None:
+    """
+    Baixa uma fatura pelo caminho do modal "2ª Via de Fatura".
 
-    Raises: Exception: Para erros que possam ocorrer durante o processo de scraping."""
-    dt_ini = ref_to_date(data_inicio)
-    dt_fim = ref_to_date(data_fim)
-    saved_paths: list[str] = []
+    Enquanto não houver modelo de download direto, as respostas de rede do
+    modal são observadas para aprender a requisição por trás de "Baixar".
 
-    with sync_playwright() as p:
-        browser, ctx = get_logged_context(p, mode, False)
-        page = ctx.new_page()
+    Args:
+        page: O objeto Page do Playwright, na lista de faturas da instalação.
+        card: O Locator do card da fatura.
+        ref: Referência da fatura (ex: "MAR-2025").
+        numero: O número da instalação.
+        pasta_instalacao: Pasta onde o PDF será salvo.
+        manifesto: Manifesto da instalação (atualizado in-place).
+        metricas: Histograma das etapas "modal" e "download".
+        politica: Política de retentativas usada ao recarregar a lista de faturas.
+
+    Returns:
+        O caminho do PDF salvo, ou None se o modal não abriu."""
+    logging.info(f"    ⬇️  Baixando fatura {ref}...")
+    capturar = DOWNLOAD_DIRETO and modelo_atual() is None
+    respostas: list = []
+    ouvir = respostas.append
+    if capturar:
+        page.on("response", ouvir)
+    try:
+        max_retentativas = 3
+        with metricas.medir("modal"):
+            for tentativa in range(max_retentativas):
+                try:
+                    card.locator('p:has-text("Visualizar fatura")').click()
+                    page.wait_for_selector('text="2ª Via de Fatura"', timeout=15000)
+
+                    # Verifica se o botão "Baixar" apareceu
+                    btn_baixar = page.locator('a:has-text("Baixar")')
+                    btn_baixar.wait_for(state="visible", timeout=35000)
+                    if btn_baixar.is_visible():
+                        break  # modal carregou corretamente, pode prosseguir
+                    else:
+                        raise Exception("Modal não carregou corretamente")
 
-        # Verifica se a sessão está válida
-        page.goto("https://www.edponline.com.br/servicos/consulta-debitos", wait_until="load")
-        if "/servicos" not in page.url:
-            logging.info("🔒 Sessão expirada. Realizando login novamente.")
-            realizar_login(page, LOGIN_EMAIL, LOGIN_SENHA)
-            ctx.storage_state(path="edp_session.json")
-
-        sair_instalacao = page.locator('a.edp-btn-dark:has-text("Sair da Instalação")')
-        if sair_instalacao.is_visible(timeout=5000):
-            sair_instalacao.click()
-            logging.info("↩️ Sessão ativa: saída da instalação realizada.")
+                except:
+                    logging.warning(f"      ⚠️ Modal com erro, tentativa {tentativa + 1}/{max_retentativas}")
+                    try:
+                        voltar_btn = page.locator('button.btn-outline-main-2:has-text("Voltar")')
+                        voltar_btn.wait_for(state="visible", timeout=15000)
+                        if voltar_btn.is_visible():
+                            voltar_btn.click()
+                            page.locator('text="2ª Via de Fatura"').wait_for(state="hidden", timeout=5000)
+                    except:
+                        reload_faturas(page, numero, politica)
+                        logging.warning("      ⚠️ Botão 'Voltar' não estava disponível.")
+
+        if not page.locator('a:has-text("Baixar")').is_visible():
+            logging.error("      ❌ Falha ao abrir modal corretamente após tentativas.")
+            return None
+
+        with metricas.medir("download"):
+            with page.expect_download() as dl:
+                download_bt = page.locator('a:has-text("Baixar")')
+                download_bt.wait_for(state="visible", timeout=15000)
+                download_bt.click()
+            download = dl.value
+            tmp = caminho_temporario(pasta_instalacao, ref)
+            download.save_as(tmp)
+            caminho = confirmar_download(pasta_instalacao, ref, tmp, manifesto)
+        logging.info(f"      ✔️  Salva em: {caminho}")
+    finally:
+        if capturar:
+            page.remove_listener("response", ouvir)
+
+    if capturar:
+        requisicao = escolher_requisicao_pdf(download.url, respostas)
+        modelo = aprender_modelo(*requisicao, ref, numero) if requisicao else None
+        if modelo:
+            guardar_modelo(modelo)
+            logging.info(f"      ⚡ Modelo de download direto aprendido: {modelo['metodo']} {modelo['url']}")
         else:
-            logging.info("✅ Sessão ativa: nenhuma instalação estava aberta.")
-        
-        for numero in instalacoes:
-            logging.info(f"Processando instalação: {numero}")
-            pasta_instalacao = os.path.join(BASE_DIR, numero)
-            os.makedirs(pasta_instalacao, exist_ok=True)
-
-            max_tentativas = 3
-            tentativa = 0
-            sucesso = False
-            
-            while tentativa < max_tentativas:
-                tentativa += 1
-                logging.info(f"  🔁 Tentativa {tentativa} para carregar faturas...")
-
-                # Vai para página de consulta
-                page.goto("https://www.edponline.com.br/servicos/consulta-debitos", wait_until="load")
-                logging.info("  🔄  Página de consulta carregada.")
-                page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                page.fill('input[name="Instalacao"]', numero)
-                btn_click = page.locator('button:has-text("Avançar")')
-                btn_click.wait_for(state="visible", timeout=20000)
-                page.click('button:has-text("Avançar")')
-                logging.info("  🔄  Página Instalação do cliente carregada.")
-                link_click = page.locator(f'a.instalacao:has-text("{numero}")')
-                link_click.wait_for(state="visible", timeout=20000)
-                link_click.click()
-                # Verifica se o erro de carregamento apareceu
-                erro_carregamento = page.locator('text="Desculpe-nos! Não foi possível carregar as suas faturas"')
-                if erro_carregamento.is_visible(timeout=3000):
-                    logging.warning("  ⚠️ Erro ao carregar faturas. Tentando novamente...")
-                    page.go_back()
-                    page.wait_for_timeout(3000)
-                    continue  # Tenta novamente
-                else:
-                    sucesso = True
-                    break  # Sai do loop se carregou corretamente
+            logging.info("      ℹ️ Requisição de download não reaproveitável (sem referência ou instalação); mantendo o modal.")
+
+    try:
+        fechar_modal = page.locator('i.icon-edp-circle-error.fs-1')
+        fechar_modal.wait_for(state="visible", timeout=20000)
+        fechar_modal.click()
+    except:
+        logging.warning("      ⚠️ Não foi possível fechar o modal de fatura.")
+
+    return caminho
+
+def _processar_instalacao(
+    page,
+    numero: str,
+    dt_ini: datetime,
+    dt_fim: datetime,
+    metricas: HistogramaEtapas,
+    cancelar: threading.Event | None = None,
+    politica: PoliticaRetentativa | None = None,
+    progresso: Progresso | None = None,
+) -> list[str]:
+    """
+    Baixa as faturas de uma única instalação dentro do intervalo informado.
 
-            if not sucesso:
-                logging.error("  ❌ Falha ao carregar faturas após 3 tentativas. Pulando instalação.")
+    Args:
+        page: O objeto Page do Playwright, já logado no portal.
+        numero: O número da instalação.
+        dt_ini: Data de início do intervalo (inclusiva).
+        dt_fim: Data de fim do intervalo (inclusiva).
+        metricas: Histograma onde a duração de cada etapa é registrada.
+        cancelar: Evento opcional verificado antes de cada fatura.
+        politica: Tentativas, backoff e prazo para carregar a lista de faturas.
+            Padrão é uma nova `PoliticaRetentativa()`.
+        progresso: Callback opcional notificado com o status "pdf" a cada PDF
+            salvo (ou já existente), antes de a instalação terminar.
+
+    Returns:
+        A lista de caminhos dos PDFs salvos para a instalação.
+
+    Raises:
+        RuntimeError: Se a lista de faturas não carregar após as tentativas.
+        ScrapingCancelado: Se `cancelar` for acionado durante os downloads."""
+    politica = politica or PoliticaRetentativa()
+    logging.info(f"Processando instalação: {numero}")
+    pasta_instalacao = os.path.join(BASE_DIR, numero)
+    os.makedirs(pasta_instalacao, exist_ok=True)
+    saved_paths: list[str] = []
+    manifesto = carregar_manifesto(pasta_instalacao)
+
+    def _salvar(caminho: str) -> None:
+        saved_paths.append(caminho)
+        _notificar(progresso, numero, "pdf", [caminho])
+
+    # Se todos os meses do intervalo já estão no manifesto, nem abre o portal
+    refs_intervalo = referencias_no_intervalo(dt_ini, dt_fim)
+    existentes = [fatura_conhecida(pasta_instalacao, ref, manifesto) for ref in refs_intervalo]
+    if refs_intervalo and all(existentes):
+        logging.info(f"  ✅ Todas as {len(existentes)} faturas do intervalo já baixadas. Pulando navegação.")
+        return existentes
+
+    # Renova proativamente a sessão do contexto se ela estiver perto de expirar
+    _atualizar_contexto(page.context, metricas)
+
+    tentativa = 0
+    sucesso = False
+
+    for tentativa in politica.tentativas(cancelar):
+        logging.info(f"  🔁 Tentativa {tentativa} para carregar faturas...")
+
+        # Vai para página de consulta
+        with metricas.medir("consulta"):
+            inicio = time.time()
+            page.goto(CONSULTA_URL, wait_until="load")
+            if "/servicos" not in page.url:
+                logging.warning("  🔒 Sessão expirada durante a consulta. Renovando sessão.")
+                _atualizar_contexto(page.context, metricas, expirada_desde=inicio)
                 continue
-            page.wait_for_timeout(3000)
-            logging.info("  🔄  Página de faturas carregada.")
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight)") 
-            page.wait_for_timeout(500)
-            # Ver mais faturas
-            for _ in range(21):
-                try:
-                    ver_mais = page.locator('button:has-text("Ver mais faturas")')
-                    if ver_mais.is_visible(timeout=3000):
-                        ver_mais.scroll_into_view_if_needed()
-                        ver_mais.click()
-                        page.wait_for_timeout(1000)
-                    else:
-                        logging.info("🔽 Nenhum botão 'Ver mais faturas' visível.")
-                        break
-                except Exception as e:
-                    logging.warning(f"⚠️ Erro ao clicar em 'Ver mais faturas': {e}")
+            logging.info("  🔄  Página de consulta carregada.")
+            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+            page.fill('input[name="Instalacao"]', numero)
+            btn_click = page.locator('button:has-text("Avançar")')
+            btn_click.wait_for(state="visible", timeout=20000)
+            page.click('button:has-text("Avançar")')
+            link_click = page.locator(f'a.instalacao:has-text("{numero}")')
+            link_click.wait_for(state="visible", timeout=20000)
+            logging.info("  🔄  Página Instalação do cliente carregada.")
+        with metricas.medir("instalacao"):
+            link_click.click()
+            # Espera os cards ou o erro de carregamento, o que vier primeiro
+            estado = _aguardar_faturas(page)
+        if estado == "erro":
+            logging.warning("  ⚠️ Erro ao carregar faturas. Tentando novamente...")
+            page.go_back(wait_until="load")
+            continue  # Tenta novamente
+        else:
+            sucesso = True
+            break  # Sai do loop se carregou corretamente
+
+    if not sucesso:
+        if cancelar is not None and cancelar.is_set():
+            raise ScrapingCancelado(f"Instalação {numero} cancelada")
+        logging.error(f"  ❌ Falha ao carregar faturas após {tentativa} tentativas. Pulando instalação.")
+        raise RuntimeError(f"Falha ao carregar faturas da instalação {numero} após {tentativa} tentativas")
+    logging.info("  🔄  Página de faturas carregada.")
+    page.evaluate("window.scrollTo(0, document.body.scrollHeight)") 
+    cards = page.locator(CARDS_SELECTOR)
+    # Ver mais faturas: cada clique espera a lista crescer, em vez de um sleep fixo,
+    # e a expansão para assim que a fatura mais antiga visível sai do intervalo
+    with metricas.medir("expand"):
+        for _ in range(21):
+            try:
+                mais_antiga = ref_mais_antiga(page.evaluate(JS_LER_CARDS, CARDS_SELECTOR))
+                if mais_antiga and mais_antiga < min(dt_ini, dt_fim):
+                    logging.info(f"🔽 Fatura mais antiga visível ({mais_antiga:%m/%Y}) já é anterior ao intervalo. Parando expansão.")
+                    break
+                ver_mais = page.locator('button:has-text("Ver mais faturas")')
+                if ver_mais.is_visible():
+                    antes = cards.count()
+                    ver_mais.scroll_into_view_if_needed()
+                    ver_mais.click()
+                    page.wait_for_function(JS_MAIS_CARDS, arg=[CARDS_SELECTOR, antes], timeout=10000)
+                else:
+                    logging.info("🔽 Nenhum botão 'Ver mais faturas' visível.")
                     break
+            except Exception as e:
+                logging.warning(f"⚠️ Erro ao clicar em 'Ver mais faturas': {e}")
+                break
 
-            cards = page.locator('div.tab-pane.active div.card.card-extrato.card-opcoes-segunda-via')
-            total = cards.count()
-            logging.info(f"  Encontradas {total} faturas.")
+    # Lê todos os cards de uma vez e filtra por data antes de tocar em qualquer um
+    cards_lidos = page.evaluate(JS_LER_CARDS, CARDS_SELECTOR)
+    logging.info(f"  Encontradas {len(cards_lidos)} faturas.")
 
-            for i in range(total):
-                try:
-                    card = cards.nth(i)
-                    ref_text = card.locator(':scope >> text=/Referente/').first.inner_text()
-                    ref_match = re.search(r'([A-Z]{3}/\d{4})', ref_text)
-                    if not ref_match:
-                        continue
-                    ref = ref_match.group(1).replace("/", "-")
-                    ref_dt = ref_to_date(ref)
-
-                    if not (min(dt_ini, dt_fim) <= ref_dt <= max(dt_ini, dt_fim)):
-                        logging.info(f"    ⏭️  Pulando fatura {ref} fora do intervalo.")
-                        continue
-
-                    logging.info(f"    ⬇️  Baixando fatura {ref}...")
-                    max_retentativas = 3
-                    for tentativa in range(max_retentativas):
-                        try:
-                            card.locator('p:has-text("Visualizar fatura")').click()
-                            page.wait_for_selector('text="2ª Via de Fatura"', timeout=15000)
-
-                            # Verifica se o botão "Baixar" apareceu
-                            btn_baixar = page.locator('a:has-text("Baixar")')
-                            btn_baixar.wait_for(state="visible", timeout=35000)
-                            if btn_baixar.is_visible():
-                                break  # modal carregou corretamente, pode prosseguir
-                            else:
-                                raise Exception("Modal não carregou corretamente")
-
-                        except:
-                            logging.warning(f"      ⚠️ Modal com erro, tentativa {tentativa + 1}/{max_retentativas}")
-                            try:
-                                voltar_btn = page.locator('button.btn-outline-main-2:has-text("Voltar")')
-                                voltar_btn.wait_for(state="visible", timeout=15000)
-                                if voltar_btn.is_visible():
-                                    voltar_btn.click()
-                                    page.wait_for_timeout(500)
-                            except:
-                                reload_faturas(page, numero)
-                                logging.warning("      ⚠️ Botão 'Voltar' não estava disponível.")
-
-                    if not page.locator('a:has-text("Baixar")').is_visible():
-                        logging.error("      ❌ Falha ao abrir modal corretamente após tentativas.")
-                        continue  # pula para a próxima fatura
-
-                    with page.expect_download() as dl:
-                        download_bt = page.locator('a:has-text("Baixar")')
-                        download_bt.wait_for(state="visible", timeout=15000)
-                        download_bt.click()
-                    download = dl.value
-                    nome = f"fatura_{ref}.pdf"
-                    caminho = os.path.join(pasta_instalacao, nome)
-                    download.save_as(caminho)
-                    saved_paths.append(caminho)
-                    logging.info(f"      ✔️  Salva em: {caminho}")
+    pendentes: list[tuple[int, str]] = []
+    for lido in cards_lidos:
+        i, ref = lido["index"], lido["reference"]
+        try:
+            if not ref:
+                continue
+            ref_dt = ref_to_date(ref)
 
-                    try:
-                        fechar_modal = page.locator('i.icon-edp-circle-error.fs-1')
-                        fechar_modal.wait_for(state="visible", timeout=20000)
-                        fechar_modal.click()
-                    except:
-                        logging.warning("      ⚠️ Não foi possível fechar o modal de fatura.")
+            if not (min(dt_ini, dt_fim) <= ref_dt <= max(dt_ini, dt_fim)):
+                logging.info(f"    ⏭️  Pulando fatura {ref} fora do intervalo.")
+                continue
+
+            existente = fatura_conhecida(pasta_instalacao, ref, manifesto)
+            if existente:
+                logging.info(f"    ✅ Fatura {ref} já baixada, pulando modal.")
+                _salvar(existente)
+                continue
+
+            if not lido["has_view_button"]:
+                logging.warning(f"    ⚠️ Fatura {ref} sem botão 'Visualizar fatura', pulando.")
+                continue
+
+            pendentes.append((i, ref))
+        except Exception as e:
+            logging.warning(f"      ⚠️ Erro ao ler fatura {i+1}: {e}")
+            continue
 
-                except Exception as e:
-                    logging.warning(f"      ⚠️ Erro ao baixar fatura {i+1}: {e}")
+    for i, ref in pendentes:
+        if cancelar is not None and cancelar.is_set():
+            raise ScrapingCancelado(f"Instalação {numero} cancelada")
+        try:
+            modelo = modelo_atual()
+            if modelo:
+                caminho = repetida = None
+                with metricas.medir("download"):
+                    conteudo = _baixar_direto(page.context, modelo, ref, numero)
+                    if eh_pdf(conteudo):
+                        repetida = referencia_repetida(conteudo, ref, manifesto)
+                        caminho = None if repetida else gravar_fatura(pasta_instalacao, ref, conteudo, manifesto)
+                if caminho:
+                    _salvar(caminho)
+                    logging.info(f"      ⚡ Salva via HTTP direto: {caminho}")
                     continue
+                if repetida:
+                    logging.warning(f"      ⚠️ Download direto de {ref} devolveu o PDF de {repetida}. Recusando o modelo e voltando ao modal.")
+                else:
+                    logging.warning(f"      ⚠️ Download direto de {ref} falhou. Voltando ao modal.")
+                descartar_modelo(recusar=bool(repetida))
 
-            try:
-                sair = page.locator('a.edp-btn-dark:has-text("Sair da Instalação")').first
-                sair.wait_for(state="visible", timeout=10000)
-                sair.click()
-                logging.info("  🔄 Retornando para seleção de instalação...")
-                for _ in range(100):
-                    if "/servicos" in page.url:
-                        break
-                    page.wait_for_timeout(100)
-            except Exception as e:
-                logging.warning(f"  ⚠️ Não foi possível clicar em 'Sair da Instalação': {e}")
+            caminho = _baixar_via_modal(page, cards.nth(i), ref, numero, pasta_instalacao, manifesto, metricas, politica)
+            if caminho:
+                _salvar(caminho)
+        except Exception as e:
+            logging.warning(f"      ⚠️ Erro ao baixar fatura {ref}: {e}")
+            continue
 
+    try:
+        sair = page.locator('a.edp-btn-dark:has-text("Sair da Instalação")').first
+        sair.wait_for(state="visible", timeout=10000)
+        sair.click()
+        logging.info("  🔄 Retornando para seleção de instalação...")
+        page.wait_for_url(re.compile(r"/servicos"), timeout=10000)
+    except Exception as e:
+        logging.warning(f"  ⚠️ Não foi possível clicar em 'Sair da Instalação': {e}")
 
-        ctx.close()
-        browser.close()
-        
     return saved_paths
+
+def _notificar(progresso: Progresso | None, numero: str, status: str, pdfs: list | None = None, erro: str | None = None) -> None:
+    if progresso is None:
+        return
+    try:
+        progresso(numero, status, pdfs or [], erro)
+    except Exception as e:
+        logging.warning(f"⚠️ Erro no callback de progresso da instalação {numero}: {e}")
+
+def _executar_instalacao(
+    page,
+    numero: str,
+    dt_ini: datetime,
+    dt_fim: datetime,
+    metricas: HistogramaEtapas,
+    resultados: dict[str, list[str]],
+    falhas: dict[str, str],
+    progresso: Progresso | None = None,
+    cancelar: threading.Event | None = None,
+    politica: PoliticaRetentativa | None = None,
+) -> bool:
+    """
+    Processa uma instalação registrando o resultado (ou a falha) e notificando o progresso.
+
+    Com uma `politica`, uma instalação que falha é adiada para o fim da
+    execução (até o disjuntor da política abrir) e, depois do prazo global,
+    as instalações restantes são dadas como falha sem abrir o portal.
+
+    Returns:
+        False se a execução foi cancelada e nenhuma outra instalação deve ser iniciada."""
+    if cancelar is not None and cancelar.is_set():
+        return False
+    if politica is not None and politica.esgotado():
+        falhas[numero] = "Prazo da execução esgotado"
+        _notificar(progresso, numero, "falhou", erro=falhas[numero])
+        return True
+    _notificar(progresso, numero, "executando")
+    try:
+        resultados[numero] = _processar_instalacao(page, numero, dt_ini, dt_fim, metricas, cancelar, politica, progresso)
+        falhas.pop(numero, None)
+        _notificar(progresso, numero, "concluida", resultados[numero])
+    except ScrapingCancelado:
+        logging.info(f"  🛑 Instalação {numero} cancelada.")
+        _notificar(progresso, numero, "cancelada")
+        return False
+    except Exception as e:
+        falhas[numero] = str(e)
+        if politica is not None and politica.adiar(numero):
+            logging.warning(f"  🅿️ Instalação {numero} adiada para o fim da execução: {e}")
+            _notificar(progresso, numero, "adiada", erro=str(e))
+        else:
+            logging.error(f"  ❌ Instalação {numero} falhou: {e}")
+            _notificar(progresso, numero, "falhou", erro=str(e))
+    return True
+
+def _atender_fila(
+    page,
+    fila: "queue.Queue[str]",
+    resultados: dict[str, list[str]],
+    falhas: dict[str, str],
+    dt_ini: datetime,
+    dt_fim: datetime,
+    metricas: HistogramaEtapas,
+    progresso: Progresso | None,
+    cancelar: threading.Event | None,
+    politica: PoliticaRetentativa,
+) -> None:
+    """
+    Consome a fila com `page` e, quando ela esvazia, devolve a ela as instalações adiadas.
+
+    Um erro que escape de `_executar_instalacao` (ex.: o navegador morreu)
+    registra a instalação em andamento como falha antes de ser propagado."""
+    while True:
+        try:
+            numero = fila.get_nowait()
+        except queue.Empty:
+            adiadas = politica.retomar_adiadas()
+            if not adiadas:
+                break
+            logging.info(f"🅿️ Retomando {len(adiadas)} instalações adiadas.")
+            for numero in adiadas:
+                fila.put(numero)
+            continue
+        try:
+            if not _executar_instalacao(page, numero, dt_ini, dt_fim, metricas, resultados, falhas, progresso, cancelar, politica):
+                break
+        except Exception as e:
+            falhas[numero] = str(e)
+            _notificar(progresso, numero, "falhou", erro=str(e))
+            raise
+        finally:
+            fila.task_done()
+
+def _consumir_fila(
+    fila: "queue.Queue[str]",
+    resultados: dict[str, list[str]],
+    falhas: dict[str, str],
+    mode: bool,
+    dt_ini: datetime,
+    dt_fim: datetime,
+    metricas: HistogramaEtapas,
+    progresso: Progresso | None = None,
+    cancelar: threading.Event | None = None,
+    politica: PoliticaRetentativa | None = None,
+    erros: list[str] | None = None,
+) -> None:
+    """
+    Laço de um worker do pool: abre um contexto próprio e consome instalações da fila.
+
+    Cada worker roda em sua própria thread com uma instância própria de
+    `sync_playwright` (a API síncrona não pode ser compartilhada entre threads)
+    e cria seu contexto a partir do mesmo `edp_session.json`, mantido fresco
+    por `garantir_sessao`. Se o worker falhar (ex.: o navegador não abre), o
+    erro é registrado e os demais workers seguem esvaziando a fila.
+
+    Args:
+        fila: Fila compartilhada com os números de instalação pendentes.
+        resultados: Dicionário compartilhado instalação -> caminhos salvos.
+        falhas: Dicionário compartilhado instalação -> mensagem de erro.
+        mode: Booleano indicando se o navegador deve ser headless.
+        dt_ini: Data de início do intervalo (inclusiva).
+        dt_fim: Data de fim do intervalo (inclusiva).
+        metricas: Histograma compartilhado entre os workers.
+        progresso: Callback opcional de progresso por instalação.
+        cancelar: Evento opcional que interrompe o worker.
+        politica: Política de retentativas compartilhada pela execução.
+        erros: Lista compartilhada onde o erro que encerrou o worker é anotado."""
+    politica = politica or PoliticaRetentativa()
+    try:
+        with sync_playwright() as p:
+            browser, ctx = get_logged_context(p, mode, False, metricas)
+            page = ctx.new_page()
+            try:
+                _atender_fila(page, fila, resultados, falhas, dt_ini, dt_fim, metricas, progresso, cancelar, politica)
+            finally:
+                ctx.close()
+                browser.close()
+    except Exception as e:
+        logging.error(f"❌ {threading.current_thread().name} encerrado: {e}")
+        if erros is not None:
+            erros.append(str(e))
+
+def baixar_faturas(
+    instalacoes: list[str],
+    data_inicio: str,
+    data_fim: str,
+    mode: bool = True,
+    workers: int | None = None,
+    progresso: Progresso | None = None,
+    cancelar: threading.Event | None = None,
+    resume: bool = False,
+    politica: PoliticaRetentativa | None = None,
+) -> dict:
+    """
+    Baixa faturas de várias instalações usando um pool de contextos logados.
+
+    A sessão é validada uma única vez (com login, se necessário) e gravada em
+    `edp_session.json`; em seguida, `workers` contextos criados a partir desse
+    mesmo estado consomem as instalações de uma fila compartilhada. Com um
+    único worker, tudo roda na página da própria validação, como antes.
+
+    Args:
+        instalacoes: Uma lista de strings, onde cada string é o número da instalação.
+        data_inicio: Uma string no formato "MMM-AAAA" (inclusivo).
+        data_fim: Uma string no formato "MMM-AAAA" (inclusivo).
+        mode: Booleano indicando se o navegador Playwright deve ser headless (True) ou visível (False). Padrão é True.
+        workers: Número de contextos paralelos. Padrão é `SCRAPER_WORKERS`.
+        progresso: Callback opcional `progresso(instalacao, status, pdfs, erro)`.
+        cancelar: Evento opcional; quando acionado, a instalação em andamento é
+            interrompida antes da próxima fatura e nenhuma outra é iniciada.
+        resume: Se True, retoma a execução interrompida com os mesmos parâmetros,
+            pulando as instalações já concluídas no diário (`faturas_edp/.execucoes`).
+        politica: Tentativas, backoff, prazo global e disjuntor da execução.
+            Padrão é uma nova `PoliticaRetentativa()` (configurada por `SCRAPER_TENTATIVAS`,
+            `SCRAPER_BACKOFF_*`, `SCRAPER_PRAZO` e `SCRAPER_DISJUNTOR`).
+
+    Returns:
+        Um dicionário com:
+        - 'pdfs': caminhos dos PDFs salvos, na ordem das instalações informadas.
+        - 'falhas': lista de {'instalacao', 'erro'} das instalações que falharam.
+        - 'metricas': histograma de latência por etapa (ver `HistogramaEtapas.exportar`).
+        - 'cancelado': True se a execução foi interrompida por `cancelar`.
+        - 'resumo': totais da execução (ver `DiarioExecucao.finalizar`)."""
+    dt_ini = ref_to_date(data_inicio)
+    dt_fim = ref_to_date(data_fim)
+    diario = DiarioExecucao(EXECUCOES_DIR, instalacoes, data_inicio, data_fim, resume)
+    progresso = diario.acompanhar(progresso)
+    resultados: dict[str, list[str]] = dict(diario.concluidas)
+    falhas: dict[str, str] = {}
+    metricas = HistogramaEtapas()
+    politica = politica or PoliticaRetentativa()
+    restantes = [n for n in dict.fromkeys(instalacoes) if n not in resultados]
+    workers = max(1, min(workers or SCRAPER_WORKERS, len(restantes) or 1))
+    fila: "queue.Queue[str]" = queue.Queue()
+    for numero in restantes:
+        fila.put(numero)
+
+    if restantes:
+        with sync_playwright() as p:
+            browser, ctx = get_logged_context(p, mode, False, metricas)
+            page = ctx.new_page()
+            _validar_sessao(page, ctx, metricas)
+
+            if workers == 1:
+                _atender_fila(page, fila, resultados, falhas, dt_ini, dt_fim, metricas, progresso, cancelar, politica)
+
+            ctx.close()
+            browser.close()
+
+    if workers > 1 and not (cancelar is not None and cancelar.is_set()):
+        logging.info(f"🧵 Iniciando pool com {workers} contextos para {len(restantes)} instalações.")
+        erros_workers: list[str] = []
+        threads = [
+            threading.Thread(
+                target=_consumir_fila,
+                args=(fila, resultados, falhas, mode, dt_ini, dt_fim, metricas, progresso, cancelar, politica, erros_workers),
+                name=f"scraper-worker-{n}",
+                daemon=True,
+            )
+            for n in range(workers)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # Sobrou fila sem cancelamento: todos os workers morreram antes de esvaziá-la
+        while not (cancelar is not None and cancelar.is_set()):
+            try:
+                numero = fila.get_nowait()
+            except queue.Empty:
+                break
+            falhas[numero] = f"Nenhum worker disponível: {erros_workers[-1] if erros_workers else 'erro desconhecido'}"
+            _notificar(progresso, numero, "falhou", erro=falhas[numero])
+
+    cancelado = cancelar is not None and cancelar.is_set()
+    saved_paths = [c for numero in dict.fromkeys(instalacoes) for c in resultados.get(numero, [])]
+    return {
+        "pdfs": saved_paths,
+        "falhas": [{"instalacao": n, "erro": e} for n, e in falhas.items()],
+        "metricas": metricas.exportar(),
+        "cancelado": cancelado,
+        "resumo": diario.finalizar(instalacoes, resultados, falhas, cancelado),
+    }
+
+def baixar_faturas_por_instalacao(
+    instalacoes: list[str], data_inicio: str, data_fim: str, mode: bool = True, resume: bool = False
+) -> list[str]:
+    """
+    Baixa faturas de energia para uma lista de números de instalação dentro de um período.
+
+    Utiliza Playwright para navegar no portal da EDP, selecionar cada instalação,
+    localizar as faturas dentro do intervalo de datas especificado e baixar
+    os arquivos PDF correspondentes. As instalações são distribuídas entre
+    `SCRAPER_WORKERS` contextos (veja `baixar_faturas`).
+
+    Args:
+        instalacoes: Uma lista de strings, onde cada string é o número da instalação.
+        data_inicio: Uma string no formato "MMM-AAAA" representando a data de início
+                     do intervalo de faturas a serem baixadas (inclusivo).
+        data_fim: Uma string no formato "MMM-AAAA" representando a data de fim
+                  do intervalo de faturas a serem baixadas (inclusivo).
+        mode: Booleano indicando se o navegador Playwright deve ser headless (True) ou visível (False). Padrão é True.
+        resume: Se True, retoma uma execução interrompida com os mesmos parâmetros.
+
+    Returns:
+        Uma lista de strings, onde cada string é o caminho completo para o arquivo
+        PDF da fatura baixada.
+
+    Raises: Exception: Para erros que possam ocorrer durante o processo de scraping."""
+    return baixar_faturas(instalacoes, data_inicio, data_fim, mode, resume=resume)["pdfs"]
@@ -0,0 +1,635 @@
+"""
+Versão assíncrona do scraper de faturas da EDP.
+
+Espelha `src.scraper` usando `playwright.async_api`: várias instalações são
+processadas concorrentemente dentro de um único event loop, cada uma em seu
+próprio contexto (como os workers do motor síncrono), com um semáforo
+limitando quantas ficam abertas ao mesmo tempo. Manifesto, `fsync` e diário
+rodam em `asyncio.to_thread` para não travar o event loop.
+"""
+# seger/scraper_async.py
+from playwright.async_api import async_playwright
+import asyncio
+import os
+import re
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+import logging
+
+from src.scraper import (
+    BASE_DIR,
+    CARDS_SELECTOR,
+    CONSULTA_URL,
+    ERRO_FATURAS_SELECTOR,
+    EXECUCOES_DIR,
+    JS_MAIS_CARDS,
+    JS_LER_CARDS,
+    LOGIN_EMAIL,
+    LOGIN_URL,
+    LOGIN_SENHA,
+    SESSION_PATH,
+    SCRAPER_WORKERS,
+    Progresso,
+    ScrapingCancelado,
+    _notificar,
+    ref_mais_antiga,
+    ref_to_date,
+    referencias_no_intervalo,
+)
+from src.utils.manifesto import carregar_manifesto, fatura_conhecida, caminho_temporario, confirmar_download, gravar_fatura
+from src.utils.bloqueio_recursos import CONSENTIMENTO_BLOQUEADO, instalar_bloqueio_async
+from src.utils.diario import DiarioExecucao
+from src.utils.metricas import HistogramaEtapas
+from src.utils.retentativas import PoliticaRetentativa
+from src.utils.sessao import carregar_estado, gravar_estado, registrar_validacao, sessao_fresca, trava_sessao, validada_apos
+from src.utils.download_direto import (
+    DOWNLOAD_DIRETO, DOWNLOAD_DIRETO_CONCORRENCIA, aprender_modelo, descartar_modelo, eh_pdf,
+    escolher_requisicao_pdf, guardar_modelo, modelo_atual, montar_requisicao, referencia_repetida,
+)
+
+async def reload_faturas_async(page, numero, politica: PoliticaRetentativa | None = None) -> None:
+    """
+    Versão assíncrona de `src.scraper.reload_faturas`.
+
+    Args:
+        page: O objeto Page (async) do Playwright representando a página atual.
+        numero: O número da instalação a ser recarregada.
+        politica: Política de retentativas da execução.
+
+    Raises:
+        RuntimeError: Se a lista de faturas continuar com erro após as tentativas."""
+    politica = politica or PoliticaRetentativa()
+    async for _ in politica.tentativas_async():
+        await page.goto(CONSULTA_URL, wait_until="load")
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        await page.fill('input[name="Instalacao"]', numero)
+        await page.click('button:has-text("Avançar")')
+        link_click = page.locator(f'a.instalacao:has-text("{numero}")')
+        await link_click.wait_for(state="visible", timeout=20000)
+        await link_click.click()
+        if await _aguardar_faturas_async(page) != "erro":
+            return
+        logging.warning("  ⚠️ Erro ao carregar faturas. Tentando novamente...")
+        await page.go_back(wait_until="load")
+    raise RuntimeError(f"Falha ao recarregar as faturas da instalação {numero}")
+
+async def _aguardar_faturas_async(page, timeout: int = 15000) -> str:
+    """Versão assíncrona de `src.scraper._aguardar_faturas`."""
+    erro = page.locator(ERRO_FATURAS_SELECTOR)
+    try:
+        await page.locator(CARDS_SELECTOR).or_(erro).first.wait_for(state="visible", timeout=timeout)
+    except Exception:
+        return "vazio"
+    return "erro" if await erro.is_visible() else "ok"
+
+async def get_logged_context_async(p, mode=True, force_login=False, metricas: HistogramaEtapas | None = None):
+    """
+    Versão assíncrona de `src.scraper.get_logged_context`.
+
+    Args:
+        p: O objeto retornado por `async_playwright()`.
+        mode: Booleano indicando se o navegador deve ser headless (True) ou visível (False). Padrão é True.
+        force_login: Booleano indicando se um novo login deve ser forçado. Padrão é False.
+        metricas: Histograma opcional onde a duração do login é registrada.
+
+    Returns: Uma tupla contendo o objeto Browser e o objeto Context do Playwright."""
+    browser = await p.chromium.launch(headless=mode)
+    estado = await garantir_sessao_async(browser, force_login, metricas)
+    ctx = await browser.new_context(accept_downloads=True, storage_state=estado)
+    await instalar_bloqueio_async(ctx)
+    return browser, ctx
+
+async def _novo_contexto_async(browser):
+    """Contexto de uma instalação, a partir da sessão salva mais recente (como cada worker de `src.scraper`)."""
+    estado = await asyncio.to_thread(carregar_estado, SESSION_PATH)
+    ctx = await browser.new_context(accept_downloads=True, storage_state=estado) if estado else await browser.new_context(accept_downloads=True)
+    await instalar_bloqueio_async(ctx)
+    return ctx
+
+@asynccontextmanager
+async def _trava_sessao_async():
+    """`src.utils.sessao.trava_sessao` adquirida fora do event loop, sem bloqueá-lo."""
+    trava = trava_sessao(SESSION_PATH)
+    await asyncio.to_thread(trava.adquirir)
+    try:
+        yield trava
+    finally:
+        trava.liberar()
+
+async def garantir_sessao_async(browser, force_login: bool = False, metricas: HistogramaEtapas | None = None) -> dict:
+    """Versão assíncrona de `src.scraper.garantir_sessao`."""
+    if not force_login and sessao_fresca(SESSION_PATH):
+        estado = await asyncio.to_thread(carregar_estado, SESSION_PATH)
+        if estado:
+            logging.info("♻️ Sessão encontrada. Utilizando sessão salva.")
+            return estado
+
+    async with _trava_sessao_async():
+        estado = await asyncio.to_thread(carregar_estado, SESSION_PATH)
+        if not force_login and estado and sessao_fresca(SESSION_PATH):
+            logging.info("♻️ Sessão renovada por outro worker. Utilizando sessão salva.")
+            return estado
+        return await _renovar_sessao_async(browser, None if force_login else estado, metricas or HistogramaEtapas())
+
+async def _renovar_sessao_async(browser, estado: dict | None, metricas: HistogramaEtapas) -> dict:
+    """Versão assíncrona de `src.scraper._renovar_sessao`."""
+    ctx = await browser.new_context(storage_state=estado) if estado else await browser.new_context()
+    await instalar_bloqueio_async(ctx)
+    try:
+        page = await ctx.new_page()
+        if estado:
+            await page.goto(CONSULTA_URL, wait_until="load")
+        if "/servicos" in page.url:
+            logging.info("🔄 Sessão salva ainda válida. Prazo renovado.")
+        else:
+            logging.info("🔁 Criando nova sessão com login.")
+            with metricas.medir("login"):
+                if not await realizar_login_async(page, LOGIN_EMAIL, LOGIN_SENHA):
+                    raise RuntimeError("Falha ao realizar login no portal da EDP")
+        estado = await ctx.storage_state()
+        await asyncio.to_thread(gravar_estado, SESSION_PATH, estado)  # grava com fsync
+        logging.info("💾 Sessão salva em edp_session.json.")
+        return estado
+    finally:
+        await ctx.close()
+
+async def _atualizar_contexto_async(ctx, metricas: HistogramaEtapas, expirada_desde: float | None = None) -> None:
+    """Versão assíncrona de `src.scraper._atualizar_contexto`."""
+    if expirada_desde is None:
+        if sessao_fresca(SESSION_PATH):
+            return
+        estado = await garantir_sessao_async(ctx.browser, False, metricas)
+    else:
+        async with _trava_sessao_async():
+            estado = await asyncio.to_thread(carregar_estado, SESSION_PATH)
+            if estado and validada_apos(SESSION_PATH, expirada_desde):
+                logging.info("♻️ Sessão já renovada por outro worker. Reaproveitando.")
+            else:
+                estado = await _renovar_sessao_async(ctx.browser, None, metricas)
+    await ctx.add_cookies(estado.get("cookies", []))
+
+async def realizar_login_async(page, email: str, senha: str) -> bool:
+    """
+    Versão assíncrona de `src.scraper.realizar_login`.
+
+    Args:
+        page: O objeto Page (async) do Playwright representando a página de login.
+        email: O e-mail para login.
+        senha: A senha para login.
+
+    Returns: True se o login for bem-sucedido, False caso contrário."""
+    logging.info("🔐 Navegando para página de login...")
+    await page.goto(LOGIN_URL, wait_until="load")
+    logging.info("✅ Página de login carregada.")
+
+    try:
+        if CONSENTIMENTO_BLOQUEADO:
+            logging.info("🍪 Banner de cookies bloqueado (SCRAPER_BLOQUEIO=bloquear).")
+        else:
+            await page.locator("button#onetrust-accept-btn-handler").click(timeout=3000)
+            await page.locator("#onetrust-banner-sdk").wait_for(state="hidden", timeout=3000)
+            logging.info("🍪 Cookies aceitos.")
+    except:
+        try:
+            await page.evaluate("document.getElementById('onetrust-consent-sdk')?.remove()")
+            logging.info("🧹 Overlay de cookies removido via JS.")
+        except:
+            logging.warning("⚠️ Não foi possível lidar com cookies. Continuando...")
+
+    try:
+        await page.locator('label[for="option-1"]').click(timeout=5000)
+        logging.info("🧑‍💼 Opção Pessoa Física selecionada.")
+    except Exception as e:
+        logging.error(f"❌ Erro ao selecionar Pessoa Física: {e}")
+        return False
+    email_input = page.locator('input#Email')
+    senha_input = page.locator('input[type="password"]')
+    try:
+        await email_input.click(timeout=5000)
+        await email_input.fill(email)
+        await senha_input.click(timeout=5000)
+        await senha_input.fill(senha)
+        await page.keyboard.press("Tab")
+        logging.info("✉️ E-mail e 🔒 senha preenchidos.")
+
+        btn_acessar = page.locator("button#acessar:enabled")
+        await btn_acessar.wait_for(state="visible", timeout=7000)
+        await btn_acessar.click()
+        logging.info("🚪 Login enviado, aguardando redirecionamento...")
+
+        await page.wait_for_url(re.compile(r"/servicos"), timeout=15000)
+        logging.info("✅ Login realizado com sucesso!")
+        return True
+
+    except Exception as e:
+        logging.error(f"❌ Erro durante login: {e}")
+
+    return False
+
+async def _validar_sessao_async(page, ctx, metricas: HistogramaEtapas) -> None:
+    """Versão assíncrona de `src.scraper._validar_sessao`."""
+    await _atualizar_contexto_async(ctx, metricas)
+    inicio = time.time()
+    await page.goto(CONSULTA_URL, wait_until="load")
+    if "/servicos" not in page.url:
+        logging.info("🔒 Sessão expirada. Renovando sessão.")
+        await _atualizar_contexto_async(ctx, metricas, expirada_desde=inicio)
+        await page.goto(CONSULTA_URL, wait_until="load")
+    else:
+        await asyncio.to_thread(registrar_validacao, SESSION_PATH)
+
+    sair_instalacao = page.locator('a.edp-btn-dark:has-text("Sair da Instalação")')
+    if await sair_instalacao.is_visible(timeout=5000):
+        await sair_instalacao.click()
+        logging.info("↩️ Sessão ativa: saída da instalação realizada.")
+    else:
+        logging.info("✅ Sessão ativa: nenhuma instalação estava aberta.")
+
+async def _baixar_direto_async(ctx, modelo: dict, ref: str, numero: str) -> bytes | None:
+    """Versão assíncrona de `src.scraper._baixar_direto`."""
+    requisicao = montar_requisicao(modelo, ref, numero)
+    if not requisicao:
+        return None
+    metodo, url, corpo, cabecalhos = requisicao
+    try:
+        resp = await ctx.request.fetch(url, method=metodo, data=corpo, headers=cabecalhos, timeout=30000)
+        return await resp.body() if resp.ok else None
+    except Exception as e:
+        logging.warning(f"      ⚠️ [{numero}] Erro no download direto de {ref}: {e}")
+        return None
+
+async def _baixar_via_modal_async(
+    page,
+    card,
+    ref: str,
+    numero: str,
+    pasta_instalacao: str,
+    manifesto: dict,
+    metricas: HistogramaEtapas,
+    politica: PoliticaRetentativa | None = None,
+) -> str | None:
+    """Versão assíncrona de `src.scraper._baixar_via_modal`."""
+    logging.info(f"    ⬇️  [{numero}] Baixando fatura {ref}...")
+    capturar = DOWNLOAD_DIRETO and modelo_atual() is None
+    respostas: list = []
+    ouvir = respostas.append
+    if capturar:
+        page.on("response", ouvir)
+    try:
+        max_retentativas = 3
+        with metricas.medir("modal"):
+            for tentativa in range(max_retentativas):
+                try:
+                    await card.locator('p:has-text("Visualizar fatura")').click()
+                    await page.wait_for_selector('text="2ª Via de Fatura"', timeout=15000)
+                    await page.locator('a:has-text("Baixar")').wait_for(state="visible", timeout=35000)
+                    break
+                except:
+                    logging.warning(f"      ⚠️ [{numero}] Modal com erro, tentativa {tentativa + 1}/{max_retentativas}")
+                    try:
+                        voltar_btn = page.locator('button.btn-outline-main-2:has-text("Voltar")')
+                        await voltar_btn.wait_for(state="visible", timeout=15000)
+                        await voltar_btn.click()
+                        await page.locator('text="2ª Via de Fatura"').wait_for(state="hidden", timeout=5000)
+                    except:
+                        await reload_faturas_async(page, numero, politica)
+
+        if not await page.locator('a:has-text("Baixar")').is_visible():
+            logging.error(f"      ❌ [{numero}] Falha ao abrir modal corretamente após tentativas.")
+            return None
+
+        with metricas.medir("download"):
+            async with page.expect_download() as dl:
+                download_bt = page.locator('a:has-text("Baixar")')
+                await download_bt.wait_for(state="visible", timeout=15000)
+                await download_bt.click()
+            download = await dl.value
+            tmp = caminho_temporario(pasta_instalacao, ref)
+            await download.save_as(tmp)
+            caminho = await asyncio.to_thread(confirmar_download, pasta_instalacao, ref, tmp, manifesto)
+        logging.info(f"      ✔️  Salva em: {caminho}")
+    finally:
+        if capturar:
+            page.remove_listener("response", ouvir)
+
+    if capturar:
+        requisicao = escolher_requisicao_pdf(download.url, respostas)
+        modelo = aprender_modelo(*requisicao, ref, numero) if requisicao else None
+        if modelo:
+            guardar_modelo(modelo)
+            logging.info(f"      ⚡ [{numero}] Modelo de download direto aprendido: {modelo['metodo']} {modelo['url']}")
+
+    try:
+        fechar_modal = page.locator('i.icon-edp-circle-error.fs-1')
+        await fechar_modal.wait_for(state="visible", timeout=20000)
+        await fechar_modal.click()
+    except:
+        logging.warning(f"      ⚠️ [{numero}] Não foi possível fechar o modal de fatura.")
+
+    return caminho
+
+async def _processar_instalacao_async(
+    page,
+    numero: str,
+    dt_ini: datetime,
+    dt_fim: datetime,
+    metricas: HistogramaEtapas,
+    cancelar: threading.Event | None = None,
+    politica: PoliticaRetentativa | None = None,
+    progresso: Progresso | None = None,
+) -> list[str]:
+    """
+    Versão assíncrona de `src.scraper._processar_instalacao`.
+
+    Raises:
+        RuntimeError: Se a lista de faturas não carregar após as tentativas.
+        ScrapingCancelado: Se `cancelar` for acionado durante os downloads."""
+    politica = politica or PoliticaRetentativa()
+    logging.info(f"Processando instalação: {numero}")
+    pasta_instalacao = os.path.join(BASE_DIR, numero)
+    await asyncio.to_thread(os.makedirs, pasta_instalacao, exist_ok=True)
+    saved_paths: list[str] = []
+    manifesto = await asyncio.to_thread(carregar_manifesto, pasta_instalacao)
+
+    async def _salvar(caminho: str) -> None:
+        saved_paths.append(caminho)
+        await asyncio.to_thread(_notificar, progresso, numero, "pdf", [caminho])
+
+    refs_intervalo = referencias_no_intervalo(dt_ini, dt_fim)
+    existentes = await asyncio.to_thread(lambda: [fatura_conhecida(pasta_instalacao, ref, manifesto) for ref in refs_intervalo])
+    if refs_intervalo and all(existentes):
+        logging.info(f"  ✅ [{numero}] Todas as faturas do intervalo já baixadas. Pulando navegação.")
+        return existentes
+
+    await _atualizar_contexto_async(page.context, metricas)
+
+    tentativa = 0
+    sucesso = False
+    async for tentativa in politica.tentativas_async(cancelar):
+        logging.info(f"  🔁 [{numero}] Tentativa {tentativa} para carregar faturas...")
+        with metricas.medir("consulta"):
+            inicio = time.time()
+            await page.goto(CONSULTA_URL, wait_until="load")
+            if "/servicos" not in page.url:
+                logging.warning(f"  🔒 [{numero}] Sessão expirada durante a consulta. Renovando sessão.")
+                await _atualizar_contexto_async(page.context, metricas, expirada_desde=inicio)
+                continue
+            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+            await page.fill('input[name="Instalacao"]', numero)
+            btn_click = page.locator('button:has-text("Avançar")')
+            await btn_click.wait_for(state="visible", timeout=20000)
+            await btn_click.click()
+            link_click = page.locator(f'a.instalacao:has-text("{numero}")')
+            await link_click.wait_for(state="visible", timeout=20000)
+        with metricas.medir("instalacao"):
+            await link_click.click()
+            estado = await _aguardar_faturas_async(page)
+        if estado == "erro":
+            logging.warning(f"  ⚠️ [{numero}] Erro ao carregar faturas. Tentando novamente...")
+            await page.go_back(wait_until="load")
+            continue
+        sucesso = True
+        break
+
+    if not sucesso:
+        if cancelar is not None and cancelar.is_set():
+            raise ScrapingCancelado(f"Instalação {numero} cancelada")
+        raise RuntimeError(f"Falha ao carregar faturas da instalação {numero} após {tentativa} tentativas")
+    logging.info(f"  🔄  [{numero}] Página de faturas carregada.")
+    await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+    cards = page.locator(CARDS_SELECTOR)
+    with metricas.medir("expand"):
+        for _ in range(21):
+            try:
+                mais_antiga = ref_mais_antiga(await page.evaluate(JS_LER_CARDS, CARDS_SELECTOR))
+                if mais_antiga and mais_antiga < min(dt_ini, dt_fim):
+                    logging.info(f"🔽 [{numero}] Fatura mais antiga visível ({mais_antiga:%m/%Y}) já é anterior ao intervalo. Parando expansão.")
+                    break
+                ver_mais = page.locator('button:has-text("Ver mais faturas")')
+                if await ver_mais.is_visible():
+                    antes = await cards.count()
+                    await ver_mais.scroll_into_view_if_needed()
+                    await ver_mais.click()
+                    await page.wait_for_function(JS_MAIS_CARDS, arg=[CARDS_SELECTOR, antes], timeout=10000)
+                else:
+                    break
+            except Exception as e:
+                logging.warning(f"⚠️ [{numero}] Erro ao clicar em 'Ver mais faturas': {e}")
+                break
+
+    cards_lidos = await page.evaluate(JS_LER_CARDS, CARDS_SELECTOR)
+    logging.info(f"  [{numero}] Encontradas {len(cards_lidos)} faturas.")
+
+    pendentes: list[tuple[int, str]] = []
+    for lido in cards_lidos:
+        i, ref = lido["index"], lido["reference"]
+        try:
+            if not ref:
+                continue
+            ref_dt = ref_to_date(ref)
+
+            if not (min(dt_ini, dt_fim) <= ref_dt <= max(dt_ini, dt_fim)):
+                logging.info(f"    ⏭️  [{numero}] Pulando fatura {ref} fora do intervalo.")
+                continue
+
+            existente = await asyncio.to_thread(fatura_conhecida, pasta_instalacao, ref, manifesto)
+            if existente:
+                logging.info(f"    ✅ [{numero}] Fatura {ref} já baixada, pulando modal.")
+                await _salvar(existente)
+                continue
+
+            if not lido["has_view_button"]:
+                logging.warning(f"    ⚠️ [{numero}] Fatura {ref} sem botão 'Visualizar fatura', pulando.")
+                continue
+
+            pendentes.append((i, ref))
+        except Exception as e:
+            logging.warning(f"      ⚠️ [{numero}] Erro ao ler fatura {i+1}: {e}")
+            continue
+
+    def _checar_cancelamento() -> None:
+        if cancelar is not None and cancelar.is_set():
+            raise ScrapingCancelado(f"Instalação {numero} cancelada")
+
+    async def _via_modal(i: int, ref: str) -> None:
+        _checar_cancelamento()
+        try:
+            caminho = await _baixar_via_modal_async(page, cards.nth(i), ref, numero, pasta_instalacao, manifesto, metricas, politica)
+            if caminho:
+                await _salvar(caminho)
+        except Exception as e:
+            logging.warning(f"      ⚠️ [{numero}] Erro ao baixar fatura {ref}: {e}")
+
+    # Sem modelo de download direto, a primeira fatura vai pelo modal e o ensina
+    if pendentes and modelo_atual() is None:
+        await _via_modal(*pendentes.pop(0))
+
+    modelo = modelo_atual()
+    if pendentes and modelo:
+        _checar_cancelamento()
+        semaforo = asyncio.Semaphore(max(1, DOWNLOAD_DIRETO_CONCORRENCIA))
+
+        async def _direto(ref: str) -> bytes | None:
+            async with semaforo:
+                with metricas.medir("download"):
+                    return await _baixar_direto_async(page.context, modelo, ref, numero)
+
+        conteudos = await asyncio.gather(*(_direto(ref) for _, ref in pendentes))
+        falhas, repetidas = [], 0
+        for (i, ref), conteudo in zip(pendentes, conteudos):
+            # gravadas uma a uma: cada PDF aceito entra no manifesto antes de conferir o seguinte
+            repetida = referencia_repetida(conteudo, ref, manifesto) if eh_pdf(conteudo) else None
+            if eh_pdf(conteudo) and not repetida:
+                caminho = await asyncio.to_thread(gravar_fatura, pasta_instalacao, ref, conteudo, manifesto)
+                await _salvar(caminho)
+                logging.info(f"      ⚡ [{numero}] Salva via HTTP direto: {caminho}")
+            else:
+                repetidas += repetida is not None
+                falhas.append((i, ref))
+        if repetidas:
+            logging.warning(f"      ⚠️ [{numero}] {repetidas} downloads diretos devolveram o PDF de outra referência. Recusando o modelo e voltando ao modal.")
+            descartar_modelo(recusar=True)
+        elif falhas:
+            logging.warning(f"      ⚠️ [{numero}] {len(falhas)} downloads diretos falharam. Voltando ao modal.")
+            descartar_modelo()
+        pendentes = falhas
+
+    for i, ref in pendentes:
+        await _via_modal(i, ref)
+
+    try:
+        sair = page.locator('a.edp-btn-dark:has-text("Sair da Instalação")').first
+        await sair.wait_for(state="visible", timeout=10000)
+        await sair.click()
+        logging.info(f"  🔄 [{numero}] Retornando para seleção de instalação...")
+        await page.wait_for_url(re.compile(r"/servicos"), timeout=10000)
+    except Exception as e:
+        logging.warning(f"  ⚠️ [{numero}] Não foi possível clicar em 'Sair da Instalação': {e}")
+
+    return saved_paths
+
+async def baixar_faturas_async(
+    instalacoes: list[str],
+    data_inicio: str,
+    data_fim: str,
+    mode: bool = True,
+    concorrencia: int | None = None,
+    progresso: Progresso | None = None,
+    cancelar: threading.Event | None = None,
+    resume: bool = False,
+    politica: PoliticaRetentativa | None = None,
+) -> dict:
+    """
+    Baixa faturas de várias instalações concorrentemente em um único event loop.
+
+    Todas as instalações compartilham um mesmo navegador; cada uma roda em um
+    contexto próprio, criado a partir da sessão salva, para que a instalação
+    selecionada no portal por uma não troque a de outra. Um `asyncio.Semaphore`
+    limita quantas instalações são processadas ao mesmo tempo.
+
+    Args:
+        instalacoes: Uma lista de strings, onde cada string é o número da instalação.
+        data_inicio: Uma string no formato "MMM-AAAA" (inclusivo).
+        data_fim: Uma string no formato "MMM-AAAA" (inclusivo).
+        mode: Booleano indicando se o navegador deve ser headless. Padrão é True.
+        concorrencia: Máximo de instalações simultâneas. Padrão é `SCRAPER_WORKERS`.
+        progresso: Callback opcional `progresso(instalacao, status, pdfs, erro)`.
+        cancelar: Evento opcional que interrompe a execução.
+        resume: Se True, pula as instalações já concluídas no diário da execução.
+        politica: Tentativas, backoff, prazo global e disjuntor da execução.
+
+    Returns:
+        Um dicionário com 'pdfs', 'falhas', 'metricas', 'cancelado' e 'resumo', no mesmo formato de `src.scraper.baixar_faturas`."""
+    dt_ini = ref_to_date(data_inicio)
+    dt_fim = ref_to_date(data_fim)
+    semaforo = asyncio.Semaphore(max(1, concorrencia or SCRAPER_WORKERS))
+    diario = DiarioExecucao(EXECUCOES_DIR, instalacoes, data_inicio, data_fim, resume)
+    progresso = diario.acompanhar(progresso)
+    resultados: dict[str, list[str]] = dict(diario.concluidas)
+    falhas: dict[str, str] = {}
+    metricas = HistogramaEtapas()
+    politica = politica or PoliticaRetentativa()
+    restantes = [n for n in dict.fromkeys(instalacoes) if n not in resultados]
+
+    if not restantes:
+        return _montar_resultado(instalacoes, resultados, falhas, metricas, cancelar, diario)
+
+    async with async_playwright() as p:
+        browser, ctx = await get_logged_context_async(p, mode, False, metricas)
+        page = await ctx.new_page()
+        await _validar_sessao_async(page, ctx, metricas)
+        await page.close()
+
+        async def _notificar_async(*args, **kwargs) -> None:
+            # o diário grava com fsync a cada evento
+            await asyncio.to_thread(_notificar, progresso, *args, **kwargs)
+
+        async def _tarefa(numero: str) -> None:
+            async with semaforo:
+                if cancelar is not None and cancelar.is_set():
+                    return
+                if politica.esgotado():
+                    falhas[numero] = "Prazo da execução esgotado"
+                    await _notificar_async(numero, "falhou", erro=falhas[numero])
+                    return
+                await _notificar_async(numero, "executando")
+                contexto = None
+                try:
+                    # criado dentro do try: uma falha aqui fica nesta instalação, sem derrubar o gather
+                    contexto = await _novo_contexto_async(browser)
+                    pagina = await contexto.new_page()
+                    resultados[numero] = await _processar_instalacao_async(pagina, numero, dt_ini, dt_fim, metricas, cancelar, politica, progresso)
+                    falhas.pop(numero, None)
+                    await _notificar_async(numero, "concluida", resultados[numero])
+                except ScrapingCancelado:
+                    logging.info(f"  🛑 Instalação {numero} cancelada.")
+                    await _notificar_async(numero, "cancelada")
+                except Exception as e:
+                    falhas[numero] = str(e)
+                    if politica.adiar(numero):
+                        logging.warning(f"  🅿️ Instalação {numero} adiada para o fim da execução: {e}")
+                        await _notificar_async(numero, "adiada", erro=str(e))
+                    else:
+                        logging.error(f"  ❌ Instalação {numero} falhou: {e}")
+                        await _notificar_async(numero, "falhou", erro=str(e))
+                finally:
+                    if contexto is not None:
+                        try:
+                            await contexto.close()
+                        except Exception as e:
+                            logging.warning(f"  ⚠️ [{numero}] Erro ao fechar o contexto da instalação: {e}")
+
+        # Instalações com falha voltam em rodadas seguintes até o disjuntor da política abrir
+        rodada = restantes
+        while rodada:
+            await asyncio.gather(*(_tarefa(n) for n in rodada))
+            rodada = politica.retomar_adiadas()
+            if rodada:
+                logging.info(f"🅿️ Retomando {len(rodada)} instalações adiadas.")
+
+        await ctx.close()
+        await browser.close()
+
+    return _montar_resultado(instalacoes, resultados, falhas, metricas, cancelar, diario)
+
+def _montar_resultado(instalacoes, resultados, falhas, metricas, cancelar, diario) -> dict:
+    cancelado = cancelar is not None and cancelar.is_set()
+    return {
+        "pdfs": [c for numero in dict.fromkeys(instalacoes) for c in resultados.get(numero, [])],
+        "falhas": [{"instalacao": n, "erro": e} for n, e in falhas.items()],
+        "metricas": metricas.exportar(),
+        "cancelado": cancelado,
+        "resumo": diario.finalizar(instalacoes, resultados, falhas, cancelado),
+    }
+
+async def baixar_faturas_por_instalacao_async(
+    instalacoes: list[str], data_inicio: str, data_fim: str, mode: bool = True, resume: bool = False
+) -> list[str]:
+    """
+    Versão assíncrona de `src.scraper.baixar_faturas_por_instalacao`.
+
+    Returns:
+        Uma lista com o caminho completo de cada PDF de fatura baixado."""
+    return (await baixar_faturas_async(instalacoes, data_inicio, data_fim, mode, resume=resume))["pdfs"]
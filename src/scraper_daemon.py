@@ -0,0 +1,259 @@
+"""
+Serviço de scraping com navegador aquecido.
+
+Em vez de cada POST em `/api/seger/faturas` iniciar o Playwright, abrir o
+Chromium, carregar a sessão e validá-la, uma thread de longa duração mantém
+um navegador e um contexto logado prontos e consome jobs de uma fila.
+
+O navegador é reciclado (fechado e reaberto com a sessão salva) depois de
+`SCRAPER_DAEMON_RECICLAR_APOS` instalações, quando a memória dos processos
+do próprio navegador passa de `SCRAPER_DAEMON_MEMORIA_MB` ou após um erro que não
+pertença a uma instalação específica.
+"""
+# seger/scraper_daemon.py
+from playwright.sync_api import sync_playwright
+from concurrent.futures import Future
+import atexit
+import logging
+import os
+import queue
+import threading
+
+from src.scraper import (
+    Progresso,
+    get_logged_context,
+    ref_to_date,
+    _atender_fila,
+    _validar_sessao,
+)
+from src.utils.metricas import HistogramaEtapas
+from src.utils.retentativas import PoliticaRetentativa
+
+SCRAPER_DAEMON = os.getenv("SCRAPER_DAEMON", "0") == "1"
+"""Quando "1", o endpoint /faturas usa o navegador aquecido por padrão."""
+
+SCRAPER_DAEMON_RECICLAR_APOS = int(os.getenv("SCRAPER_DAEMON_RECICLAR_APOS", "50"))
+"""Quantidade de instalações processadas antes de reciclar o navegador."""
+
+SCRAPER_DAEMON_MEMORIA_MB = int(os.getenv("SCRAPER_DAEMON_MEMORIA_MB", "1500"))
+"""Memória (RSS, em MB) do driver do Playwright do serviço e do Chromium dele a partir da qual o navegador é reciclado."""
+
+def _pid_driver(playwright) -> int | None:
+    """
+    PID do driver (node) da instância do Playwright informada.
+
+    Usa atributos internos do Playwright; se eles mudarem, devolve None e a
+    reciclagem por memória fica desligada.
+    """
+    try:
+        return playwright._impl_obj._connection._transport._proc.pid
+    except AttributeError:
+        return None
+
+def _memoria_navegador_mb(raiz: int | None) -> float | None:
+    """
+    Soma o RSS do driver do Playwright do serviço e dos seus descendentes
+    (os processos do Chromium que ele abriu), lendo `/proc`.
+
+    Só a árvore do driver entra na conta: o pool do parser e os navegadores
+    de outras execuções (síncronas, assíncronas, jobs) também são filhos do
+    processo do Flask e não podem disparar a reciclagem deste navegador.
+
+    Args:
+        raiz: PID do driver, de `_pid_driver`.
+
+    Returns:
+        A memória em MB, ou None se o PID ou `/proc` não estiverem disponíveis.
+    """
+    if raiz is None:
+        return None
+    try:
+        pais: dict[int, int] = {}
+        for nome in os.listdir("/proc"):
+            if not nome.isdigit():
+                continue
+            try:
+                with open(f"/proc/{nome}/stat") as f:
+                    # O nome do processo pode conter espaços; o PPID vem logo após o ")"
+                    pais[int(nome)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+    except OSError:
+        return None
+
+    if raiz not in pais:
+        return None
+    descendentes, fronteira = {raiz}, {raiz}
+    while fronteira:
+        fronteira = {pid for pid, pai in pais.items() if pai in fronteira} - descendentes
+        descendentes |= fronteira
+
+    total_kb = 0
+    for pid in descendentes:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for linha in f:
+                    if linha.startswith("VmRSS:"):
+                        total_kb += int(linha.split()[1])
+                        break
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024
+
+class ServicoScraper:
+    """
+    Thread dona de um `sync_playwright` com navegador e contexto logado sempre abertos.
+
+    A API síncrona do Playwright não pode ser usada fora da thread que a
+    iniciou, por isso todo acesso ao navegador acontece em `_laco` e os
+    chamadores apenas enfileiram jobs e esperam o `Future` correspondente.
+    """
+
+    def __init__(self, mode: bool = True, reciclar_apos: int = SCRAPER_DAEMON_RECICLAR_APOS, memoria_mb: int = SCRAPER_DAEMON_MEMORIA_MB):
+        self.mode = mode
+        self.reciclar_apos = reciclar_apos
+        self.memoria_mb = memoria_mb
+        self._fila: "queue.Queue[tuple | None]" = queue.Queue()
+        self._thread = threading.Thread(target=self._laco, name="scraper-daemon", daemon=True)
+        self._thread.start()
+
+    def executar(
+        self,
+        instalacoes: list[str],
+        data_inicio: str,
+        data_fim: str,
+        timeout: float | None = None,
+        progresso: Progresso | None = None,
+    ) -> dict:
+        """
+        Enfileira um job e espera o resultado.
+
+        Args:
+            instalacoes: Uma lista de strings, onde cada string é o número da instalação.
+            data_inicio: Uma string no formato "MMM-AAAA" (inclusivo).
+            data_fim: Uma string no formato "MMM-AAAA" (inclusivo).
+            timeout: Tempo máximo de espera em segundos (None espera indefinidamente).
+            progresso: Callback opcional `progresso(instalacao, status, pdfs, erro)`,
+                chamado na thread do serviço a cada instalação e a cada PDF salvo
+                (ex.: `PipelineExtracao.progresso`, que começa a extrair cada PDF na hora).
+
+        Returns:
+            Um dicionário com 'pdfs', 'falhas' e 'metricas', no mesmo formato de `src.scraper.baixar_faturas`.
+        """
+        return self.enviar(instalacoes, data_inicio, data_fim, progresso).result(timeout)
+
+    def enviar(self, instalacoes: list[str], data_inicio: str, data_fim: str, progresso: Progresso | None = None) -> Future:
+        """Enfileira um job e devolve o `Future` com o resultado."""
+        futuro: Future = Future()
+        self._fila.put((list(instalacoes), data_inicio, data_fim, futuro, progresso))
+        return futuro
+
+    def parar(self) -> None:
+        """Pede o encerramento da thread e espera o navegador ser fechado."""
+        self._fila.put(None)
+        self._thread.join(timeout=30)
+
+    def ativo(self) -> bool:
+        return self._thread.is_alive()
+
+    def _laco(self) -> None:
+        try:
+            self._atender()
+        except Exception as e:
+            logging.error(f"❌ Serviço de scraping interrompido: {e}")
+            # Nenhum job pode ficar esperando por uma thread que não existe mais
+            while True:
+                try:
+                    job = self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None and job[3].set_running_or_notify_cancel():
+                    job[3].set_exception(e)
+
+    def _atender(self) -> None:
+        with sync_playwright() as p:
+            driver = _pid_driver(p)
+            browser = ctx = page = None
+            processadas = 0
+            while True:
+                job = self._fila.get()
+                if job is None:
+                    break
+                instalacoes, data_inicio, data_fim, futuro, progresso = job
+                if not futuro.set_running_or_notify_cancel():
+                    continue
+
+                metricas = HistogramaEtapas()
+                try:
+                    if browser is None:
+                        logging.info("🔥 Aquecendo navegador do serviço de scraping.")
+                        browser, ctx = get_logged_context(p, self.mode, False, metricas)
+                        page = ctx.new_page()
+                        processadas = 0
+
+                    resultado = self._processar_job(page, ctx, instalacoes, data_inicio, data_fim, metricas, progresso)
+                    processadas += len(instalacoes)
+                    futuro.set_result(resultado)
+                except Exception as e:
+                    logging.error(f"❌ Serviço de scraping: job falhou, reciclando navegador: {e}")
+                    futuro.set_exception(e)
+                    processadas = self.reciclar_apos
+
+                memoria = _memoria_navegador_mb(driver)
+                if processadas >= self.reciclar_apos or (memoria is not None and memoria >= self.memoria_mb):
+                    uso = f"{memoria:.0f} MB" if memoria is not None else "memória desconhecida"
+                    logging.info(f"♻️ Reciclando navegador após {processadas} instalações ({uso}).")
+                    self._fechar(ctx, browser)
+                    browser = ctx = page = None
+
+            self._fechar(ctx, browser)
+        logging.info("🛑 Serviço de scraping encerrado.")
+
+    def _processar_job(
+        self,
+        page,
+        ctx,
+        instalacoes: list[str],
+        data_inicio: str,
+        data_fim: str,
+        metricas: HistogramaEtapas,
+        progresso: Progresso | None = None,
+    ) -> dict:
+        dt_ini = ref_to_date(data_inicio)
+        dt_fim = ref_to_date(data_fim)
+        resultados: dict[str, list[str]] = {}
+        falhas: dict[str, str] = {}
+        fila: "queue.Queue[str]" = queue.Queue()
+        for numero in dict.fromkeys(instalacoes):
+            fila.put(numero)
+
+        _validar_sessao(page, ctx, metricas)
+        _atender_fila(page, fila, resultados, falhas, dt_ini, dt_fim, metricas, progresso, None, PoliticaRetentativa())
+
+        return {
+            "pdfs": [c for numero in dict.fromkeys(instalacoes) for c in resultados.get(numero, [])],
+            "falhas": [{"instalacao": n, "erro": e} for n, e in falhas.items()],
+            "metricas": metricas.exportar(),
+        }
+
+    @staticmethod
+    def _fechar(ctx, browser) -> None:
+        for recurso in (ctx, browser):
+            if recurso is None:
+                continue
+            try:
+                recurso.close()
+            except Exception as e:
+                logging.warning(f"⚠️ Erro ao fechar navegador do serviço de scraping: {e}")
+
+_servico: ServicoScraper | None = None
+_servico_lock = threading.Lock()
+
+def obter_servico() -> ServicoScraper:
+    """Retorna o serviço de scraping do processo, iniciando-o na primeira chamada."""
+    global _servico
+    with _servico_lock:
+        if _servico is None or not _servico.ativo():
+            _servico = ServicoScraper()
+            atexit.register(_servico.parar)
+        return _servico
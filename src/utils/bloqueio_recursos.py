@@ -0,0 +1,208 @@
+# src/utils/bloqueio_recursos.py
+"""
+Camada de bloqueio de recursos para o scraper, instalada via `context.route`.
+
+Perfis (variável de ambiente `SCRAPER_BLOQUEIO`):
+    - "" (padrão): nada é interceptado.
+    - "observar": nada é bloqueado, mas o tamanho dos recursos que seriam
+      bloqueados e o tempo de carga de cada página são medidos e gravados
+      como linha de base em `src/logs/bloqueio_baseline.json`.
+    - "bloquear": imagens, mídia, fontes e rastreadores de terceiros
+      (OneTrust, Google Analytics/Tag Manager etc.) são abortados. Como o
+      banner de cookies nunca carrega, o login pula a espera pelo botão de
+      aceite (`CONSENTIMENTO_BLOQUEADO`).
+
+No perfil "bloquear", cada carga de página é registrada no log com a
+quantidade de recursos bloqueados e a economia estimada de bytes e de
+milissegundos em relação à linha de base medida com "observar".
+"""
+import json
+import logging
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+PERFIL_BLOQUEIO = os.getenv("SCRAPER_BLOQUEIO", "").strip().lower()
+"""Perfil de bloqueio: "", "observar" ou "bloquear"."""
+
+TIPOS_BLOQUEADOS = {"image", "media", "font"}
+
+RASTREADORES = (
+    "onetrust.com",
+    "cookielaw.org",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "clarity.ms",
+    "bing.com",
+    "linkedin.com",
+    "tiktok.com",
+)
+
+CONSENTIMENTO_BLOQUEADO = PERFIL_BLOQUEIO == "bloquear"
+"""O script do banner de cookies (OneTrust) é abortado: o login não deve esperar pelo botão de aceite."""
+
+BASELINE_PATH = os.path.join(os.getcwd(), "src/logs/bloqueio_baseline.json")
+
+def classificar(request) -> Optional[str]:
+    """
+    Retorna a categoria de bloqueio da requisição ("rastreador", "image",
+    "media" ou "font"), ou None se ela deve seguir normalmente.
+    """
+    host = urlparse(request.url).hostname or ""
+    if any(host == r or host.endswith("." + r) for r in RASTREADORES):
+        return "rastreador"
+    if request.resource_type in TIPOS_BLOQUEADOS:
+        return request.resource_type
+    return None
+
+def _pagina_principal(request):
+    """Page da requisição, se ela for a navegação do frame principal."""
+    try:
+        if request.is_navigation_request() and request.frame.parent_frame is None:
+            return request.frame.page
+    except Exception:
+        pass
+    return None
+
+def _pagina(request):
+    try:
+        return request.frame.page
+    except Exception:
+        return None
+
+def _media(acumulado) -> Optional[float]:
+    soma, n = acumulado or (0, 0)
+    return soma / n if n else None
+
+class MedidorBloqueio:
+    """Decide o que bloquear e mede a economia de cada carga de página."""
+
+    def __init__(self, perfil: str):
+        self.perfil = perfil
+        self.baseline: Dict[str, Dict[str, list]] = {"bytes": {}, "ms": {}}
+        try:
+            with open(BASELINE_PATH, encoding="utf-8") as f:
+                self.baseline.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        self._cargas: Dict[Any, Dict[str, Any]] = {}
+
+    def ao_requisitar(self, request) -> None:
+        page = _pagina_principal(request)
+        if page is not None:
+            self._cargas[page] = {
+                "inicio": time.perf_counter(),
+                "caminho": urlparse(request.url).path or "/",
+                "bloqueados": Counter(),
+            }
+
+    def deve_bloquear(self, request) -> bool:
+        categoria = classificar(request)
+        if categoria is None or self.perfil != "bloquear":
+            return False
+        carga = self._cargas.get(_pagina(request))
+        if carga is not None:
+            carga["bloqueados"][categoria] += 1
+        return True
+
+    def ao_responder(self, response) -> None:
+        if self.perfil != "observar":
+            return
+        categoria = classificar(response.request)
+        tamanho = response.headers.get("content-length")
+        if categoria and tamanho and tamanho.isdigit():
+            soma, n = self.baseline["bytes"].get(categoria, (0, 0))
+            self.baseline["bytes"][categoria] = [soma + int(tamanho), n + 1]
+
+    def ao_carregar(self, page) -> None:
+        carga = self._cargas.pop(page, None)
+        if carga is None:
+            return
+        ms = (time.perf_counter() - carga["inicio"]) * 1000
+        caminho = carga["caminho"]
+
+        if self.perfil == "observar":
+            soma, n = self.baseline["ms"].get(caminho, (0, 0))
+            self.baseline["ms"][caminho] = [soma + ms, n + 1]
+            self._gravar_baseline()
+            logging.info(f"📏 Linha de base: {caminho} carregada em {ms:.0f} ms.")
+            return
+
+        bloqueados: Counter = carga["bloqueados"]
+        medias = {cat: _media(self.baseline["bytes"].get(cat)) for cat in bloqueados}
+        bytes_economizados = sum(medias[cat] * qtd for cat, qtd in bloqueados.items() if medias[cat])
+        ms_base = _media(self.baseline["ms"].get(caminho))
+        detalhe = ", ".join(f"{cat}={qtd}" for cat, qtd in bloqueados.most_common())
+        economia = f"~{bytes_economizados / 1024:.0f} KB" if bytes_economizados else "bytes sem linha de base"
+        economia += f", ~{ms_base - ms:.0f} ms" if ms_base is not None else ", ms sem linha de base"
+        logging.info(
+            f"🚫 {caminho} carregada em {ms:.0f} ms; {sum(bloqueados.values())} recursos bloqueados"
+            f" ({detalhe or 'nenhum'}); economia: {economia}."
+        )
+
+    def _gravar_baseline(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+            tmp = f"{BASELINE_PATH}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.baseline, f, indent=2)
+            os.replace(tmp, BASELINE_PATH)
+        except OSError as e:
+            logging.warning(f"⚠️ Não foi possível gravar a linha de base de bloqueio: {e}")
+
+def _registrar_eventos(ctx, medidor: MedidorBloqueio) -> None:
+    ctx.on("request", medidor.ao_requisitar)
+    ctx.on("response", medidor.ao_responder)
+    ctx.on("page", lambda page: page.on("load", medidor.ao_carregar))
+
+def instalar_bloqueio(ctx, perfil: str = PERFIL_BLOQUEIO) -> Optional[MedidorBloqueio]:
+    """
+    Instala o perfil de bloqueio em um BrowserContext (API síncrona).
+
+    Deve ser chamado antes de abrir as páginas do contexto. No perfil
+    "observar" nenhuma rota é instalada, pois interceptar requisições
+    desabilita o cache HTTP e distorceria a linha de base.
+
+    Args:
+        ctx: O BrowserContext do Playwright.
+        perfil: "observar", "bloquear" ou qualquer outro valor para desligar.
+
+    Returns:
+        O MedidorBloqueio instalado, ou None se o perfil estiver desligado.
+    """
+    if perfil not in ("observar", "bloquear"):
+        return None
+    medidor = MedidorBloqueio(perfil)
+    _registrar_eventos(ctx, medidor)
+    if perfil == "bloquear":
+        def _rota(route):
+            if medidor.deve_bloquear(route.request):
+                route.abort("blockedbyclient")
+            else:
+                route.continue_()
+        ctx.route("**/*", _rota)
+    logging.info(f"🚫 Perfil de bloqueio de recursos ativo: {perfil}.")
+    return medidor
+
+async def instalar_bloqueio_async(ctx, perfil: str = PERFIL_BLOQUEIO) -> Optional[MedidorBloqueio]:
+    """Versão assíncrona de `instalar_bloqueio`."""
+    if perfil not in ("observar", "bloquear"):
+        return None
+    medidor = MedidorBloqueio(perfil)
+    _registrar_eventos(ctx, medidor)
+    if perfil == "bloquear":
+        async def _rota(route):
+            if medidor.deve_bloquear(route.request):
+                await route.abort("blockedbyclient")
+            else:
+                await route.continue_()
+        await ctx.route("**/*", _rota)
+    logging.info(f"🚫 Perfil de bloqueio de recursos ativo: {perfil}.")
+    return medidor
@@ -0,0 +1,209 @@
+# src/utils/cache_faturas.py
+"""
+Cache endereçado por conteúdo para o texto e os dados extraídos das faturas.
+
+A chave é o SHA-256 do PDF, o modo de extração ("texto", "regex" ou "llm",
+junto do backend de PDF) e a versão do parser (`src.parser.PARSER_VERSAO`):
+o mesmo arquivo copiado para outra pasta reaproveita a extração, e mudar a
+versão invalida tudo.
+
+- Memória: LRU com até `PARSER_CACHE_MEMORIA` entradas.
+- Disco: um JSON por entrada em `PARSER_CACHE_DIR/<2 primeiros hex>/`,
+  gravado atomicamente e compartilhado entre processos. Passando de
+  `PARSER_CACHE_DISCO_MB`, as entradas usadas há mais tempo (mtime, renovado
+  a cada acerto) são apagadas até sobrar 90% do limite.
+
+O SHA-256 de cada caminho é memorizado por (mtime, tamanho), em um LRU de
+até `PARSER_CACHE_HASHES` caminhos, então uma repetição da mesma análise não
+relê o PDF nem o decodifica.
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+PARSER_CACHE = os.getenv("PARSER_CACHE", "1") == "1"
+"""Liga o cache de extração (0 desliga)."""
+
+PARSER_CACHE_DIR = os.getenv("PARSER_CACHE_DIR", os.path.join(os.getcwd(), ".cache_faturas"))
+"""Diretório das entradas do cache em disco."""
+
+PARSER_CACHE_MEMORIA = int(os.getenv("PARSER_CACHE_MEMORIA", "256"))
+"""Quantidade máxima de entradas mantidas em memória (LRU)."""
+
+PARSER_CACHE_DISCO_MB = int(os.getenv("PARSER_CACHE_DISCO_MB", "512"))
+"""Tamanho máximo das entradas em disco, em MB; passando dele, as menos usadas são apagadas (0 = sem limite)."""
+
+PARSER_CACHE_HASHES = int(os.getenv("PARSER_CACHE_HASHES", "4096"))
+"""Quantidade máxima de caminhos com o SHA-256 memorizado (LRU)."""
+
+Chave = Tuple[str, str, str]
+"""(sha256 do PDF, modo de extração, versão do parser)."""
+
+class CacheFaturas:
+    """Cache LRU em memória com segundo nível em disco e contadores de acerto."""
+
+    def __init__(
+        self,
+        pasta: str = PARSER_CACHE_DIR,
+        capacidade: int = PARSER_CACHE_MEMORIA,
+        limite_disco_mb: int = PARSER_CACHE_DISCO_MB,
+        capacidade_hashes: int = PARSER_CACHE_HASHES,
+    ):
+        self.pasta = pasta
+        self.capacidade = max(1, capacidade)
+        self.limite_disco = max(0, limite_disco_mb) * 1024 * 1024
+        self.capacidade_hashes = max(1, capacidade_hashes)
+        self._memoria: "OrderedDict[Chave, Any]" = OrderedDict()
+        self._hashes: "OrderedDict[str, Tuple[int, int, str]]" = OrderedDict()
+        self._bytes_disco: Optional[int] = None  # None até a primeira varredura da pasta
+        self._contadores = {"acertos_memoria": 0, "acertos_disco": 0, "faltas": 0, "gravacoes": 0, "removidas_disco": 0}
+        self._lock = threading.Lock()
+
+    def hash_arquivo(self, caminho: str) -> str:
+        """SHA-256 do arquivo, memorizado enquanto mtime e tamanho não mudarem."""
+        st = os.stat(caminho)
+        with self._lock:
+            memo = self._hashes.get(caminho)
+            if memo:
+                self._hashes.move_to_end(caminho)
+        if memo and memo[:2] == (st.st_mtime_ns, st.st_size):
+            return memo[2]
+        h = hashlib.sha256()
+        with open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloco)
+        digest = h.hexdigest()
+        with self._lock:
+            self._hashes[caminho] = (st.st_mtime_ns, st.st_size, digest)
+            self._hashes.move_to_end(caminho)
+            while len(self._hashes) > self.capacidade_hashes:
+                self._hashes.popitem(last=False)
+        return digest
+
+    @staticmethod
+    def hash_conteudo(conteudo: bytes) -> str:
+        """SHA-256 de um PDF já em memória (ex.: upload), igual ao de `hash_arquivo`."""
+        return hashlib.sha256(conteudo).hexdigest()
+
+    def _caminho(self, chave: Chave) -> str:
+        digest, modo, versao = chave
+        return os.path.join(self.pasta, digest[:2], f"{digest}-{modo}-{versao}.json")
+
+    def _lembrar(self, chave: Chave, valor: Any) -> None:
+        self._memoria[chave] = valor
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.capacidade:
+            self._memoria.popitem(last=False)
+
+    def obter(self, chave: Chave) -> Optional[Any]:
+        """Devolve uma cópia do valor guardado, ou None em caso de falta."""
+        with self._lock:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                self._contadores["acertos_memoria"] += 1
+                return copy.deepcopy(self._memoria[chave])
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                valor = json.load(f)
+            os.utime(caminho)  # renova a entrada para a poda por tamanho
+        except (OSError, ValueError):
+            with self._lock:
+                self._contadores["faltas"] += 1
+            return None
+        with self._lock:
+            self._contadores["acertos_disco"] += 1
+            self._lembrar(chave, valor)
+        return copy.deepcopy(valor)
+
+    def guardar(self, chave: Chave, valor: Any) -> None:
+        """Guarda `valor` (serializável em JSON) na memória e no disco."""
+        destino = self._caminho(chave)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        tmp = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(valor, f, ensure_ascii=False)
+        os.replace(tmp, destino)
+        with self._lock:
+            self._contadores["gravacoes"] += 1
+            self._lembrar(chave, copy.deepcopy(valor))
+        self._podar_disco(os.path.getsize(destino))
+
+    def _entradas_disco(self) -> list:
+        """Lista (mtime, tamanho, caminho) de cada entrada em disco."""
+        entradas = []
+        for raiz, _, nomes in os.walk(self.pasta):
+            for nome in nomes:
+                if not nome.endswith(".json"):
+                    continue
+                caminho = os.path.join(raiz, nome)
+                try:
+                    st = os.stat(caminho)
+                except OSError:
+                    continue
+                entradas.append((st.st_mtime, st.st_size, caminho))
+        return entradas
+
+    def _podar_disco(self, gravados: int) -> None:
+        """
+        Soma `gravados` ao total em disco e, se o limite for ultrapassado,
+        apaga as entradas menos recentes até sobrar 90% dele.
+
+        O total é mantido em memória e só é recontado (varrendo a pasta) na
+        primeira gravação e em cada poda, o que também corrige o que outros
+        processos gravaram na mesma pasta.
+        """
+        if not self.limite_disco:
+            return
+        with self._lock:
+            if self._bytes_disco is not None:
+                self._bytes_disco += gravados
+                if self._bytes_disco <= self.limite_disco:
+                    return
+        entradas = self._entradas_disco()
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        removidas = 0
+        if total > self.limite_disco:
+            for _, tamanho, caminho in sorted(entradas):
+                if total <= self.limite_disco * 0.9:
+                    break
+                try:
+                    os.remove(caminho)
+                except OSError:
+                    continue
+                total -= tamanho
+                removidas += 1
+        with self._lock:
+            self._bytes_disco = total
+            self._contadores["removidas_disco"] += removidas
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Contadores de acertos e faltas, taxa de acerto e ocupação da memória."""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._contadores)
+            stats["entradas_memoria"] = len(self._memoria)
+            stats["hashes_memorizados"] = len(self._hashes)
+            stats["bytes_disco"] = self._bytes_disco
+        consultas = stats["acertos_memoria"] + stats["acertos_disco"] + stats["faltas"]
+        stats["taxa_acerto"] = round((consultas - stats["faltas"]) / consultas, 4) if consultas else 0.0
+        stats["capacidade_memoria"] = self.capacidade
+        stats["limite_disco_mb"] = self.limite_disco // (1024 * 1024)
+        stats["pasta"] = self.pasta
+        return stats
+
+_cache: Optional[CacheFaturas] = None
+_cache_lock = threading.Lock()
+
+def obter_cache() -> Optional[CacheFaturas]:
+    """Cache do processo, ou None se `PARSER_CACHE` estiver desligado."""
+    global _cache
+    if not PARSER_CACHE:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheFaturas()
+        return _cache
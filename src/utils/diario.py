@@ -0,0 +1,142 @@
+# src/utils/diario.py
+"""
+Diário de execução do scraper, para retomar execuções interrompidas.
+
+Cada execução (mesmas instalações, na mesma ordem, e mesmo intervalo) tem um
+arquivo JSONL em `faturas_edp/.execucoes/<id>.jsonl`, onde cada instalação
+concluída ou com falha vira uma linha gravada com `fsync` assim que termina.
+Com `retomar=True`, as instalações já concluídas no diário são puladas e
+seus PDFs reaproveitados; as que falharam são tentadas de novo. Uma linha
+truncada no fim do arquivo (processo morto no meio da gravação) é ignorada.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+def id_execucao(instalacoes: List[str], data_inicio: str, data_fim: str) -> str:
+    """Identificador estável da execução a partir de seus parâmetros."""
+    chave = json.dumps([list(dict.fromkeys(instalacoes)), data_inicio.upper(), data_fim.upper()])
+    return hashlib.sha256(chave.encode("utf-8")).hexdigest()[:16]
+
+def _referencias(pdfs: List[str]) -> List[str]:
+    return [os.path.basename(p)[len("fatura_"):-len(".pdf")] for p in pdfs]
+
+class DiarioExecucao:
+    """Registro append-only das instalações concluídas e com falha de uma execução."""
+
+    def __init__(self, pasta: str, instalacoes: List[str], data_inicio: str, data_fim: str, retomar: bool = False):
+        os.makedirs(pasta, exist_ok=True)
+        self.id = id_execucao(instalacoes, data_inicio, data_fim)
+        self.caminho = os.path.join(pasta, f"{self.id}.jsonl")
+        self.concluidas: Dict[str, List[str]] = {}
+        self.falhas_anteriores: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        if retomar:
+            self._carregar()
+            logging.info(
+                f"📒 Retomando execução {self.id}: {len(self.concluidas)} instalações já concluídas,"
+                f" {len(self.falhas_anteriores)} com falha a repetir."
+            )
+        elif os.path.exists(self.caminho):
+            os.remove(self.caminho)
+
+        self._gravar({
+            "evento": "inicio",
+            "retomada": retomar,
+            "instalacoes": len(dict.fromkeys(instalacoes)),
+            "data_inicio": data_inicio,
+            "data_fim": data_fim,
+        })
+
+    def _carregar(self) -> None:
+        try:
+            with open(self.caminho, encoding="utf-8") as f:
+                linhas = f.readlines()
+        except OSError:
+            return
+        if linhas and not linhas[-1].endswith("\n"):
+            # Fecha a linha truncada para que os próximos registros fiquem em linhas próprias
+            with open(self.caminho, "a", encoding="utf-8") as f:
+                f.write("\n")
+        for linha in linhas:
+            try:
+                registro = json.loads(linha)
+            except ValueError:
+                continue  # linha truncada por uma interrupção
+            if registro.get("evento") != "instalacao":
+                continue
+            numero = registro["instalacao"]
+            if registro["status"] == "concluida":
+                self.concluidas[numero] = registro["pdfs"]
+                self.falhas_anteriores.pop(numero, None)
+            elif registro["status"] == "falhou":
+                self.falhas_anteriores[numero] = registro.get("erro") or ""
+
+    def _gravar(self, registro: Dict[str, Any]) -> None:
+        registro["em"] = datetime.now().isoformat(timespec="seconds")
+        linha = json.dumps(registro, ensure_ascii=False) + "\n"
+        with self._lock, open(self.caminho, "a", encoding="utf-8") as f:
+            f.write(linha)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def acompanhar(self, progresso: Optional[Callable] = None) -> Callable:
+        """
+        Envolve um callback de progresso do scraper para também gravar no diário.
+
+        Args:
+            progresso: Callback `progresso(instalacao, status, pdfs, erro)` original, ou None.
+
+        Returns:
+            Um callback com a mesma assinatura.
+        """
+        def _progresso(numero: str, status: str, pdfs: list, erro: Optional[str]) -> None:
+            if status in ("concluida", "falhou"):
+                self._gravar({
+                    "evento": "instalacao",
+                    "instalacao": numero,
+                    "status": status,
+                    "pdfs": pdfs,
+                    "referencias": _referencias(pdfs),
+                    "erro": erro,
+                })
+            if progresso is not None:
+                progresso(numero, status, pdfs, erro)
+        return _progresso
+
+    def finalizar(self, instalacoes: List[str], resultados: Dict[str, List[str]], falhas: Dict[str, str], cancelado: bool) -> Dict[str, Any]:
+        """
+        Grava o fim da execução e monta o resumo.
+
+        Returns:
+            Um dicionário com o id da execução, totais (instalações, concluídas,
+            retomadas do diário, com falha, não processadas e PDFs) e a lista de
+            falhas {'instalacao', 'erro'}.
+        """
+        unicas = list(dict.fromkeys(instalacoes))
+        resumo = {
+            "execucao": self.id,
+            "instalacoes": len(unicas),
+            "concluidas": sum(1 for n in unicas if n in resultados),
+            "retomadas": sum(1 for n in unicas if n in self.concluidas),
+            "com_falha": len(falhas),
+            "nao_processadas": sum(1 for n in unicas if n not in resultados and n not in falhas),
+            "pdfs": sum(len(resultados.get(n, [])) for n in unicas),
+            "cancelado": cancelado,
+            "falhas": [{"instalacao": n, "erro": e} for n, e in falhas.items()],
+        }
+        self._gravar({"evento": "fim", **{k: v for k, v in resumo.items() if k != "falhas"}})
+
+        logging.info(
+            f"📒 Execução {self.id}: {resumo['concluidas']}/{resumo['instalacoes']} instalações concluídas"
+            f" ({resumo['retomadas']} retomadas do diário), {resumo['pdfs']} PDFs,"
+            f" {resumo['com_falha']} falhas, {resumo['nao_processadas']} não processadas."
+        )
+        for falha in resumo["falhas"]:
+            logging.info(f"   ❌ {falha['instalacao']}: {falha['erro']}")
+        return resumo
@@ -0,0 +1,223 @@
+# src/utils/download_direto.py
+"""
+Caminho rápido de download: busca os PDFs direto por HTTP com os cookies da sessão.
+
+Na primeira fatura baixada pelo modal, a requisição por trás do botão "Baixar"
+é capturada e transformada em um modelo, trocando a referência (em qualquer
+dos formatos conhecidos) e o número da instalação por marcadores. A partir daí
+as demais faturas são buscadas pelo `APIRequestContext` do contexto logado,
+sem abrir modal nem renderizar nada. Qualquer falha descarta o modelo e o
+scraper volta ao clique, que reaprende o modelo na próxima fatura. Um modelo
+que devolve o PDF de outra referência (a URL ainda carrega um id opaco da
+fatura aprendida) é recusado e não volta a ser aprendido.
+
+O modelo é único no processo e vale para todas as instalações, por isso só é
+aceito se a requisição carregar o número da instalação: uma URL com id opaco
+(ou uma UC escolhida pela sessão no servidor) baixaria a fatura da primeira
+instalação para todas as outras.
+"""
+import hashlib
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+DOWNLOAD_DIRETO = os.getenv("SCRAPER_DOWNLOAD_DIRETO", "1") == "1"
+"""Habilita o download direto por HTTP (com fallback para o modal)."""
+
+DOWNLOAD_DIRETO_CONCORRENCIA = int(os.getenv("SCRAPER_DOWNLOAD_DIRETO_CONCORRENCIA", "4"))
+"""Máximo de downloads diretos simultâneos por instalação (motor assíncrono)."""
+
+_MESES = ("JAN", "FEV", "MAR", "ABR", "MAI", "JUN", "JUL", "AGO", "SET", "OUT", "NOV", "DEZ")
+
+# Formatos em que a referência pode aparecer na URL/corpo, do mais ao menos específico
+_FORMATOS_REF: List[Tuple[str, Callable[[int, int], str]]] = [
+    ("MMM/AAAA", lambda mes, ano: f"{_MESES[mes - 1]}/{ano}"),
+    ("MMM-AAAA", lambda mes, ano: f"{_MESES[mes - 1]}-{ano}"),
+    ("AAAA-MM", lambda mes, ano: f"{ano}-{mes:02d}"),
+    ("MM/AAAA", lambda mes, ano: f"{mes:02d}/{ano}"),
+    ("MM-AAAA", lambda mes, ano: f"{mes:02d}-{ano}"),
+    ("AAAAMM", lambda mes, ano: f"{ano}{mes:02d}"),
+    ("MMAAAA", lambda mes, ano: f"{mes:02d}{ano}"),
+]
+
+_MARCA_REF = "{ref}"
+_MARCA_INST = "{instalacao}"
+_MARCA_INST_SZ = "{instalacao_sem_zeros}"
+
+# Cabeçalhos da requisição capturada que o modelo reproduz (cookies vêm do contexto)
+_CABECALHOS_MODELO = ("content-type", "accept", "x-requested-with")
+
+_lock = threading.Lock()
+_modelo: Optional[Dict[str, Any]] = None
+_recusados: set = set()
+
+def _mes_ano(ref: str) -> Optional[Tuple[int, int]]:
+    try:
+        mes, ano = ref.upper().split("-")
+        return _MESES.index(mes) + 1, int(ano)
+    except ValueError:
+        return None
+
+def _valores_ref(ref: str) -> List[Tuple[str, str]]:
+    """Lista (formato, valor) da referência em cada formato, incluindo a forma url-encoded."""
+    mes_ano = _mes_ano(ref)
+    if not mes_ano:
+        return []
+    valores = []
+    for nome, fmt in _FORMATOS_REF:
+        valor = fmt(*mes_ano)
+        valores.append((nome, valor))
+        if quote(valor, safe="") != valor:
+            valores.append((f"{nome}%", quote(valor, safe="")))
+    return valores
+
+def _formatar_ref(formato: str, ref: str) -> Optional[str]:
+    mes_ano = _mes_ano(ref)
+    if not mes_ano:
+        return None
+    codificado = formato.endswith("%")
+    fmt = dict(_FORMATOS_REF)[formato.rstrip("%")]
+    valor = fmt(*mes_ano)
+    return quote(valor, safe="") if codificado else valor
+
+def aprender_modelo(
+    metodo: str,
+    url: str,
+    corpo: Optional[str],
+    cabecalhos: Dict[str, str],
+    ref: str,
+    numero: str,
+) -> Optional[Dict[str, Any]]:
+    """
+    Constrói o modelo de requisição a partir do download capturado.
+
+    Args:
+        metodo: Método HTTP da requisição capturada.
+        url: URL da requisição que devolveu o PDF.
+        corpo: Corpo da requisição (POST), se houver.
+        cabecalhos: Cabeçalhos da requisição (ex: o content-type do POST).
+        ref: Referência da fatura baixada (ex: "MAR-2025").
+        numero: Número da instalação.
+
+    Returns:
+        O modelo {"metodo", "url", "corpo", "cabecalhos", "formato"}, ou None
+        se a referência ou o número da instalação não aparecerem na
+        requisição (URL opaca, `blob:` etc.) ou se o mesmo modelo já foi
+        recusado por `descartar_modelo(recusar=True)`.
+    """
+    if not url.startswith(("http://", "https://")):
+        return None
+    for formato, valor in _valores_ref(ref):
+        if valor in url or (corpo and valor in corpo):
+            def _generalizar(texto: Optional[str]) -> Optional[str]:
+                if texto is None:
+                    return None
+                texto = texto.replace(valor, _MARCA_REF)
+                if numero in texto:
+                    return texto.replace(numero, _MARCA_INST)
+                if numero.lstrip("0"):
+                    texto = texto.replace(numero.lstrip("0"), _MARCA_INST_SZ)
+                return texto
+            modelo = {
+                "metodo": metodo.upper(),
+                "url": _generalizar(url),
+                "corpo": _generalizar(corpo),
+                "cabecalhos": {k: v for k, v in (cabecalhos or {}).items() if k.lower() in _CABECALHOS_MODELO},
+                "formato": formato,
+            }
+            if not any(marca in (modelo["url"] + (modelo["corpo"] or "")) for marca in (_MARCA_INST, _MARCA_INST_SZ)):
+                return None
+            with _lock:
+                return None if _assinatura(modelo) in _recusados else modelo
+    return None
+
+def montar_requisicao(
+    modelo: Dict[str, Any], ref: str, numero: str
+) -> Optional[Tuple[str, str, Optional[str], Dict[str, str]]]:
+    """
+    Preenche o modelo para a referência e instalação informadas.
+
+    Returns:
+        Uma tupla (metodo, url, corpo, cabecalhos), ou None se a referência
+        for inválida.
+    """
+    valor = _formatar_ref(modelo["formato"], ref)
+    if valor is None:
+        return None
+
+    def _preencher(texto: Optional[str]) -> Optional[str]:
+        if texto is None:
+            return None
+        return (texto.replace(_MARCA_REF, valor)
+                     .replace(_MARCA_INST, numero)
+                     .replace(_MARCA_INST_SZ, numero.lstrip("0")))
+
+    return modelo["metodo"], _preencher(modelo["url"]), _preencher(modelo["corpo"]), dict(modelo["cabecalhos"])
+
+def escolher_requisicao_pdf(
+    url_download: str, respostas: list
+) -> Optional[Tuple[str, str, Optional[str], Dict[str, str]]]:
+    """
+    Identifica, entre as respostas observadas, a requisição que trouxe o PDF.
+
+    Prioriza a resposta cuja URL é a do próprio download; senão, a última
+    resposta com `content-type` de PDF.
+
+    Args:
+        url_download: `Download.url` do download pelo modal.
+        respostas: Objetos Response do Playwright registrados durante o modal.
+
+    Returns:
+        Uma tupla (metodo, url, corpo, cabecalhos), ou None se nada adequado
+        foi encontrado.
+    """
+    escolhida = next((r for r in respostas if r.url == url_download), None)
+    if escolhida is None:
+        pdfs = [r for r in respostas if "pdf" in (r.headers.get("content-type") or "").lower()]
+        escolhida = pdfs[-1] if pdfs else None
+    if escolhida is None:
+        return ("GET", url_download, None, {}) if url_download.startswith(("http://", "https://")) else None
+    requisicao = escolhida.request
+    return requisicao.method, escolhida.url, requisicao.post_data, dict(requisicao.headers or {})
+
+def eh_pdf(conteudo: Optional[bytes]) -> bool:
+    return bool(conteudo) and conteudo[:4] == b"%PDF"
+
+def referencia_repetida(conteudo: bytes, ref: str, manifesto: Dict[str, Any]) -> Optional[str]:
+    """
+    Outra referência do manifesto com o mesmo SHA-256 de `conteudo`.
+
+    Faturas de meses diferentes nunca têm o mesmo PDF: se o download direto
+    de `ref` devolve um conteúdo já registrado, o modelo não está trocando a
+    fatura e o corpo não pode ser gravado como `ref`.
+
+    Returns:
+        A referência já registrada com esse conteúdo, ou None.
+    """
+    sha256 = hashlib.sha256(conteudo).hexdigest()
+    for outra, entrada in manifesto["referencias"].items():
+        if outra != ref and entrada.get("sha256") == sha256:
+            return outra
+    return None
+
+def modelo_atual() -> Optional[Dict[str, Any]]:
+    """Modelo aprendido neste processo, se houver e o caminho rápido estiver habilitado."""
+    with _lock:
+        return _modelo if DOWNLOAD_DIRETO else None
+
+def guardar_modelo(modelo: Optional[Dict[str, Any]]) -> None:
+    global _modelo
+    with _lock:
+        _modelo = modelo
+
+def _assinatura(modelo: Dict[str, Any]) -> Tuple[str, str, Optional[str]]:
+    return modelo["metodo"], modelo["url"], modelo["corpo"]
+
+def descartar_modelo(recusar: bool = False) -> None:
+    """Descarta o modelo atual; com `recusar`, o mesmo modelo não é aprendido de novo."""
+    global _modelo
+    with _lock:
+        if recusar and _modelo is not None:
+            _recusados.add(_assinatura(_modelo))
+        _modelo = None
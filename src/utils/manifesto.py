@@ -0,0 +1,147 @@
+# src/utils/manifesto.py
+"""
+Manifesto de downloads por instalação.
+
+Cada pasta `faturas_edp/<instalacao>/` guarda um `manifest.json` com uma
+entrada por mês de referência (arquivo, tamanho, SHA-256 e data do download).
+O scraper consulta o manifesto logo após ler o "Referente" de cada card e
+pula as faturas já baixadas sem abrir o modal.
+
+PDFs e manifesto são sempre gravados em um arquivo temporário e depois
+renomeados, para que leitores nunca vejam arquivos pela metade. Requisições,
+jobs e o serviço de scraping rodam como threads do mesmo processo: os
+temporários levam o id da thread e cada registro relê e mescla o manifesto
+do disco sob uma trava da pasta, para não apagar entradas de outra thread.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+MANIFESTO_NOME = "manifest.json"
+
+_travas: Dict[str, threading.Lock] = {}
+_travas_lock = threading.Lock()
+
+def _trava_pasta(pasta: str) -> threading.Lock:
+    with _travas_lock:
+        return _travas.setdefault(os.path.abspath(pasta), threading.Lock())
+
+def caminho_fatura(pasta: str, ref: str) -> str:
+    """Caminho final do PDF da referência `ref` (ex: "JAN-2024") na pasta da instalação."""
+    return os.path.join(pasta, f"fatura_{ref}.pdf")
+
+def caminho_temporario(pasta: str, ref: str) -> str:
+    """Caminho temporário onde o download de `ref` é gravado antes do rename."""
+    return os.path.join(pasta, f".fatura_{ref}.pdf.{os.getpid()}.{threading.get_ident()}.part")
+
+def sha256_arquivo(caminho: str) -> str:
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 16), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+def _gravar_json_atomico(caminho: str, dados: Dict[str, Any]) -> None:
+    tmp = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, caminho)
+
+def carregar_manifesto(pasta: str) -> Dict[str, Any]:
+    """
+    Lê o manifesto da pasta da instalação.
+
+    Returns:
+        O manifesto no formato {"referencias": {REF: entrada}}; um manifesto
+        vazio se o arquivo não existir ou estiver corrompido.
+    """
+    try:
+        with open(os.path.join(pasta, MANIFESTO_NOME), encoding="utf-8") as f:
+            manifesto = json.load(f)
+        if isinstance(manifesto.get("referencias"), dict):
+            return manifesto
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {"referencias": {}}
+
+def _registrar(pasta: str, ref: str, manifesto: Dict[str, Any], caminho: str, sha256: str) -> Dict[str, Any]:
+    entrada = {
+        "referencia": ref,
+        "arquivo": os.path.basename(caminho),
+        "tamanho": os.path.getsize(caminho),
+        "sha256": sha256,
+        "baixado_em": datetime.now().isoformat(timespec="seconds"),
+    }
+    with _trava_pasta(pasta):
+        # outra thread pode ter registrado faturas desde que `manifesto` foi carregado
+        referencias = {**manifesto["referencias"], **carregar_manifesto(pasta)["referencias"], ref: entrada}
+        manifesto["referencias"].clear()
+        manifesto["referencias"].update(referencias)
+        _gravar_json_atomico(os.path.join(pasta, MANIFESTO_NOME), manifesto)
+    return entrada
+
+def fatura_conhecida(pasta: str, ref: str, manifesto: Dict[str, Any]) -> Optional[str]:
+    """
+    Verifica se a fatura `ref` já foi baixada.
+
+    A entrada do manifesto só é aceita se o PDF ainda existir com o mesmo
+    tamanho. PDFs baixados antes da existência do manifesto são adotados
+    (hash calculado e entrada criada) desde que comecem com `%PDF`.
+
+    Returns:
+        O caminho do PDF já existente, ou None se for preciso baixá-lo.
+    """
+    caminho = caminho_fatura(pasta, ref)
+    if not os.path.isfile(caminho):
+        return None
+
+    entrada = manifesto["referencias"].get(ref)
+    if entrada:
+        return caminho if entrada.get("tamanho") == os.path.getsize(caminho) else None
+
+    with open(caminho, "rb") as f:
+        if f.read(4) != b"%PDF":
+            return None
+    _registrar(pasta, ref, manifesto, caminho, sha256_arquivo(caminho))
+    return caminho
+
+def confirmar_download(pasta: str, ref: str, tmp: str, manifesto: Dict[str, Any], sha256: Optional[str] = None) -> str:
+    """
+    Move o download temporário para o caminho final e registra no manifesto.
+
+    Args:
+        pasta: Pasta da instalação.
+        ref: Referência da fatura (ex: "JAN-2024").
+        tmp: Caminho temporário retornado por `caminho_temporario`, já gravado.
+        manifesto: Manifesto carregado por `carregar_manifesto` (atualizado in-place).
+        sha256: Hash do conteúdo, se já conhecido; senão é calculado relendo `tmp`.
+
+    Returns:
+        O caminho final do PDF.
+    """
+    sha256 = sha256 or sha256_arquivo(tmp)
+    caminho = caminho_fatura(pasta, ref)
+    os.replace(tmp, caminho)
+    _registrar(pasta, ref, manifesto, caminho, sha256)
+    return caminho
+
+def gravar_fatura(pasta: str, ref: str, conteudo: bytes, manifesto: Dict[str, Any]) -> str:
+    """
+    Grava atomicamente um PDF já em memória e registra no manifesto.
+
+    O hash do manifesto é calculado do próprio buffer, sem reler o arquivo.
+
+    Returns:
+        O caminho final do PDF.
+    """
+    tmp = caminho_temporario(pasta, ref)
+    with open(tmp, "wb") as f:
+        f.write(conteudo)
+        f.flush()
+        os.fsync(f.fileno())
+    return confirmar_download(pasta, ref, tmp, manifesto, hashlib.sha256(conteudo).hexdigest())
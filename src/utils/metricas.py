@@ -0,0 +1,73 @@
+# src/utils/metricas.py
+"""
+Histogramas de latência por etapa do scraper.
+
+Cada etapa nomeada (login, consulta, instalacao, expand, modal, download)
+registra sua duração em um `HistogramaEtapas`, compartilhado por todos os
+workers de uma execução e exportado junto com o resultado.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+LIMITES_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+"""Limites superiores (em ms) dos buckets do histograma; o último bucket é "+inf"."""
+
+def _percentil(ordenadas: List[float], p: float) -> float:
+    if not ordenadas:
+        return 0.0
+    idx = min(len(ordenadas) - 1, max(0, round(p / 100 * len(ordenadas)) - 1))
+    return ordenadas[idx]
+
+class HistogramaEtapas:
+    """Acumula as durações de cada etapa; seguro para uso entre threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._amostras: Dict[str, List[float]] = {}
+
+    @contextmanager
+    def medir(self, etapa: str):
+        """Context manager que registra a duração do bloco na etapa informada."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, (time.perf_counter() - inicio) * 1000)
+
+    def registrar(self, etapa: str, ms: float) -> None:
+        with self._lock:
+            self._amostras.setdefault(etapa, []).append(ms)
+
+    def exportar(self) -> Dict[str, Any]:
+        """
+        Resume as durações registradas.
+
+        Returns:
+            Um dicionário etapa -> {contagem, total_ms, min_ms, max_ms, media_ms,
+            p50_ms, p95_ms, buckets}, onde `buckets` mapeia "<=N" (e "+inf")
+            para a quantidade de amostras em cada faixa.
+        """
+        with self._lock:
+            amostras = {etapa: sorted(v) for etapa, v in self._amostras.items()}
+
+        resumo: Dict[str, Any] = {}
+        for etapa, valores in amostras.items():
+            buckets = {f"<={limite}": 0 for limite in LIMITES_MS}
+            buckets["+inf"] = 0
+            for ms in valores:
+                limite = next((l for l in LIMITES_MS if ms <= l), None)
+                buckets[f"<={limite}" if limite else "+inf"] += 1
+            total = sum(valores)
+            resumo[etapa] = {
+                "contagem": len(valores),
+                "total_ms": round(total, 1),
+                "min_ms": round(valores[0], 1),
+                "max_ms": round(valores[-1], 1),
+                "media_ms": round(total / len(valores), 1),
+                "p50_ms": round(_percentil(valores, 50), 1),
+                "p95_ms": round(_percentil(valores, 95), 1),
+                "buckets": buckets,
+            }
+        return resumo
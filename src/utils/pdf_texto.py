@@ -0,0 +1,111 @@
+# src/utils/pdf_texto.py
+"""
+Extração de texto de PDFs com backend configurável.
+
+Cada backend é uma função que recebe o PDF (caminho ou conteúdo em bytes) e
+gera o texto de cada página, na ordem. O backend padrão vem de `PDF_BACKEND`:
+
+- "pypdf2": PyPDF2, Python puro (comportamento histórico do projeto);
+- "pdfplumber": pdfminer.six, mais lento, mas preserva melhor o layout;
+- "pypdfium2": PDFium (o motor do Chromium), nativo e bem mais rápido.
+
+As bibliotecas são importadas só quando o backend é usado; pdfplumber e
+pypdfium2 são opcionais para quem fica no PyPDF2.
+
+As páginas são lidas sob demanda: com `parar`, `extrair_texto` deixa de ler o
+restante do documento assim que o texto acumulado basta (ex.: anexos longos
+depois das páginas com os dados da fatura).
+"""
+import io
+import os
+from typing import Callable, Dict, Iterator, Optional, Union
+
+PDF_BACKEND = os.getenv("PDF_BACKEND", "pypdf2").lower()
+"""Backend de extração de texto: "pypdf2", "pdfplumber" ou "pypdfium2"."""
+
+Fonte = Union[str, bytes]
+"""Caminho do PDF ou o conteúdo do arquivo já em memória (ex.: upload)."""
+
+def _abrir(fonte: Fonte):
+    return io.BytesIO(fonte) if isinstance(fonte, bytes) else open(fonte, "rb")
+
+def _paginas_pypdf2(fonte: Fonte) -> Iterator[str]:
+    import PyPDF2
+
+    with _abrir(fonte) as f:
+        for page in PyPDF2.PdfReader(f).pages:
+            yield page.extract_text() or ""
+
+def _paginas_pdfplumber(fonte: Fonte) -> Iterator[str]:
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(fonte) if isinstance(fonte, bytes) else fonte) as pdf:
+        for page in pdf.pages:
+            yield page.extract_text() or ""
+            page.flush_cache()
+
+def _paginas_pypdfium2(fonte: Fonte) -> Iterator[str]:
+    import pypdfium2
+
+    pdf = pypdfium2.PdfDocument(fonte)  # aceita caminho ou bytes
+    try:
+        for page in pdf:
+            textpage = page.get_textpage()
+            try:
+                # PDFium separa linhas com \r\n; os padrões do parser esperam \n
+                yield textpage.get_text_range().replace("\r\n", "\n").replace("\r", "\n")
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+
+BACKENDS: Dict[str, Callable[[Fonte], Iterator[str]]] = {
+    "pypdf2": _paginas_pypdf2,
+    "pdfplumber": _paginas_pdfplumber,
+    "pypdfium2": _paginas_pypdfium2,
+}
+"""Backends disponíveis, por nome."""
+
+def backend_padrao(backend: Optional[str] = None) -> str:
+    """Nome do backend a usar: `backend`, se informado, ou `PDF_BACKEND`."""
+    nome = (backend or PDF_BACKEND).lower()
+    if nome not in BACKENDS:
+        raise ValueError(f"Backend de PDF desconhecido: {nome!r} (use {', '.join(BACKENDS)})")
+    return nome
+
+def paginas(pdf_path: Fonte, backend: Optional[str] = None) -> Iterator[str]:
+    """
+    Gera o texto de cada página do PDF.
+
+    Args:
+        pdf_path: O caminho para o arquivo PDF, ou o conteúdo dele em bytes.
+        backend: Nome do backend; padrão é `PDF_BACKEND`.
+
+    Raises:
+        ValueError: Se o backend não existir.
+    """
+    return BACKENDS[backend_padrao(backend)](pdf_path)
+
+def extrair_texto(
+    pdf_path: Fonte,
+    backend: Optional[str] = None,
+    parar: Optional[Callable[[str], bool]] = None,
+) -> str:
+    """
+    Texto das páginas do PDF, separadas por quebras de linha.
+
+    Args:
+        pdf_path: O caminho para o arquivo PDF, ou o conteúdo dele em bytes.
+        backend: Nome do backend; padrão é `PDF_BACKEND`.
+        parar: Recebe o texto acumulado após cada página; quando devolve True,
+            as páginas seguintes não são lidas. Sem ele, lê o PDF inteiro.
+    """
+    if parar is None:
+        return "\n".join(paginas(pdf_path, backend))
+    lidas = []
+    for texto in paginas(pdf_path, backend):
+        lidas.append(texto)
+        if parar("\n".join(lidas)):
+            break  # fechar o gerador libera o documento sem decodificar o resto
+    return "\n".join(lidas)
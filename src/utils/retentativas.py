@@ -0,0 +1,132 @@
+# src/utils/retentativas.py
+"""
+Política de retentativas do scraper.
+
+Uma `PoliticaRetentativa` é criada por execução e reúne:
+- o número de tentativas para carregar a lista de faturas de uma instalação,
+  com backoff exponencial e jitter entre elas;
+- um prazo global da execução, depois do qual nenhuma tentativa nova começa;
+- a fila de instalações adiadas: uma instalação que esgota as tentativas vai
+  para o fim da execução em vez de segurar as demais e, depois de
+  `SCRAPER_DISJUNTOR` rodadas com falha, é dada como falha definitiva.
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+SCRAPER_TENTATIVAS = int(os.getenv("SCRAPER_TENTATIVAS", "3"))
+"""Tentativas de carregar a lista de faturas de uma instalação em cada rodada."""
+
+SCRAPER_BACKOFF_BASE = float(os.getenv("SCRAPER_BACKOFF_BASE", "1.0"))
+"""Espera (em segundos) antes da segunda tentativa; dobra a cada tentativa seguinte."""
+
+SCRAPER_BACKOFF_MAX = float(os.getenv("SCRAPER_BACKOFF_MAX", "30"))
+"""Teto (em segundos) da espera entre tentativas."""
+
+SCRAPER_PRAZO = float(os.getenv("SCRAPER_PRAZO", "0"))
+"""Prazo global (em segundos) de uma execução; 0 desativa."""
+
+SCRAPER_DISJUNTOR = int(os.getenv("SCRAPER_DISJUNTOR", "2"))
+"""Rodadas com falha após as quais uma instalação deixa de ser adiada e é dada como falha."""
+
+class PoliticaRetentativa:
+    """Tentativas com backoff, prazo global e fila de instalações adiadas de uma execução."""
+
+    def __init__(
+        self,
+        tentativas: int = SCRAPER_TENTATIVAS,
+        base: float = SCRAPER_BACKOFF_BASE,
+        maximo: float = SCRAPER_BACKOFF_MAX,
+        prazo: float = SCRAPER_PRAZO,
+        disjuntor: int = SCRAPER_DISJUNTOR,
+    ):
+        self.tentativas_max = max(1, tentativas)
+        self.base = base
+        self.maximo = maximo
+        self.disjuntor = max(1, disjuntor)
+        self.limite: Optional[float] = time.monotonic() + prazo if prazo > 0 else None
+        self._falhas: Dict[str, int] = {}
+        self._adiadas: List[str] = []
+        self._lock = threading.Lock()
+
+    def espera(self, tentativa: int) -> float:
+        """Espera antes de `tentativa` (a partir de 2): metade fixa e metade aleatória do backoff."""
+        teto = min(self.maximo, self.base * 2 ** (tentativa - 2))
+        return teto / 2 + random.uniform(0, teto / 2)
+
+    def restante(self) -> Optional[float]:
+        """Segundos até o prazo global, ou None se não houver prazo."""
+        return None if self.limite is None else self.limite - time.monotonic()
+
+    def esgotado(self) -> bool:
+        """True se o prazo global da execução já passou."""
+        restante = self.restante()
+        return restante is not None and restante <= 0
+
+    def _proxima_espera(self, tentativa: int) -> Optional[float]:
+        espera = self.espera(tentativa)
+        restante = self.restante()
+        if restante is not None and restante <= espera:
+            logging.warning("  ⏰ Prazo da execução esgotado; sem novas tentativas.")
+            return None
+        return espera
+
+    def tentativas(self, cancelar: Optional[threading.Event] = None) -> Iterator[int]:
+        """
+        Gera os números das tentativas (1, 2, ...), esperando o backoff entre elas.
+
+        Para antes do limite de tentativas se o prazo global passar ou se
+        `cancelar` for acionado durante uma espera.
+        """
+        for tentativa in range(1, self.tentativas_max + 1):
+            if tentativa > 1:
+                espera = self._proxima_espera(tentativa)
+                if espera is None:
+                    return
+                if cancelar is not None:
+                    if cancelar.wait(espera):
+                        return
+                else:
+                    time.sleep(espera)
+            elif self.esgotado():
+                return
+            yield tentativa
+
+    async def tentativas_async(self, cancelar: Optional[threading.Event] = None) -> AsyncIterator[int]:
+        """Versão assíncrona de `tentativas`."""
+        for tentativa in range(1, self.tentativas_max + 1):
+            if tentativa > 1:
+                espera = self._proxima_espera(tentativa)
+                if espera is None:
+                    return
+                await asyncio.sleep(espera)
+                if cancelar is not None and cancelar.is_set():
+                    return
+            elif self.esgotado():
+                return
+            yield tentativa
+
+    def adiar(self, numero: str) -> bool:
+        """
+        Registra uma falha da instalação e decide se ela volta para o fim da execução.
+
+        Returns:
+            True se a instalação foi adiada; False se o disjuntor abriu (falhas
+            demais) ou o prazo acabou, e a falha é definitiva.
+        """
+        with self._lock:
+            self._falhas[numero] = self._falhas.get(numero, 0) + 1
+            if self._falhas[numero] >= self.disjuntor or self.esgotado():
+                return False
+            self._adiadas.append(numero)
+            return True
+
+    def retomar_adiadas(self) -> List[str]:
+        """Retira e devolve as instalações adiadas até agora."""
+        with self._lock:
+            adiadas, self._adiadas = self._adiadas, []
+        return adiadas
@@ -0,0 +1,137 @@
+# src/utils/sessao.py
+"""
+Controle do arquivo de sessão (`edp_session.json`) compartilhado entre workers.
+
+- Ao lado do estado do Playwright fica `edp_session.meta.json` com o instante
+  da última validação bem-sucedida; a sessão é considerada fresca por
+  `SESSAO_TTL` segundos e renovada proativamente `SESSAO_RENOVAR_ANTES`
+  segundos antes disso.
+- Logins e regravações do estado são serializados por uma trava de arquivo
+  (`edp_session.json.lock`, via `fcntl` ou `msvcrt`), valendo entre threads
+  e entre processos.
+- O estado é sempre gravado em um arquivo temporário e renomeado, para que
+  nenhum worker leia uma sessão pela metade.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SESSAO_TTL = int(os.getenv("SESSAO_TTL", "1800"))
+"""Tempo (em segundos) em que uma sessão validada é considerada fresca."""
+
+SESSAO_RENOVAR_ANTES = int(os.getenv("SESSAO_RENOVAR_ANTES", "300"))
+"""Margem (em segundos) antes do fim do TTL a partir da qual a sessão é renovada."""
+
+def _caminho_meta(caminho: str) -> str:
+    return os.path.splitext(caminho)[0] + ".meta.json"
+
+class TravaArquivo:
+    """Trava exclusiva baseada em arquivo; bloqueia até ser obtida."""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._fd: Optional[int] = None
+
+    def adquirir(self) -> None:
+        fd = os.open(self.caminho, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:  # LK_LOCK desiste após ~10 s; continua tentando
+                        continue
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def liberar(self) -> None:
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.adquirir()
+        return self
+
+    def __exit__(self, *exc):
+        self.liberar()
+
+def trava_sessao(caminho: str) -> TravaArquivo:
+    """Trava que serializa logins e gravações do arquivo de sessão `caminho`."""
+    return TravaArquivo(f"{caminho}.lock")
+
+def carregar_estado(caminho: str) -> Optional[Dict[str, Any]]:
+    """Lê o storage state salvo, ou None se não existir ou estiver corrompido."""
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            estado = json.load(f)
+        return estado if isinstance(estado, dict) else None
+    except (OSError, ValueError):
+        return None
+
+def _gravar_json_atomico(caminho: str, dados: Dict[str, Any]) -> None:
+    tmp = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, caminho)
+
+def gravar_estado(caminho: str, estado: Dict[str, Any]) -> None:
+    """Grava atomicamente o storage state e registra a validação."""
+    _gravar_json_atomico(caminho, estado)
+    registrar_validacao(caminho)
+
+def registrar_validacao(caminho: str) -> None:
+    """Marca a sessão em `caminho` como validada agora."""
+    _gravar_json_atomico(_caminho_meta(caminho), {"validada_em": time.time()})
+
+def _validada_em(caminho: str) -> Optional[float]:
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with open(_caminho_meta(caminho), encoding="utf-8") as f:
+            return float(json.load(f)["validada_em"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def idade_sessao(caminho: str) -> Optional[float]:
+    """Segundos desde a última validação, ou None se não houver registro."""
+    validada_em = _validada_em(caminho)
+    return None if validada_em is None else time.time() - validada_em
+
+def sessao_fresca(caminho: str) -> bool:
+    """True se a sessão foi validada há menos de `SESSAO_TTL - SESSAO_RENOVAR_ANTES` segundos."""
+    idade = idade_sessao(caminho)
+    return idade is not None and idade < SESSAO_TTL - SESSAO_RENOVAR_ANTES
+
+def validada_apos(caminho: str, instante: float) -> bool:
+    """
+    True se a sessão foi validada depois de `instante` (um `time.time()`).
+
+    Usado por quem viu a sessão expirar: se outro worker a renovou depois que
+    a navegação rejeitada começou, basta reaproveitar a sessão gravada.
+    """
+    validada_em = _validada_em(caminho)
+    return validada_em is not None and validada_em > instante
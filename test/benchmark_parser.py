@@ -0,0 +1,193 @@
+"""
+Benchmark do parser regex sobre faturas sintéticas (`test/faturas_sinteticas.py`).
+
+Mede faturas por segundo (texto e, com --pdf, PDF → texto → dados), a
+latência de cada campo da tabela `CAMPOS`, o pico de memória por fatura e a
+taxa de acerto contra os valores gerados. Compara com uma baseline salva e
+aponta regressões acima da tolerância.
+
+Uso:
+    python test/benchmark_parser.py --quantidade 500 --salvar-baseline
+    python test/benchmark_parser.py --quantidade 500 --pdf --tolerancia 30
+"""
+# seger/test/benchmark_parser.py
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "test"))
+
+from faturas_sinteticas import corpus, pdf_fatura  # noqa: E402
+from src.parser_regex import (  # noqa: E402
+    MOTOR,
+    estatisticas_campos,
+    extrair_dados_completos_da_fatura_regex,
+    secoes_encontradas,
+    zerar_estatisticas_campos,
+)
+from src.utils.pdf_texto import backend_padrao, extrair_texto  # noqa: E402
+
+BASELINE_PADRAO = os.path.join(RAIZ, "test", "baseline_parser.json")
+
+def _valor(dados, caminho: str):
+    """Navega "a.b.c" no resultado; em listas, escolhe o item cujo nome/descrição começa com o trecho."""
+    atual = dados
+    for parte in caminho.split("."):
+        if isinstance(atual, list):
+            atual = next((item for item in atual
+                          if str(item.get("nome") or item.get("descricao") or "").startswith(parte)), None)
+        elif isinstance(atual, dict):
+            atual = atual.get(parte)
+        if atual is None:
+            return None
+    return atual
+
+def _confere(obtido, esperado) -> bool:
+    if isinstance(esperado, float):
+        return isinstance(obtido, (int, float)) and abs(obtido - esperado) < 1e-6
+    return obtido == esperado
+
+def _vazao(textos: list[str], repeticoes: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for texto in textos:
+            extrair_dados_completos_da_fatura_regex(texto)
+    duracao = time.perf_counter() - inicio
+    return round(len(textos) * repeticoes / duracao, 1) if duracao else 0.0
+
+def _memoria(textos: list[str]) -> dict:
+    picos = []
+    tracemalloc.start()
+    for texto in textos:
+        tracemalloc.reset_peak()
+        antes = tracemalloc.get_traced_memory()[0]
+        extrair_dados_completos_da_fatura_regex(texto)
+        picos.append(tracemalloc.get_traced_memory()[1] - antes)
+    tracemalloc.stop()
+    return {"pico_medio_kib": round(sum(picos) / len(picos) / 1024, 1), "pico_max_kib": round(max(picos) / 1024, 1)}
+
+def _acertos(textos: list[str], esperados: list[dict]) -> dict:
+    contagem: dict[str, list[int]] = {}
+    for texto, esperado in zip(textos, esperados):
+        dados = extrair_dados_completos_da_fatura_regex(texto)
+        for caminho, valor in esperado.items():
+            par = contagem.setdefault(caminho, [0, 0])
+            par[0] += _confere(_valor(dados, caminho), valor)
+            par[1] += 1
+    return {caminho: round(ok / total, 4) for caminho, (ok, total) in contagem.items()}
+
+def _pdfs(pdfs: list[bytes], backend: str) -> dict:
+    inicio = time.perf_counter()
+    for pdf in pdfs:
+        extrair_dados_completos_da_fatura_regex(extrair_texto(pdf, backend=backend, parar=secoes_encontradas))
+    duracao = time.perf_counter() - inicio
+    return {"backend": backend, "faturas_por_segundo": round(len(pdfs) / duracao, 1) if duracao else 0.0}
+
+def _fatias(campos: list[dict]) -> dict[str, float]:
+    total = sum(c["ms_medio"] for c in campos) or 1.0
+    return {c["campo"]: round(c["ms_medio"] / total * 100, 3) for c in campos}
+
+def _comparar(atual: dict, baseline: dict, tolerancia: float) -> int:
+    """Imprime as variações contra a baseline e devolve o número de regressões."""
+    regressoes = 0
+
+    def linha(nome: str, antes: float, depois: float, maior_melhor: bool) -> None:
+        nonlocal regressoes
+        if not antes:
+            return
+        variacao = (depois - antes) / antes * 100
+        piorou = -variacao > tolerancia if maior_melhor else variacao > tolerancia
+        regressoes += piorou
+        print(f"   {'⚠️ ' if piorou else '  '}{nome:<45} {antes:>10.3f} → {depois:>10.3f}  ({variacao:+.1f}%)")
+
+    print(f"📏 Comparação com a baseline de {baseline.get('data', '?')} (tolerância {tolerancia:.0f}%)")
+    linha("faturas/s (texto)", baseline["faturas_por_segundo"], atual["faturas_por_segundo"], True)
+    if "pdf" in atual and "pdf" in baseline:
+        linha(f"faturas/s (pdf, {atual['pdf']['backend']})",
+              baseline["pdf"]["faturas_por_segundo"], atual["pdf"]["faturas_por_segundo"], True)
+    linha("pico de memória médio (KiB)", baseline["memoria"]["pico_medio_kib"], atual["memoria"]["pico_medio_kib"], False)
+    # por campo compara a fatia do tempo total: ruído da máquina afeta todos igualmente
+    fatias_antes, fatias = _fatias(baseline["campos"]), _fatias(atual["campos"])
+    for campo, fatia in fatias.items():
+        if campo in fatias_antes:
+            linha(f"{campo} (% do tempo)", fatias_antes[campo], fatia, False)
+    for caminho, taxa in atual["acertos"].items():
+        antes = baseline["acertos"].get(caminho)
+        if antes is not None and taxa < antes:
+            regressoes += 1
+            print(f"   ⚠️ acerto de {caminho}: {antes:.2%} → {taxa:.2%}")
+    return regressoes
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark do parser regex sobre faturas sintéticas.")
+    parser.add_argument("--quantidade", type=int, default=200)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--pdf", action="store_true", help="Também mede PDF → texto → dados")
+    parser.add_argument("--backend", default=None, help="Backend de PDF (padrão: PDF_BACKEND)")
+    parser.add_argument("--baseline", default=BASELINE_PADRAO, help="Arquivo da baseline")
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava esta medição como baseline")
+    parser.add_argument("--tolerancia", type=float, default=20.0, help="Piora aceitável, em %%")
+    parser.add_argument("--json", help="Grava o relatório neste arquivo")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)  # o parser regex loga cada extração
+    faturas = corpus(args.quantidade, args.semente)
+    textos = [texto.replace("\f", "\n") for texto, _ in faturas]
+    esperados = [esperado for _, esperado in faturas]
+
+    print(f"🏁 {len(textos)} faturas sintéticas × {args.repeticoes} repetições (motor {MOTOR})")
+    extrair_dados_completos_da_fatura_regex(textos[0])  # aquece compilações e imports
+    zerar_estatisticas_campos()
+    relatorio = {
+        "data": time.strftime("%Y-%m-%d %H:%M"),
+        "python": platform.python_version(),
+        "motor": MOTOR,
+        "quantidade": len(textos),
+        "semente": args.semente,
+        "faturas_por_segundo": _vazao(textos, args.repeticoes),
+        "campos": [
+            {k: c[k] for k in ("campo", "ms_medio", "taxa_acerto", "motor")}
+            for c in estatisticas_campos()
+        ],
+    }
+    relatorio["memoria"] = _memoria(textos)
+    relatorio["acertos"] = _acertos(textos, esperados)
+    if args.pdf:
+        relatorio["pdf"] = _pdfs([pdf_fatura(texto) for texto, _ in faturas], backend_padrao(args.backend))
+
+    print(f"⚡ {relatorio['faturas_por_segundo']:.1f} faturas/s (texto)")
+    if args.pdf:
+        print(f"📄 {relatorio['pdf']['faturas_por_segundo']:.1f} faturas/s (pdf, {relatorio['pdf']['backend']})")
+    print(f"🧠 pico de memória por fatura: {relatorio['memoria']['pico_medio_kib']:.1f} KiB "
+          f"(máx {relatorio['memoria']['pico_max_kib']:.1f} KiB)")
+    print("⏱️ Campos mais lentos (ms por execução):")
+    for campo in sorted(relatorio["campos"], key=lambda c: c["ms_medio"], reverse=True)[:10]:
+        print(f"   {campo['campo']:<40} {campo['ms_medio']:>8.4f}  [{campo['motor']}]")
+    print("🎯 Acerto contra os valores gerados:")
+    for caminho, taxa in relatorio["acertos"].items():
+        print(f"   {'✅' if taxa == 1 else '❌'} {caminho:<42} {taxa:.2%}")
+
+    regressoes = 0
+    if os.path.exists(args.baseline) and not args.salvar_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressoes = _comparar(relatorio, json.load(f), args.tolerancia)
+        print(f"{'⚠️' if regressoes else '✅'} {regressoes} regressões")
+    if args.salvar_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        print(f"💾 Baseline gravada em {args.baseline}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    sys.exit(1 if regressoes else 0)
+
+if __name__ == "__main__":
+    main()
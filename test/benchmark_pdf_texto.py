@@ -0,0 +1,102 @@
+"""
+Benchmark dos backends de texto de PDF (`src/utils/pdf_texto.py`).
+
+Para cada backend, extrai o texto de todos os PDFs informados, mede páginas
+por segundo e roda `extrair_dados_completos_da_fatura_regex` sobre o texto,
+comparando o resultado com o do primeiro backend da lista.
+
+Uso:
+    python test/benchmark_pdf_texto.py faturas_edp/ --repeticoes 3
+    python test/benchmark_pdf_texto.py fatura.pdf --backends pypdf2,pypdfium2 --json relatorio.json
+"""
+# seger/test/benchmark_pdf_texto.py
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from src.parser_regex import extrair_dados_completos_da_fatura_regex  # noqa: E402
+from src.utils.pdf_texto import BACKENDS, paginas  # noqa: E402
+
+def _listar_pdfs(entradas: list[str]) -> list[str]:
+    pdfs = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            for raiz, _, arquivos in os.walk(entrada):
+                pdfs += [os.path.join(raiz, a) for a in sorted(arquivos) if a.lower().endswith(".pdf")]
+        else:
+            pdfs.append(entrada)
+    return pdfs
+
+def _medir(backend: str, pdfs: list[str], repeticoes: int) -> tuple[dict, dict]:
+    textos: dict[str, str] = {}
+    total_paginas, falhas = 0, {}
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for pdf in pdfs:
+            try:
+                lidas = list(paginas(pdf, backend))
+            except Exception as e:
+                falhas[pdf] = f"{type(e).__name__}: {e}"
+                continue
+            total_paginas += len(lidas)
+            textos[pdf] = "\n".join(lidas)
+    duracao = time.perf_counter() - inicio
+
+    resultados = {pdf: extrair_dados_completos_da_fatura_regex(texto) for pdf, texto in textos.items()}
+    return {
+        "backend": backend,
+        "paginas": total_paginas,
+        "segundos": round(duracao, 3),
+        "paginas_por_segundo": round(total_paginas / duracao, 1) if duracao else 0.0,
+        "falhas": falhas,
+    }, resultados
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compara a velocidade e o resultado dos backends de texto de PDF.")
+    parser.add_argument("entradas", nargs="+", help="PDFs ou pastas com PDFs")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Lista separada por vírgulas; o primeiro é a referência")
+    parser.add_argument("--repeticoes", type=int, default=1)
+    parser.add_argument("--json", help="Grava o relatório neste arquivo")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)  # o parser regex loga cada extração
+    pdfs = _listar_pdfs(args.entradas)
+    if not pdfs:
+        sys.exit("Nenhum PDF encontrado.")
+    backends = [b.strip().lower() for b in args.backends.split(",") if b.strip()]
+
+    print(f"🏁 {len(pdfs)} PDFs × {args.repeticoes} repetições")
+    relatorio, referencia = [], None
+    for backend in backends:
+        try:
+            medicao, resultados = _medir(backend, pdfs, args.repeticoes)
+        except ImportError as e:
+            print(f"   {backend:<11} indisponível ({e})")
+            continue
+        if referencia is None:
+            referencia = resultados
+        divergentes = sorted(pdf for pdf in resultados if resultados[pdf] != referencia.get(pdf))
+        medicao["identicos"] = len(resultados) - len(divergentes)
+        medicao["divergentes"] = divergentes
+        relatorio.append(medicao)
+        print(
+            f"   {backend:<11} {medicao['paginas_por_segundo']:>8.1f} páginas/s"
+            f"  ({medicao['paginas']} páginas em {medicao['segundos']:.2f} s)"
+            f"  regex idêntico: {medicao['identicos']}/{len(resultados)}"
+            + (f"  falhas: {len(medicao['falhas'])}" if medicao["falhas"] else "")
+        )
+        for pdf in divergentes[:5]:
+            print(f"      ≠ {pdf}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"pdfs": len(pdfs), "repeticoes": args.repeticoes, "backends": relatorio}, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark de throughput do scraper contra o portal local de `test/portal_edp.py`.
+
+Sobe o portal em uma thread, aponta `EDP_BASE_URL` para ele, roda
+`baixar_faturas` (ou o motor assíncrono, ou o serviço com navegador aquecido)
+em uma pasta temporária e reporta faturas por minuto, falhas e o histograma
+de latência por etapa.
+
+Uso:
+    python test/benchmark_scraper.py --instalacoes 5 --meses 12 --workers 2 --latencia-ms 200
+"""
+# seger/test/benchmark_scraper.py
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "test"))
+
+from portal_edp import MESES, criar_portal  # noqa: E402
+
+def _subir_portal(app) -> tuple:
+    servidor = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=servidor.serve_forever, name="portal-edp", daemon=True)
+    thread.start()
+    return servidor, f"http://127.0.0.1:{servidor.server_port}"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mede faturas/minuto do scraper contra o portal local.")
+    parser.add_argument("--instalacoes", type=int, default=3)
+    parser.add_argument("--meses", type=int, default=12, help="Tamanho do intervalo pedido, a partir do mês atual")
+    parser.add_argument("--faturas", type=int, default=36, help="Faturas disponíveis por instalação no portal")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--engine", choices=("sync", "async", "daemon"), default="sync")
+    parser.add_argument("--latencia-ms", type=int, default=100)
+    parser.add_argument("--erro-faturas", type=float, default=0.0)
+    parser.add_argument("--erro-modal", type=float, default=0.0)
+    parser.add_argument("--pdfs", help="Pasta com PDFs de fixture")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--visivel", action="store_true", help="Abre o navegador com interface")
+    parser.add_argument("--json", help="Grava o relatório neste arquivo")
+    args = parser.parse_args()
+
+    args.json = os.path.abspath(args.json) if args.json else None
+    args.pdfs = os.path.abspath(args.pdfs) if args.pdfs else None
+
+    app = criar_portal(args.latencia_ms, args.erro_faturas, args.erro_modal, args.faturas, 6, args.pdfs, args.semente)
+    servidor, base_url = _subir_portal(app)
+
+    # O scraper lê a configuração e grava sessão/faturas relativas ao diretório atual
+    pasta = tempfile.mkdtemp(prefix="seger-bench-")
+    os.chdir(pasta)
+    os.environ.update({
+        "EDP_BASE_URL": base_url,
+        "EDP_LOGIN_EMAIL": "benchmark@local",
+        "EDP_LOGIN_SENHA": "benchmark",
+    })
+    from src.scraper import baixar_faturas
+    from src.scraper_async import baixar_faturas_async
+    from src.scraper_daemon import ServicoScraper
+
+    hoje = time.localtime()
+    fim_mes, fim_ano = hoje.tm_mon, hoje.tm_year
+    ini_total = fim_ano * 12 + fim_mes - 1 - (args.meses - 1)
+    data_inicio = f"{MESES[ini_total % 12]}-{ini_total // 12}"
+    data_fim = f"{MESES[fim_mes - 1]}-{fim_ano}"
+    instalacoes = [f"01600{n:05d}" for n in range(1, args.instalacoes + 1)]
+
+    print(f"🏁 {len(instalacoes)} instalações × {args.meses} meses ({data_inicio} → {data_fim}) em {base_url}")
+    inicio = time.perf_counter()
+    if args.engine == "async":
+        resultado = asyncio.run(baixar_faturas_async(instalacoes, data_inicio, data_fim, not args.visivel, args.workers))
+    elif args.engine == "daemon":
+        servico = ServicoScraper(not args.visivel)
+        try:
+            resultado = servico.executar(instalacoes, data_inicio, data_fim)
+        finally:
+            servico.parar()
+    else:
+        resultado = baixar_faturas(instalacoes, data_inicio, data_fim, not args.visivel, args.workers)
+    duracao = time.perf_counter() - inicio
+    servidor.shutdown()
+
+    total = len(resultado["pdfs"])
+    relatorio = {
+        "engine": args.engine,
+        "workers": args.workers,
+        "instalacoes": len(instalacoes),
+        "meses": args.meses,
+        "latencia_ms": args.latencia_ms,
+        "faturas": total,
+        "pdfs": resultado["pdfs"],
+        "segundos": round(duracao, 2),
+        "faturas_por_minuto": round(total / duracao * 60, 1) if duracao else 0.0,
+        "falhas": resultado["falhas"],
+        "metricas": resultado["metricas"],
+        "pasta": pasta,
+    }
+    print(f"📄 {total} faturas em {duracao:.1f} s → {relatorio['faturas_por_minuto']} faturas/minuto")
+    for etapa, m in resultado["metricas"].items():
+        print(f"   {etapa:<11} n={m['contagem']:<4} p50={m['p50_ms']:>8.0f} ms  p95={m['p95_ms']:>8.0f} ms")
+    if resultado["falhas"]:
+        print(f"⚠️ {len(resultado['falhas'])} instalações falharam.")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
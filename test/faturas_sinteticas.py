@@ -0,0 +1,270 @@
+"""
+Gerador de faturas sintéticas da EDP para testes e benchmarks do parser.
+
+Produz o texto de faturas do Grupo A com valores aleatórios e variações de
+layout (modalidade verde ou azul, SCEE com energia injetada, juros/multa,
+retenção de IR, bandeira, páginas de anexo), junto com os valores esperados
+de cada campo. Opcionalmente gera o PDF (uma ou mais páginas, fonte
+Helvetica/WinAnsi) a partir do texto.
+
+Uso:
+    python test/faturas_sinteticas.py --quantidade 50 --saida /tmp/faturas --pdf
+"""
+# seger/test/faturas_sinteticas.py
+import argparse
+import json
+import os
+import random
+from datetime import date, timedelta
+
+MESES = ("Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho",
+         "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro")
+SIGLAS = ("JAN", "FEV", "MAR", "ABR", "MAI", "JUN", "JUL", "AGO", "SET", "OUT", "NOV", "DEZ")
+
+UNIDADES = [
+    ("SECRETARIA DE ESTADO DA EDUCACAO", "ESCOLA ESTADUAL JOAO BATISTA"),
+    ("SECRETARIA DE ESTADO DA SAUDE", "HOSPITAL ESTADUAL CENTRAL"),
+    ("POLICIA MILITAR DO ESTADO", "QUARTEL DO COMANDO GERAL"),
+    ("DEPARTAMENTO DE ESTRADAS", "SEDE ADMINISTRATIVA"),
+]
+LOGRADOUROS = ["RUA DAS FLORES 123", "AV JERONIMO MONTEIRO 1000", "ROD BR 101 KM 5 SN", "RUA SETE DE SETEMBRO 45"]
+CIDADES = ["VITORIA - ES", "CARIACICA - ES", "SERRA - ES", "VILA VELHA - ES"]
+
+def br(valor: float, casas: int = 2) -> str:
+    """Formata no padrão brasileiro: 1.234,56."""
+    texto = f"{abs(valor):,.{casas}f}".replace(",", "_").replace(".", ",").replace("_", ".")
+    return texto
+
+def _item(rnd: random.Random, qtd: float, tarifa: float) -> tuple:
+    return qtd, tarifa, round(qtd * tarifa, 2)
+
+def gerar_fatura(
+    rnd: random.Random,
+    modalidade: str | None = None,
+    scee: bool | None = None,
+    juros: bool | None = None,
+    retencao: bool | None = None,
+    anexos: int | None = None,
+) -> tuple[str, dict]:
+    """
+    Gera o texto de uma fatura e os valores esperados dos principais campos.
+
+    Args:
+        rnd: Gerador aleatório (use uma semente para repetir o corpus).
+        modalidade: "verde" ou "azul"; sorteada se None.
+        scee: Inclui energia injetada (compensação SCEE); sorteado se None.
+        juros: Inclui juros de mora e multa; sorteado se None.
+        retencao: Inclui retenção de imposto de renda; sorteado se None.
+        anexos: Páginas de anexo depois dos dados da fatura; sorteado se None.
+
+    Returns:
+        Uma tupla (texto, esperado), com as páginas separadas por "\\f" e
+        `esperado` mapeando caminhos como "consumo_ativo.ponta_kwh" para o
+        valor gerado.
+    """
+    modalidade = modalidade or rnd.choice(("verde", "azul"))
+    scee = rnd.random() < 0.3 if scee is None else scee
+    juros = rnd.random() < 0.2 if juros is None else juros
+    retencao = rnd.random() < 0.5 if retencao is None else retencao
+    anexos = rnd.choice((0, 0, 1, 2, 4)) if anexos is None else anexos
+
+    ano = rnd.randint(2021, 2025)
+    mes = rnd.randint(1, 12)
+    fim = date(ano, mes, rnd.randint(5, 25))
+    inicio = fim - timedelta(days=rnd.randint(28, 33))
+    instalacao = f"{rnd.randint(1, 99_999_999):010d}"
+    cliente = f"{rnd.randint(1, 99_999_999):010d}"
+    subgrupo = rnd.choice(("A4", "A4", "A3a"))[:2]
+    tensao = rnd.choice(("13.800", "11.400", "34.500"))
+    unidade = rnd.choice(UNIDADES)
+
+    ponta = round(rnd.uniform(500, 20_000), 2)
+    fora = round(rnd.uniform(5_000, 200_000), 2)
+    dem_fp = rnd.choice((75, 100, 150, 200, 300, 500))
+    dem_p = rnd.choice((50, 75, 100, 150, 200)) if modalidade == "azul" else None
+    max_p = round(rnd.uniform(0.5, 1.1) * (dem_p or dem_fp), 2)
+    max_fp = round(rnd.uniform(0.5, 1.1) * dem_fp, 2)
+    injetada = round(rnd.uniform(100, 5_000), 2) if scee else 0.0
+    reativa_p, reativa_fp = round(rnd.uniform(100, 5_000)), round(rnd.uniform(1_000, 50_000))
+    ere_p, ere_fp = round(rnd.uniform(0, 50), 2), round(rnd.uniform(0, 500), 2)
+
+    itens = []
+    for sigla, tarifa_p, tarifa_fp in (("TUSD", rnd.uniform(0.05, 0.09), rnd.uniform(0.05, 0.09)),
+                                        ("TE", rnd.uniform(0.4, 0.6), rnd.uniform(0.25, 0.35))):
+        q, t, v = _item(rnd, ponta, round(tarifa_p, 5))
+        itens.append(f"{sigla} - Consumo Ativo Ponta kWh {br(q)} {br(t, 5)} {br(v)}")
+        q, t, v = _item(rnd, fora, round(tarifa_fp, 5))
+        itens.append(f"{sigla} - Cons Ativo FPonta kWh {br(q)} {br(t, 5)} {br(v)}")
+    if modalidade == "azul":
+        for periodo, dem in (("Ponta", dem_p), ("FPonta", dem_fp)):
+            q, t, v = _item(rnd, dem, round(rnd.uniform(20, 60), 5))
+            itens.append(f"Demanda {periodo} kW {br(q)} {br(t, 5)} {br(v)}")
+    else:
+        q, t, v = _item(rnd, dem_fp, round(rnd.uniform(15, 30), 5))
+        itens.append(f"Demanda kW {br(q)} {br(t, 5)} {br(v)}")
+    if max_fp < dem_fp:
+        itens.append("Demanda Não Utilizada kW {} {} {} {}".format(
+            *(br(x, c) for x, c in zip((*_item(rnd, round(dem_fp - max_fp, 2), 18.5), 0.0), (2, 5, 2, 2)))))
+    if rnd.random() < 0.4:
+        q, t, v = _item(rnd, fora, 0.04463)
+        itens.append(f"Adicional Bandeira Vermelha 1 kWh {br(q)} {br(t, 5)} {br(v)} {br(v * 0.1)}")
+    ere_valor = round((ere_p + ere_fp) * 0.31234, 2)
+    itens.append(f"ERE-Energia Reativa Excedente kWh {br(ere_p + ere_fp)} 0,31234 {br(ere_valor)} {br(ere_valor * 0.1)}")
+    cip = round(rnd.uniform(50, 900), 2)
+    itens.append(f"Contribuição de Ilum. Pública - Lei Municipal un 1 {br(cip)} {br(cip)} 0,00")
+    multa = None
+    if juros:
+        referencia = SIGLAS[(mes - 2) % 12]
+        itens.append(f"Juros de Mora Ref. {referencia} 1 un {br(rnd.uniform(1, 50))} {br(rnd.uniform(1, 50))}")
+        multa = round(rnd.uniform(10, 200), 2)
+        itens.append(f"Multa Ref: {referencia} 1 un {br(multa * 2)} {br(multa)}")
+    ir = None
+    if retencao:
+        ir = round(rnd.uniform(50, 2_000), 2)
+        itens.append(f"Retenção Imposto de Renda un {br(ir)}- 0,00")
+
+    base = round(sum(float(linha.split()[-1].replace(".", "").replace(",", ".")) for linha in itens[:4]) * 1.3, 2)
+    aliq_icms = rnd.choice((17, 25))
+    icms = round(base * aliq_icms / 100, 2)
+    pis, cofins = round(base * 0.0165, 2), round(base * 0.076, 2)
+    total = round(base + icms, 2)
+
+    paginas = ["\n".join([
+        "EDP ESPIRITO SANTO DISTRIBUICAO DE ENERGIA S.A.",
+        "CNPJ: 28152650000171",
+        "Rua Florentino Faller, 80 - Enseada do Sua",
+        unidade[0],
+        unidade[1],
+        rnd.choice(LOGRADOUROS),
+        rnd.choice(CIDADES),
+        f"{rnd.randint(29000, 29999)}-{rnd.randint(0, 999):03d}",
+        f"CNPJ {rnd.randint(10**13, 10**14 - 1)}",
+        "PODER PUBLICO - ESTADUAL",
+        f"Trifasico Grupo A {subgrupo} {modalidade.upper()}",
+        f"Tensão Nominal {tensao} V",
+        f"Referente a {MESES[mes - 1]}/{ano}",
+        f"Roteiro de leitura: Leitura anterior e atual : {inicio:%d/%m/%Y} a {fim:%d/%m/%Y}",
+        "Itens da Fatura",
+        *itens,
+        f"TOTAL {br(total)} {br(icms)}",
+        "Tributos",
+        f"{br(base)} 0,00 0,00 {aliq_icms} ICMS {br(icms)}",
+        f"{br(pis)} 1,65 {br(base)} PIS",
+        f"{br(cofins)} 7,60 {br(base)} COFINS",
+    ]), "\n".join([
+        "Informações Técnicas",
+        *( [f"Demanda Contratual P-KW {dem_p}", f"Demanda Contratual FP-KW {dem_fp}"]
+           if modalidade == "azul" else [f"Demanda Contratual-KW {dem_fp}"]),
+        f"Demanda Máx Ponta {fim:%d/%m} {br(max_p)} kW",
+        f"Demanda Máx FPonta {fim:%d/%m} {br(max_fp)} kW",
+        f"DMCR Ponta {br(max_p * 0.95)} kW",
+        f"DMCR FPonta {br(max_fp * 0.95)} kW",
+        f"Energia Reativa Ponta {fim:%d/%m} {reativa_p} KVH",
+        f"Energia Reativa FPonta {fim:%d/%m} {reativa_fp} KVH",
+        f"ERE Ponta {fim:%d/%m} {br(ere_p)} KWH",
+        f"ERE Fora Ponta {fim:%d/%m} {br(ere_fp)} KWH",
+        *([f"Energia Injetada FPonta {br(injetada)}- KWH"] if scee else []),
+        f"COD. IDENT. {cliente}",
+        f"{instalacao}PAG",
+    ])]
+    for n in range(anexos):
+        paginas.append("\n".join(
+            f"Anexo {n + 1} - Informação regulatória {i}: a ANEEL estabelece os procedimentos de faturamento "
+            f"e os direitos do consumidor ({rnd.randint(1, 999)})."
+            for i in range(40)
+        ))
+
+    esperado = {
+        "identificacao.numero_instalacao": instalacao,
+        "identificacao.numero_cliente": cliente,
+        "identificacao.subgrupo": subgrupo,
+        "identificacao.modalidade": modalidade,
+        "identificacao.mes_referencia": f"{mes:02d}/{ano}",
+        "leituras.leitura_inicio": f"{inicio:%d/%m/%Y}",
+        "leituras.leitura_fim": f"{fim:%d/%m/%Y}",
+        "consumo_ativo.ponta_kwh": ponta,
+        "consumo_ativo.fora_ponta_kwh": fora,
+        "consumo_ativo.energia_injetada_kwh": -injetada if scee else 0.0,
+        "demanda.contratada_fp_kw": float(dem_fp),
+        "energia_reativa.ponta_kvarh": float(reativa_p),
+        "energia_reativa.fora_ponta_kvarh": float(reativa_fp),
+        "impostos.ICMS.aliquota": float(aliq_icms),
+        "impostos.PIS.valor": pis,
+        "impostos.COFINS.valor": cofins,
+        "valores_totais.valor_total_fatura": total,
+    }
+    if dem_p is not None:
+        esperado["demanda.contratada_p_kw"] = float(dem_p)
+    if multa is not None:
+        esperado["componentes_extras.Multa.valor_total"] = multa
+    if ir is not None:
+        esperado["componentes_extras.Retenção.valor_total"] = -ir
+    return "\f".join(paginas), esperado
+
+def corpus(quantidade: int, semente: int = 42) -> list[tuple[str, dict]]:
+    """Gera `quantidade` faturas (texto, esperado) de forma reprodutível."""
+    rnd = random.Random(semente)
+    return [gerar_fatura(rnd) for _ in range(quantidade)]
+
+def _escapar(linha: str) -> str:
+    return linha.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def pdf_fatura(texto: str) -> bytes:
+    """
+    Gera o PDF de uma fatura sintética: uma página por trecho separado por "\\f".
+
+    Cada linha do texto vira uma linha da página (Helvetica 8, WinAnsi), então
+    os extratores de texto devolvem as mesmas linhas.
+    """
+    paginas = texto.split("\f")
+    n = len(paginas)
+    # 1: catálogo, 2: páginas, 3: fonte, depois (página, conteúdo) por página
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(n)), n),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    for i, pagina in enumerate(paginas):
+        linhas = " T* ".join(f"({_escapar(l)}) Tj" for l in pagina.split("\n"))
+        conteudo = f"BT /F1 8 Tf 10 TL 30 810 Td {linhas} ET".encode("cp1252", errors="replace")
+        objetos.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents %d 0 R"
+                       b" /Resources << /Font << /F1 3 0 R >> >> >>" % (5 + 2 * i))
+        objetos.append(b"<< /Length %d >>\nstream\n" % len(conteudo) + conteudo + b"\nendstream")
+
+    saida = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for numero, obj in enumerate(objetos, start=1):
+        offsets.append(len(saida))
+        saida += b"%d 0 obj\n" % numero + obj + b"\nendobj\n"
+    xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    for off in offsets:
+        saida += b"%010d 00000 n \n" % off
+    saida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, xref)
+    return bytes(saida)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Gera faturas sintéticas da EDP (texto, PDF e valores esperados).")
+    parser.add_argument("--quantidade", type=int, default=20)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", required=True, help="Pasta de destino")
+    parser.add_argument("--pdf", action="store_true", help="Também gera o PDF de cada fatura")
+    args = parser.parse_args()
+
+    os.makedirs(args.saida, exist_ok=True)
+    esperados = {}
+    for i, (texto, esperado) in enumerate(corpus(args.quantidade, args.semente)):
+        nome = f"fatura_{i:05d}"
+        with open(os.path.join(args.saida, nome + ".txt"), "w", encoding="utf-8") as f:
+            f.write(texto)
+        if args.pdf:
+            with open(os.path.join(args.saida, nome + ".pdf"), "wb") as f:
+                f.write(pdf_fatura(texto))
+        esperados[nome] = esperado
+    with open(os.path.join(args.saida, "esperado.json"), "w", encoding="utf-8") as f:
+        json.dump(esperados, f, ensure_ascii=False, indent=2)
+    print(f"🧾 {args.quantidade} faturas em {args.saida}")
+
+if __name__ == "__main__":
+    main()
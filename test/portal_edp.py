@@ -0,0 +1,285 @@
+"""
+Portal local que imita as páginas do edponline.com.br usadas pelo scraper.
+
+Reproduz o login (banner de cookies, `#Email`, `button#acessar`), a consulta
+de débitos (`input[name="Instalacao"]`, "Avançar", `a.instalacao`), a lista
+de faturas (`div.card.card-extrato` + "Ver mais faturas"), o modal "2ª Via
+de Fatura" com "Baixar"/"Voltar" e a mensagem intermitente "Desculpe-nos!".
+Latência e taxas de erro são configuráveis, e os PDFs servidos vêm de uma
+pasta de fixtures (ciclada) ou são gerados na hora.
+
+Uso:
+    python test/portal_edp.py --porta 8765 --latencia-ms 300 --erro-faturas 0.1
+    EDP_BASE_URL=http://127.0.0.1:8765 python app.py
+"""
+# seger/test/portal_edp.py
+import argparse
+import glob
+import json
+import os
+import random
+import secrets
+import threading
+import time
+from datetime import date
+
+from flask import Flask, Response, abort, make_response, redirect, request
+
+MESES = ("JAN", "FEV", "MAR", "ABR", "MAI", "JUN", "JUL", "AGO", "SET", "OUT", "NOV", "DEZ")
+
+COOKIE_SESSAO = "edp_sessao_local"
+
+_ESTILO = """
+<style>
+  body { font-family: sans-serif; min-height: 1400px; }
+  .oculto { display: none !important; }
+  #onetrust-banner-sdk { position: fixed; bottom: 0; left: 0; right: 0; padding: 16px; background: #eee; }
+  .card-extrato { border: 1px solid #ccc; margin: 8px 0; padding: 8px; }
+  .modal { position: fixed; top: 10%; left: 10%; right: 10%; padding: 24px; background: #fff; border: 2px solid #333; }
+  .icon-edp-circle-error { cursor: pointer; font-style: normal; }
+</style>
+"""
+
+def referencias(quantidade: int, ultimo: date) -> list[str]:
+    """`quantidade` referências "MMM-AAAA", da mais recente (`ultimo`) para a mais antiga."""
+    refs, mes, ano = [], ultimo.month, ultimo.year
+    for _ in range(quantidade):
+        refs.append(f"{MESES[mes - 1]}-{ano}")
+        mes -= 1
+        if mes == 0:
+            mes, ano = 12, ano - 1
+    return refs
+
+def pdf_minimo(texto: str) -> bytes:
+    """Gera um PDF de uma página com `texto`, válido o bastante para os extratores de texto."""
+    conteudo = f"BT /F1 12 Tf 72 720 Td ({texto}) Tj ET".encode("latin-1")
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R"
+        b" /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(conteudo) + conteudo + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    saida = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for n, obj in enumerate(objetos, start=1):
+        offsets.append(len(saida))
+        saida += b"%d 0 obj\n" % n + obj + b"\nendobj\n"
+    xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    for off in offsets:
+        saida += b"%010d 00000 n \n" % off
+    saida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, xref)
+    return bytes(saida)
+
+def criar_portal(
+    latencia_ms: int = 0,
+    erro_faturas: float = 0.0,
+    erro_modal: float = 0.0,
+    faturas: int = 24,
+    por_pagina: int = 6,
+    pasta_pdfs: str | None = None,
+    semente: int | None = None,
+) -> Flask:
+    """
+    Cria o app Flask do portal local.
+
+    Args:
+        latencia_ms: Atraso aplicado a cada página, a cada "Ver mais faturas" e a cada PDF.
+        erro_faturas: Probabilidade de a lista de faturas vir com a mensagem "Desculpe-nos!".
+        erro_modal: Probabilidade de o modal abrir sem o botão "Baixar" (só "Voltar").
+        faturas: Quantidade de faturas de cada instalação.
+        por_pagina: Cards exibidos inicialmente e a cada "Ver mais faturas".
+        pasta_pdfs: Pasta com PDFs de fixture servidos em ciclo; sem ela, PDFs são gerados.
+        semente: Semente do sorteio de erros, para execuções reprodutíveis.
+    """
+    app = Flask(__name__)
+    sorteio = random.Random(semente)
+    sorteio_lock = threading.Lock()
+    sessoes: set[str] = set()
+    fixtures = sorted(glob.glob(os.path.join(pasta_pdfs, "*.pdf"))) if pasta_pdfs else []
+    contadores = {"paginas": 0, "pdfs": 0, "erros_faturas": 0, "erros_modal": 0}
+    refs = referencias(faturas, date.today().replace(day=1))
+
+    def _esperar() -> None:
+        if latencia_ms:
+            time.sleep(latencia_ms / 1000)
+
+    def _sortear(probabilidade: float) -> bool:
+        with sorteio_lock:
+            return sorteio.random() < probabilidade
+
+    def _logado() -> bool:
+        return request.cookies.get(COOKIE_SESSAO) in sessoes
+
+    def _pagina(titulo: str, corpo: str, script: str = "") -> Response:
+        _esperar()
+        contadores["paginas"] += 1
+        html = f"<!doctype html><html><head><meta charset='utf-8'><title>{titulo}</title>{_ESTILO}</head>" \
+               f"<body>{corpo}<script>{script}</script></body></html>"
+        return make_response(html)
+
+    @app.get("/engenheiro")
+    def login():
+        corpo = """
+        <div id="onetrust-consent-sdk"><div id="onetrust-banner-sdk">
+          Usamos cookies. <button id="onetrust-accept-btn-handler">Aceitar</button>
+        </div></div>
+        <form method="post" action="/engenheiro/login">
+          <input type="radio" id="option-1" name="perfil" value="pf"><label for="option-1">Pessoa Física</label>
+          <input id="Email" name="Email" type="email">
+          <input id="Senha" name="Senha" type="password">
+          <button id="acessar" type="submit" disabled>Acessar</button>
+        </form>
+        """
+        script = """
+        document.getElementById('onetrust-accept-btn-handler').onclick = () =>
+            document.getElementById('onetrust-banner-sdk').classList.add('oculto');
+        const habilitar = () => document.getElementById('acessar').disabled =
+            !(document.getElementById('Email').value && document.getElementById('Senha').value);
+        ['Email', 'Senha'].forEach((id) => document.getElementById(id).addEventListener('input', habilitar));
+        """
+        return _pagina("Login", corpo, script)
+
+    @app.post("/engenheiro/login")
+    def autenticar():
+        _esperar()
+        if not request.form.get("Email") or not request.form.get("Senha"):
+            return redirect("/engenheiro")
+        token = secrets.token_hex(16)
+        sessoes.add(token)
+        resposta = redirect("/servicos/consulta-debitos")
+        resposta.set_cookie(COOKIE_SESSAO, token, httponly=True)
+        return resposta
+
+    @app.get("/servicos/consulta-debitos")
+    def consulta():
+        if not _logado():
+            return redirect("/engenheiro")
+        numero = request.args.get("Instalacao", "").strip()
+        lista = f'<a class="instalacao" href="/servicos/faturas/{numero}">Instalação {numero}</a>' if numero else ""
+        corpo = f"""
+        <h1>Consulta de débitos</h1>
+        <form method="get" action="/servicos/consulta-debitos">
+          <input name="Instalacao" value="{numero}">
+          <button type="submit">Avançar</button>
+        </form>
+        <div class="lista-instalacoes">{lista}</div>
+        """
+        return _pagina("Consulta", corpo)
+
+    @app.get("/servicos/faturas/<numero>")
+    def lista_faturas(numero):
+        if not _logado():
+            return redirect("/engenheiro")
+        sair = '<a class="edp-btn-dark" href="/servicos/consulta-debitos">Sair da Instalação</a>'
+        if _sortear(erro_faturas):
+            contadores["erros_faturas"] += 1
+            return _pagina("Faturas", f"{sair}<div class='alerta'><p>Desculpe-nos! Não foi possível carregar as suas faturas</p></div>")
+
+        corpo = f"""
+        {sair}
+        <div class="tab-content"><div class="tab-pane active" id="faturas"></div></div>
+        <button id="ver-mais" type="button">Ver mais faturas</button>
+        <div id="modal" class="modal oculto">
+          <h2>2ª Via de Fatura</h2>
+          <i class="icon-edp-circle-error fs-1" title="Fechar">✖</i>
+          <div id="modal-corpo"></div>
+        </div>
+        """
+        script = f"""
+        const refs = {json.dumps(refs)};
+        const numero = {json.dumps(numero)};
+        const porPagina = {por_pagina};
+        const latencia = {latencia_ms};
+        const pane = document.getElementById('faturas');
+        const verMais = document.getElementById('ver-mais');
+        const modal = document.getElementById('modal');
+        const modalCorpo = document.getElementById('modal-corpo');
+        let exibidas = 0;
+
+        function abrirModal(ref) {{
+            modal.classList.remove('oculto');
+            modalCorpo.innerHTML = '';
+            setTimeout(async () => {{
+                const r = await fetch('/servicos/faturas/' + numero + '/modal?ref=' + ref);
+                const info = await r.json();
+                modalCorpo.innerHTML = info.ok
+                    ? '<a href="/servicos/faturas/' + numero + '/pdf?ref=' + ref + '" download>Baixar</a>'
+                    : '<p>Não foi possível gerar a 2ª via.</p><button class="btn-outline-main-2" type="button">Voltar</button>';
+                const voltar = modalCorpo.querySelector('button');
+                if (voltar) voltar.onclick = () => modal.classList.add('oculto');
+            }}, latencia);
+        }}
+
+        function renderizar() {{
+            refs.slice(exibidas, exibidas + porPagina).forEach((ref) => {{
+                const card = document.createElement('div');
+                card.className = 'card card-extrato card-opcoes-segunda-via';
+                card.innerHTML = '<p>Referente: ' + ref.replace('-', '/') + '</p>'
+                               + '<p class="ver">Visualizar fatura</p>';
+                card.querySelector('.ver').onclick = () => abrirModal(ref);
+                pane.appendChild(card);
+            }});
+            exibidas = Math.min(refs.length, exibidas + porPagina);
+            verMais.classList.toggle('oculto', exibidas >= refs.length);
+        }}
+
+        verMais.onclick = () => setTimeout(renderizar, latencia);
+        modal.querySelector('.icon-edp-circle-error').onclick = () => modal.classList.add('oculto');
+        renderizar();
+        """
+        return _pagina("Faturas", corpo, script)
+
+    @app.get("/servicos/faturas/<numero>/modal")
+    def modal(numero):
+        if not _logado():
+            abort(401)
+        if _sortear(erro_modal):
+            contadores["erros_modal"] += 1
+            return {"ok": False}
+        return {"ok": True}
+
+    @app.get("/servicos/faturas/<numero>/pdf")
+    def pdf(numero):
+        if not _logado():
+            abort(401)
+        ref = request.args.get("ref", "")
+        if ref not in refs:
+            abort(404)
+        _esperar()
+        contadores["pdfs"] += 1
+        if fixtures:
+            with open(fixtures[refs.index(ref) % len(fixtures)], "rb") as f:
+                conteudo = f.read()
+        else:
+            conteudo = pdf_minimo(f"Fatura EDP instalacao {numero} referente {ref}")
+        resposta = make_response(conteudo)
+        resposta.headers["Content-Type"] = "application/pdf"
+        resposta.headers["Content-Disposition"] = f'attachment; filename="fatura_{numero}_{ref}.pdf"'
+        return resposta
+
+    @app.get("/__contadores")
+    def estatisticas():
+        return dict(contadores)
+
+    return app
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Portal local que imita o edponline.com.br para o scraper.")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--latencia-ms", type=int, default=0)
+    parser.add_argument("--erro-faturas", type=float, default=0.0, help="Probabilidade da mensagem 'Desculpe-nos!'")
+    parser.add_argument("--erro-modal", type=float, default=0.0, help="Probabilidade do modal abrir sem 'Baixar'")
+    parser.add_argument("--faturas", type=int, default=24, help="Faturas por instalação")
+    parser.add_argument("--por-pagina", type=int, default=6, help="Cards por 'Ver mais faturas'")
+    parser.add_argument("--pdfs", help="Pasta com PDFs de fixture (servidos em ciclo)")
+    parser.add_argument("--semente", type=int)
+    args = parser.parse_args()
+
+    app = criar_portal(args.latencia_ms, args.erro_faturas, args.erro_modal, args.faturas, args.por_pagina, args.pdfs, args.semente)
+    app.run(host="127.0.0.1", port=args.porta, threaded=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Regressão do parser regex sobre as faturas sintéticas (`test/faturas_sinteticas.py`).
+
+`test/dados/parser_regex_referencia.json` guarda a saída do parser anterior à
+tabela `CAMPOS` (um regex por campo, só `re`) para o mesmo corpus, em texto
+normal e com espaços trocados por NBSP. A saída atual tem de ser idêntica nos
+dois motores: `re` e, se o `google-re2` estiver instalado, RE2.
+
+Uso:
+    python -m pytest -q test/test_parser_regex.py
+    python test/test_parser_regex.py --gerar   # regrava a referência com o parser atual
+"""
+# seger/test/test_parser_regex.py
+import importlib.util
+import json
+import logging
+import os
+import random
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "test"))
+
+from faturas_sinteticas import corpus  # noqa: E402
+
+REFERENCIA = os.path.join(RAIZ, "test", "dados", "parser_regex_referencia.json")
+QUANTIDADE, SEMENTE = 30, 42
+
+def _com_nbsp(texto: str, semente: int) -> str:
+    """Troca ~30% dos espaços por NBSP, como sai de alguns PDFs."""
+    rnd = random.Random(semente)
+    return "".join("\xa0" if c == " " and rnd.random() < 0.3 else c for c in texto)
+
+def _casos() -> list[tuple[str, str]]:
+    casos = []
+    for i, (texto, _) in enumerate(corpus(QUANTIDADE, SEMENTE)):
+        texto = texto.replace("\f", "\n")
+        casos.append((f"{i:02d}", texto))
+        casos.append((f"{i:02d}-nbsp", _com_nbsp(texto, i)))
+    return casos
+
+def _carregar_parser(motor_re2: bool):
+    """Importa uma cópia isolada de `src.parser_regex` com `PARSER_RE2` fixado."""
+    anterior = os.environ.get("PARSER_RE2")
+    os.environ["PARSER_RE2"] = "1" if motor_re2 else "0"
+    try:
+        spec = importlib.util.spec_from_file_location(
+            f"parser_regex_{'re2' if motor_re2 else 're'}", os.path.join(RAIZ, "src", "parser_regex.py"))
+        modulo = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+    finally:
+        if anterior is None:
+            os.environ.pop("PARSER_RE2", None)
+        else:
+            os.environ["PARSER_RE2"] = anterior
+    return modulo
+
+CASOS = _casos()
+
+@pytest.fixture(scope="module")
+def referencia() -> dict:
+    with open(REFERENCIA, encoding="utf-8") as f:
+        return json.load(f)
+
+@pytest.fixture(scope="module", params=["re", "re2"])
+def parser(request):
+    if request.param == "re2":
+        pytest.importorskip("re2")
+    logging.disable(logging.WARNING)  # o parser loga cada extração
+    modulo = _carregar_parser(request.param == "re2")
+    assert modulo.MOTOR == request.param
+    yield modulo
+    logging.disable(logging.NOTSET)
+
+def test_referencia_cobre_o_corpus(referencia):
+    assert sorted(referencia) == sorted(nome for nome, _ in CASOS)
+
+@pytest.mark.parametrize("nome,texto", CASOS, ids=[nome for nome, _ in CASOS])
+def test_saida_igual_a_referencia(parser, referencia, nome, texto):
+    obtido = json.loads(json.dumps(parser.extrair_dados_completos_da_fatura_regex(texto), ensure_ascii=False))
+    assert obtido == referencia[nome]
+
+def gerar() -> None:
+    logging.disable(logging.WARNING)
+    from src.parser_regex import extrair_dados_completos_da_fatura_regex
+    saida = {nome: extrair_dados_completos_da_fatura_regex(texto) for nome, texto in CASOS}
+    os.makedirs(os.path.dirname(REFERENCIA), exist_ok=True)
+    with open(REFERENCIA, "w", encoding="utf-8") as f:
+        f.write("{\n" + ",\n".join(f"{json.dumps(nome)}: {json.dumps(dados, ensure_ascii=False)}"
+                                     for nome, dados in saida.items()) + "\n}\n")
+    print(f"💾 {len(saida)} saídas gravadas em {REFERENCIA}")
+
+if __name__ == "__main__":
+    if "--gerar" in sys.argv:
+        gerar()
+    else:
+        sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,54 @@
+"""
+Smoke test dos três motores do scraper contra o portal local (`test/portal_edp.py`).
+
+Cada motor ("sync", "async" e "daemon") baixa uma instalação × 3 meses com
+`test/benchmark_scraper.py`, em um subprocesso próprio: o scraper lê
+`EDP_BASE_URL` e grava sessão e faturas no diretório atual na importação.
+Os testes são pulados quando o Playwright ou o Chromium não estão
+instalados (`python -m playwright install chromium`).
+
+Uso:
+    python -m pytest -q test/test_scraper_smoke.py
+"""
+# seger/test/test_scraper_smoke.py
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARK = os.path.join(RAIZ, "test", "benchmark_scraper.py")
+MESES = 3
+
+def _chromium_disponivel() -> bool:
+    try:
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as p:
+            p.chromium.launch().close()
+        return True
+    except Exception:
+        return False
+
+pytestmark = pytest.mark.skipif(not _chromium_disponivel(), reason="Playwright/Chromium indisponível")
+
+@pytest.mark.parametrize("engine", ["sync", "async", "daemon"])
+def test_uma_instalacao(engine, tmp_path):
+    relatorio_json = tmp_path / "relatorio.json"
+    execucao = subprocess.run(
+        [sys.executable, BENCHMARK, "--instalacoes", "1", "--meses", str(MESES), "--engine", engine,
+         "--latencia-ms", "0", "--json", str(relatorio_json)],
+        capture_output=True, text=True, timeout=300,
+    )
+    assert execucao.returncode == 0, execucao.stderr[-2000:]
+
+    relatorio = json.loads(relatorio_json.read_text(encoding="utf-8"))
+    assert relatorio["falhas"] == []
+    assert relatorio["faturas"] == MESES
+    for pdf in relatorio["pdfs"]:
+        with open(pdf, "rb") as f:
+            assert f.read(4) == b"%PDF"
+    manifesto = os.path.join(os.path.dirname(relatorio["pdfs"][0]), "manifest.json")
+    with open(manifesto, encoding="utf-8") as f:
+        assert len(json.load(f)["referencias"]) == MESES